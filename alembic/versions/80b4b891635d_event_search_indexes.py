@@ -0,0 +1,53 @@
+"""event search indexes
+
+Adds the indexes declared on ``Event`` for keyword search and browsing to
+databases whose ``events`` table predates them (``create_all`` never adds
+indexes to existing tables). Indexes that already exist are skipped.
+
+Revision ID: 80b4b891635d
+Revises: e21fef704d8a
+Create Date: 2026-10-19 15:21:52.005551
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '80b4b891635d'
+down_revision: Union[str, Sequence[str], None] = 'e21fef704d8a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 名称 -> (列, 方言参数)；与 app.models.event.Event.__table_args__ 保持一致
+_INDEXES = {
+    "ft_events_text": (["name", "description", "location"], {"mysql_prefix": "FULLTEXT", "mysql_with_parser": "ngram"}),
+    "ix_events_status_start": (["status", "start_time"], {}),
+    "ix_events_updated_at": (["updated_at"], {}),
+}
+
+
+def _existing() -> set:
+    # --sql（离线）模式没有可检查的数据库：按索引都不存在生成 DDL
+    if context.is_offline_mode():
+        return set()
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes("events")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = _existing()
+    for name, (columns, kwargs) in _INDEXES.items():
+        if name not in existing:
+            op.create_index(name, "events", columns, **kwargs)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = _existing()
+    for name in reversed(list(_INDEXES)):
+        if name in existing:
+            op.drop_index(name, table_name="events")
@@ -0,0 +1,205 @@
+"""base schema
+
+Creates every table of the initial schema, so ``alembic upgrade head`` works
+on an empty database. Tables that already exist (databases created earlier
+with ``python -m app.cli init-db`` / ``create_all``) are skipped.
+
+Revision ID: e21fef704d8a
+Revises: 
+Create Date: 2026-10-19 16:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e21fef704d8a'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing() -> set:
+    # --sql（离线）模式没有可检查的数据库：按空库生成完整 DDL
+    if context.is_offline_mode():
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = _existing()
+    if "event_cancellation_jobs" not in existing:
+        op.create_table('event_cancellation_jobs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.Enum('pending', 'running', 'completed', 'failed', name='cancellation_job_status'), nullable=False),
+        sa.Column('last_ticket_id', sa.Integer(), nullable=False),
+        sa.Column('processed', sa.Integer(), nullable=False),
+        sa.Column('refunded_amount', sa.Integer(), nullable=False),
+        sa.Column('requested_by', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('event_id', name='uq_cancellation_job_event')
+        )
+    if "event_sessions" not in existing:
+        op.create_table('event_sessions',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('sessiontime', sa.DateTime(), nullable=False),
+        sa.Column('capacity', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if "events" not in existing:
+        op.create_table('events',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=True),
+        sa.Column('location', sa.String(length=255), nullable=True),
+        sa.Column('cover_image', sa.String(length=512), nullable=True),
+        sa.Column('status', sa.Enum('draft', 'published', 'cancelled', name='event_status'), nullable=False),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if "payments" not in existing:
+        op.create_table('payments',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('ticket_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.Column('payment_method', sa.Enum('credit', name='payment_method'), nullable=False),
+        sa.Column('status', sa.Enum('pending', 'paid', 'failed', 'refunded', name='payment_status'), nullable=False),
+        sa.Column('transaction_id', sa.String(length=128), nullable=False),
+        sa.Column('payment_time', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('transaction_id')
+        )
+    if "refunds" not in existing:
+        op.create_table('refunds',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('ticket_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.Column('reason', sa.Text(), nullable=True),
+        sa.Column('status', sa.Enum('requested', 'approved', 'rejected', 'completed', name='refund_status'), nullable=False),
+        sa.Column('refundtime', sa.DateTime(), nullable=True),
+        sa.Column('reviewed_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if "sales_rollups" not in existing:
+        op.create_table('sales_rollups',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('ticket_type_id', sa.Integer(), nullable=False),
+        sa.Column('sold_count', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Integer(), nullable=False),
+        sa.Column('refund_count', sa.Integer(), nullable=False),
+        sa.Column('refund_amount', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('bucket', 'session_id', 'ticket_type_id', name='uq_rollup_bucket_session_type')
+        )
+        op.create_index('ix_rollup_event_bucket', 'sales_rollups', ['event_id', 'bucket'], unique=False)
+    if "seats" not in existing:
+        op.create_table('seats',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=True),
+        sa.Column('eventid', sa.Integer(), nullable=True),
+        sa.Column('section', sa.String(length=50), nullable=True),
+        sa.Column('rowsnumber', sa.String(length=20), nullable=True),
+        sa.Column('number', sa.String(length=20), nullable=True),
+        sa.Column('status', sa.Enum('available', 'locked', 'sold', 'disabled', name='seat_status'), nullable=False),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if "ticket_inventory" not in existing:
+        op.create_table('ticket_inventory',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('ticket_type_id', sa.Integer(), nullable=False),
+        sa.Column('price', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('available', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('session_id', 'ticket_type_id', name='uq_inventory_session_ticket_type')
+        )
+    if "ticket_types" not in existing:
+        op.create_table('ticket_types',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=True),
+        sa.Column('eventid', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.Column('price', sa.Integer(), nullable=False),
+        sa.Column('totalstock', sa.Integer(), nullable=False),
+        sa.Column('available_stock', sa.Integer(), nullable=False),
+        sa.Column('description', sa.String(length=255), nullable=True),
+        sa.Column('createdat', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column('updatedat', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if "tickets" not in existing:
+        op.create_table('tickets',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('ticket_type_id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('seat_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.Enum('pending', 'active', 'used', 'cancelled', 'refunded', name='ticket_status'), nullable=False),
+        sa.Column('qr_code', sa.LargeBinary(), nullable=False),
+        sa.Column('purchase_time', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if "users" not in existing:
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('username', sa.String(length=150), nullable=False),
+        sa.Column('email', sa.String(length=254), nullable=False),
+        sa.Column('password', sa.String(length=255), nullable=False),
+        sa.Column('role', sa.Enum('customer', 'admin', name='user_role'), nullable=False),
+        sa.Column('avatar', sa.String(length=512), nullable=True),
+        sa.Column('credit', sa.Integer(), nullable=False),
+        sa.Column('phone', sa.String(length=30), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = _existing()
+    for name in (
+        "users",
+        "tickets",
+        "ticket_types",
+        "ticket_inventory",
+        "seats",
+        "sales_rollups",
+        "refunds",
+        "payments",
+        "events",
+        "event_sessions",
+        "event_cancellation_jobs",
+    ):
+        if name in existing:
+            op.drop_table(name)
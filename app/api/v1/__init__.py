@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import users, tickets, event, analytics, seats, dev, sessions
+from app.core.config import get_settings
+
+from app.api.v1.endpoints import users, tickets, event, analytics, seats, dev, sessions, exports, uploads
 
 
 api_router = APIRouter()
@@ -12,5 +14,7 @@ api_router.include_router(analytics.router, prefix="/analytics", tags=["analytic
 api_router.include_router(seats.router, prefix="/seats", tags=["seats"])
 api_router.include_router(dev.router, prefix="/dev", tags=["dev"])
 api_router.include_router(sessions.router, prefix="/sessions", tags=["sessions"])
-
-
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
+# 本地直传只靠 HMAC 签名鉴权：没有 SECRET_KEY 就不注册该路由
+if get_settings().secret_key:
+    api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
@@ -1,20 +1,42 @@
+import asyncio
+import json
 from datetime import datetime, timedelta, date
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, select
+from sqlalchemy import and_, case, func, or_, select
 
 from app.db.session import SessionLocal
 from app import models
-from app.models.enums import TicketStatus, UserRole
+from app.models.enums import PaymentStatus, RefundStatus, TicketStatus, UserRole
 from app.models.ticket import Ticket
 from app.models.user import User
 from app.models.inventory import TicketInventory
+from app.models.event import Event
+from app.models.payment import Payment
+from app.models.refund import Refund
+from app.models.ticket_type import TicketType
+from app.models.session import EventSession
+from app.models.rollup import SalesRollup
+from app.core import catalog, live_counters
+from app.core.cache import LocalTTLCache, ResultCache
+from app.core.config import get_settings
+from app.core.security import require_admin
+from app.crud import rollup as rollup_crud
 
 
 router = APIRouter()
 
+_settings = get_settings()
+analytics_cache = ResultCache(
+    "analytics",
+    bucket_seconds=_settings.analytics_cache_bucket_seconds,
+    stale_buckets=_settings.analytics_cache_stale_buckets,
+)
+
 
 def get_db():
     db = SessionLocal()
@@ -38,67 +60,102 @@ def _parse_range(range_str: str) -> timedelta:
         return timedelta(days=7)
 
 
-@router.get("/overview")
-def analytics_overview(range: str = Query("7d"), db: Session = Depends(get_db)) -> Dict[str, float]:
-    period = _parse_range(range)
-    now = datetime.utcnow()
-    start = now - period
+def _cached(name: str, compute: Callable, range_str: str, event_id: Optional[int], session_id: Optional[int]):
+    """Serve ``compute`` through the analytics cache.
+
+    The key uses the normalized day count, so ``7``/``7d``/garbage share one
+    entry; ``compute`` opens its own session because a stale hit refreshes it
+    in the background after the request has returned.
+    """
+    days = _parse_range(range_str).days
+    key = f"{name}:{days}d:e{event_id or '-'}:s{session_id or '-'}"
+
+    def run():
+        db = SessionLocal()
+        try:
+            return compute(db, days, event_id, session_id)
+        finally:
+            db.close()
 
-    # Staff on duty: use count of admin accounts as a proxy for staff
-    staff_on_duty = db.query(User).filter(User.role == UserRole.admin).count()
+    return analytics_cache.get_or_compute(key, run)
 
-    # New users in range
-    new_users = db.query(User).filter(User.created_at >= start, User.created_at <= now).count()
 
-    # New orders (paid tickets) in range
-    new_orders = (
-        db.query(Ticket)
-        .filter(
-            Ticket.status == TicketStatus.active,
-            Ticket.purchase_time.isnot(None),
-            Ticket.purchase_time >= start,
-            Ticket.purchase_time <= now,
+def _session_scope(column, event_id: Optional[int], session_id: Optional[int]) -> list:
+    """Filters restricting a session_id column to one event or session."""
+    filters = []
+    if session_id is not None:
+        filters.append(column == session_id)
+    if event_id is not None:
+        filters.append(column.in_(select(EventSession.id).where(EventSession.event_id == event_id)))
+    return filters
+
+
+def _overview(db: Session, days: int, event_id: Optional[int], session_id: Optional[int]) -> Dict[str, float]:
+    period = timedelta(days=days)
+    now = datetime.utcnow()
+    start = now - period
+
+    # Staff on duty (admin accounts as a proxy) and new users in range: one pass over users
+    staff_on_duty, new_users = db.execute(
+        select(
+            func.coalesce(func.sum(case((User.role == UserRole.admin, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((and_(User.created_at >= start, User.created_at <= now), 1), else_=0)), 0),
         )
-        .count()
-    )
+    ).one()
 
-    # Sell-through rate: total sold / total inventory
-    inventory_rows = db.execute(select(TicketInventory.total, TicketInventory.available)).all()
-    total_capacity = 0
-    total_sold = 0
-    for total, available in inventory_rows:
-        total_capacity += int(total or 0)
-        total_sold += max(0, int(total or 0) - int(available or 0))
+    # New orders (tickets still held) in range, from hourly rollups
+    rollup_filters = [SalesRollup.bucket >= rollup_crud.hour_bucket(start), SalesRollup.bucket <= now]
+    if event_id is not None:
+        rollup_filters.append(SalesRollup.event_id == event_id)
+    if session_id is not None:
+        rollup_filters.append(SalesRollup.session_id == session_id)
+    new_orders = db.execute(
+        select(func.coalesce(func.sum(SalesRollup.sold_count - SalesRollup.refund_count), 0)).where(*rollup_filters)
+    ).scalar()
+
+    # Sell-through rate: total sold / total inventory, aggregated in SQL
+    total_capacity, total_sold = db.execute(
+        select(
+            func.coalesce(func.sum(TicketInventory.total), 0),
+            func.coalesce(
+                func.sum(
+                    case(
+                        (TicketInventory.total > TicketInventory.available, TicketInventory.total - TicketInventory.available),
+                        else_=0,
+                    )
+                ),
+                0,
+            ),
+        ).where(*_session_scope(TicketInventory.session_id, event_id, session_id))
+    ).one()
     sell_through_rate = 0.0
-    if total_capacity > 0:
-        sell_through_rate = round(100.0 * total_sold / total_capacity, 2)
+    if total_capacity and total_capacity > 0:
+        sell_through_rate = round(100.0 * int(total_sold) / int(total_capacity), 2)
 
     return {
-        "staffOnDuty": staff_on_duty,
-        "newUsers": new_users,
-        "newOrders": new_orders,
+        "staffOnDuty": int(staff_on_duty or 0),
+        "newUsers": int(new_users or 0),
+        "newOrders": int(new_orders or 0),
         "sellThroughRate": sell_through_rate,
     }
 
 
-@router.get("/sales-by-day")
-def sales_by_day(range: str = Query("7d"), db: Session = Depends(get_db)) -> Dict[str, List]:
-    period = _parse_range(range)
+def _sales_by_day(db: Session, days: int, event_id: Optional[int], session_id: Optional[int]) -> Dict[str, List]:
+    period = timedelta(days=days)
     now = datetime.utcnow()
     start = now - period
 
-    # Aggregate paid tickets by day
+    # Aggregate held tickets by purchase day from hourly rollups (cost independent of ticket volume)
     day_counts: List[Tuple[date, int]] = (
         db.execute(
-            select(func.date(Ticket.purchase_time).label("day"), func.count(Ticket.id))
+            select(func.date(SalesRollup.bucket).label("day"), func.sum(SalesRollup.sold_count - SalesRollup.refund_count))
             .where(
-                Ticket.status == TicketStatus.active,
-                Ticket.purchase_time.isnot(None),
-                Ticket.purchase_time >= start,
-                Ticket.purchase_time <= now,
+                SalesRollup.bucket >= rollup_crud.hour_bucket(start),
+                SalesRollup.bucket <= now,
+                *_session_scope(SalesRollup.session_id, event_id, session_id),
             )
-            .group_by(func.date(Ticket.purchase_time))
-            .order_by(func.date(Ticket.purchase_time))
+            .group_by(func.date(SalesRollup.bucket))
+            .order_by(func.date(SalesRollup.bucket))
         )
         .all()
     )
@@ -117,35 +174,341 @@ def sales_by_day(range: str = Query("7d"), db: Session = Depends(get_db)) -> Dic
     return {"labels": labels, "values": values}
 
 
-@router.get("/order-status-distribution")
-def order_status_distribution(range: str = Query("7d"), db: Session = Depends(get_db)) -> Dict[str, int]:
-    period = _parse_range(range)
+def _order_status_distribution(
+    db: Session, days: int, event_id: Optional[int], session_id: Optional[int]
+) -> Dict[str, int]:
+    period = timedelta(days=days)
     now = datetime.utcnow()
     start = now - period
 
-    base_filters = [Ticket.purchase_time.isnot(None), Ticket.purchase_time >= start, Ticket.purchase_time <= now]
+    # One GROUP BY status pass; pending is windowed by created_at, the rest by purchase_time
+    in_purchase_window = and_(Ticket.purchase_time.isnot(None), Ticket.purchase_time >= start, Ticket.purchase_time <= now)
+    in_created_window = and_(Ticket.created_at >= start, Ticket.created_at <= now)
+    rows = db.execute(
+        select(Ticket.status, func.count(Ticket.id))
+        .where(
+            or_(
+                and_(Ticket.status == TicketStatus.pending, in_created_window),
+                and_(
+                    Ticket.status.in_([TicketStatus.active, TicketStatus.refunded, TicketStatus.cancelled]),
+                    in_purchase_window,
+                ),
+            ),
+            *_session_scope(Ticket.session_id, event_id, session_id),
+        )
+        .group_by(Ticket.status)
+    ).all()
+    counts = {TicketStatus(status): int(n) for status, n in rows}
+    failed = 0  # 没有失败状态，返回 0 以兼容前端饼图
+
+    return {
+        "Paid": counts.get(TicketStatus.active, 0),
+        "Pending": counts.get(TicketStatus.pending, 0),
+        "Refunded": counts.get(TicketStatus.refunded, 0),
+        "Cancelled": counts.get(TicketStatus.cancelled, 0),
+        "Failed": failed,
+    }
+
+
+@router.get("/overview")
+def analytics_overview(
+    range: str = Query("7d"),
+    event_id: Optional[int] = None,
+    session_id: Optional[int] = None,
+) -> Dict[str, float]:
+    return _cached("overview", _overview, range, event_id, session_id)
+
+
+@router.get("/sales-by-day")
+def sales_by_day(
+    range: str = Query("7d"),
+    event_id: Optional[int] = None,
+    session_id: Optional[int] = None,
+) -> Dict[str, List]:
+    return _cached("sales-by-day", _sales_by_day, range, event_id, session_id)
+
+
+@router.get("/order-status-distribution")
+def order_status_distribution(
+    range: str = Query("7d"),
+    event_id: Optional[int] = None,
+    session_id: Optional[int] = None,
+) -> Dict[str, int]:
+    return _cached("order-status", _order_status_distribution, range, event_id, session_id)
+
+
+def _inventory_breakdown(db: Session, session_ids) -> Dict[int, List[dict]]:
+    """Per (session, ticket type): stock from inventory, revenue from payments, refunds; one query."""
     paid = (
-        db.query(Ticket)
-        .filter(Ticket.status == TicketStatus.active, *base_filters)
-        .count()
-    )
-    pending = (
-        db.query(Ticket)
-        .filter(Ticket.status == TicketStatus.pending, Ticket.created_at >= start, Ticket.created_at <= now)
-        .count()
+        select(
+            Ticket.session_id,
+            Ticket.ticket_type_id,
+            func.sum(Payment.amount).label("revenue"),
+            func.count(Payment.id).label("payments"),
+        )
+        .join(Ticket, Ticket.id == Payment.ticket_id)
+        .where(Payment.status == PaymentStatus.paid, Ticket.session_id.in_(session_ids))
+        .group_by(Ticket.session_id, Ticket.ticket_type_id)
+        .subquery()
     )
     refunded = (
-        db.query(Ticket)
-        .filter(Ticket.status == TicketStatus.refunded, *base_filters)
-        .count()
+        select(
+            Ticket.session_id,
+            Ticket.ticket_type_id,
+            func.sum(Refund.amount).label("amount"),
+            func.count(Refund.id).label("count"),
+        )
+        .join(Ticket, Ticket.id == Refund.ticket_id)
+        .where(Refund.status.in_([RefundStatus.approved, RefundStatus.completed]), Ticket.session_id.in_(session_ids))
+        .group_by(Ticket.session_id, Ticket.ticket_type_id)
+        .subquery()
     )
-    cancelled = (
-        db.query(Ticket)
-        .filter(Ticket.status == TicketStatus.cancelled, *base_filters)
-        .count()
+    rows = db.execute(
+        select(
+            TicketInventory.session_id,
+            TicketInventory.ticket_type_id,
+            TicketType.name,
+            TicketInventory.price,
+            TicketInventory.total,
+            TicketInventory.available,
+            func.coalesce(paid.c.revenue, 0),
+            func.coalesce(paid.c.payments, 0),
+            func.coalesce(refunded.c.amount, 0),
+            func.coalesce(refunded.c.count, 0),
+        )
+        .outerjoin(TicketType, TicketType.id == TicketInventory.ticket_type_id)
+        .outerjoin(
+            paid,
+            and_(paid.c.session_id == TicketInventory.session_id, paid.c.ticket_type_id == TicketInventory.ticket_type_id),
+        )
+        .outerjoin(
+            refunded,
+            and_(
+                refunded.c.session_id == TicketInventory.session_id,
+                refunded.c.ticket_type_id == TicketInventory.ticket_type_id,
+            ),
+        )
+        .where(TicketInventory.session_id.in_(session_ids))
+        .order_by(TicketInventory.session_id, TicketInventory.ticket_type_id)
+    ).all()
+    out: Dict[int, List[dict]] = {}
+    for sid, tt, name, price, total, available, revenue, payments, refund_amount, refunds in rows:
+        total, available = int(total or 0), int(available or 0)
+        out.setdefault(sid, []).append(
+            {
+                "ticketTypeId": tt,
+                "name": name,
+                "price": int(price or 0),
+                "total": total,
+                "available": available,
+                "sold": max(total - available, 0),
+                "revenue": int(revenue),
+                "payments": int(payments),
+                "refunds": int(refunds),
+                "refundAmount": int(refund_amount),
+                "netRevenue": int(revenue) - int(refund_amount),
+            }
+        )
+    return out
+
+
+def _totals(types: List[dict]) -> Dict[str, float]:
+    keys = ("total", "available", "sold", "revenue", "refunds", "refundAmount", "netRevenue")
+    totals: Dict[str, float] = {k: sum(t[k] for t in types) for k in keys}
+    totals["sellThroughRate"] = round(100.0 * totals["sold"] / totals["total"], 2) if totals["total"] else 0.0
+    return totals
+
+
+_session_events = LocalTTLCache(maxsize=4096)
+
+
+def _session_event_id(session_id: int) -> Optional[int]:
+    """场次所属活动（不可变，进程内缓存）。"""
+    event_id = _session_events.get(session_id)
+    if event_id is None:
+        db = SessionLocal()
+        try:
+            event_id = db.execute(select(EventSession.event_id).where(EventSession.id == session_id)).scalar()
+        finally:
+            db.close()
+        if event_id is not None:
+            _session_events.set(session_id, event_id, 3600)
+    return event_id
+
+
+def _event_breakdown(event_id: int) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        event = db.execute(select(Event.id, Event.name).where(Event.id == event_id)).first()
+        if event is None:
+            return None
+        sessions = db.execute(
+            select(EventSession.id, EventSession.sessiontime)
+            .where(EventSession.event_id == event_id)
+            .order_by(EventSession.sessiontime)
+        ).all()
+        by_session = _inventory_breakdown(db, [sid for sid, _ in sessions]) if sessions else {}
+    finally:
+        db.close()
+    session_rows = [
+        {
+            "sessionId": sid,
+            "sessiontime": when.isoformat() if when else None,
+            "totals": _totals(by_session.get(sid, [])),
+            "ticketTypes": by_session.get(sid, []),
+        }
+        for sid, when in sessions
+    ]
+    return {
+        "eventId": event.id,
+        "name": event.name,
+        "totals": _totals([t for types in by_session.values() for t in types]),
+        "sessions": session_rows,
+    }
+
+
+def _session_breakdown(session_id: int) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        session = db.execute(
+            select(EventSession.id, EventSession.event_id, EventSession.sessiontime).where(EventSession.id == session_id)
+        ).first()
+        if session is None:
+            return None
+        types = _inventory_breakdown(db, [session_id]).get(session_id, [])
+    finally:
+        db.close()
+    return {
+        "sessionId": session.id,
+        "eventId": session.event_id,
+        "sessiontime": session.sessiontime.isoformat() if session.sessiontime else None,
+        "totals": _totals(types),
+        "ticketTypes": types,
+    }
+
+
+@router.get("/events/{event_id}")
+def event_analytics(event_id: int, _: User = Depends(require_admin)) -> Dict:
+    """Sold / available / revenue / refunds per session and ticket type of one event."""
+    data = analytics_cache.get_or_compute(f"event:{event_id}", lambda: _event_breakdown(event_id))
+    if data is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return data
+
+
+@router.get("/sessions/{session_id}")
+def session_analytics(session_id: int, _: User = Depends(require_admin)) -> Dict:
+    """Sold / available / revenue / refunds per ticket type of one session."""
+    event_id = _session_event_id(session_id)
+    if event_id is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    # 与所属活动共用缓存前缀，便于按活动失效
+    data = analytics_cache.get_or_compute(
+        f"event:{event_id}:session:{session_id}", lambda: _session_breakdown(session_id)
     )
-    failed = 0  # 没有失败状态，返回 0 以兼容前端饼图
+    if data is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return data
+
+
+@router.get("/live")
+def live_sales(
+    session_id: int,
+    window: int = Query(15, ge=1, le=live_counters.MAX_WINDOW_MINUTES),
+    _: User = Depends(require_admin),
+) -> Dict:
+    """Per-minute sales, velocity and estimated sellout from Redis counters (no MySQL)."""
+    return live_counters.snapshot(session_id, window)
 
-    return {"Paid": paid, "Pending": pending, "Refunded": refunded, "Cancelled": cancelled, "Failed": failed}
 
+@router.get("/live/stream")
+async def live_sales_stream(
+    request: Request,
+    session_id: int,
+    window: int = Query(15, ge=1, le=live_counters.MAX_WINDOW_MINUTES),
+    interval: float = Query(2.0, ge=0.5, le=60),
+    _: User = Depends(require_admin),
+):
+    """Server-Sent Events variant of ``/live``: one snapshot every ``interval`` seconds."""
 
+    async def events():
+        while not await request.is_disconnected():
+            data = await run_in_threadpool(live_counters.snapshot, session_id, window)
+            yield f"event: live\ndata: {json.dumps(data)}\n\n"
+            await asyncio.sleep(interval)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/cache")
+def cache_metrics(_: User = Depends(require_admin)) -> Dict[str, Dict]:
+    """Catalog cache hit ratio and lookup latency for this worker."""
+    return catalog.metrics()
+
+
+@router.post("/rollups/rebuild")
+def rebuild_rollups(db: Session = Depends(get_db), _: User = Depends(require_admin)) -> Dict[str, int]:
+    """从历史票券/支付/退款重算小时汇总表（上线或修复数据后执行）。"""
+    rows = rollup_crud.rebuild(db)
+    analytics_cache.invalidate()
+    return {"rows": rows}
+
+
+def _build_snapshot_job() -> None:
+    from app.crud import snapshot as snapshot_crud  # 按需导入（依赖 numpy），不拖慢启动
+
+    db = SessionLocal()
+    try:
+        snapshot_crud.build_snapshot(db, get_settings().snapshot_dir)
+    finally:
+        db.close()
+
+
+@router.post("/snapshots", status_code=202)
+def build_snapshot(background_tasks: BackgroundTasks, _: User = Depends(require_admin)) -> Dict[str, str]:
+    """后台导出列式快照（大表耗时较长，亦可用 ``python -m app.cli build-snapshot``）。"""
+    background_tasks.add_task(_build_snapshot_job)
+    return {"status": "scheduled"}
+
+
+def _epoch(dt: Optional[datetime]) -> Optional[int]:
+    return None if dt is None else int((dt.replace(tzinfo=None) - datetime(1970, 1, 1)).total_seconds())
+
+
+@router.get("/snapshots/report")
+def snapshot_report(
+    report: str = Query("revenue", pattern="^(revenue|funnel|percentiles)$"),
+    by: Optional[str] = Query("event_id"),
+    table: str = Query("payments", pattern="^(payments|refunds)$"),
+    event_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    _: User = Depends(require_admin),
+) -> Dict:
+    """Group-by / percentile reports over the latest snapshot (never touches MySQL)."""
+    from app.utils import snapshot as snapshot_utils  # 按需导入（依赖 numpy）
+
+    by = by or None  # ?by= 表示不分组（仅 percentiles）
+    if by is not None and by not in snapshot_utils.GROUP_KEYS:
+        raise HTTPException(status_code=422, detail=f"by must be one of {', '.join(snapshot_utils.GROUP_KEYS)}")
+    try:
+        snap = snapshot_utils.load_current(get_settings().snapshot_dir)
+    except snapshot_utils.SnapshotNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    window = {"since": _epoch(since), "until": _epoch(until), "event_id": event_id}
+    try:
+        if report == "percentiles":
+            rows = snapshot_utils.amount_percentiles(snap, table, by, **window)
+        elif by is None:
+            raise HTTPException(status_code=422, detail="by is required for this report")
+        elif report == "funnel":
+            rows = snapshot_utils.funnel_by(snap, by, **window)
+        else:
+            rows = snapshot_utils.revenue_by(snap, by, **window)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"snapshot": snap.name, "createdAt": snap.manifest["created_at"], "report": report, "by": by, "rows": rows}
@@ -1,11 +1,23 @@
+import asyncio
+import hashlib
+import json
+import re
+from datetime import datetime, timedelta
+from uuid import uuid4
 from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Form, UploadFile, File, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.db.session import SessionLocal
 from app import crud, models
 from app.schemas import event as event_schemas
+from app.schemas import cancellation as cancellation_schemas
+from app.models.enums import CancellationJobStatus, EventStatus
+from app.core import catalog, http_cache
+from app.core.config import get_settings
 from app.core.security import require_admin
 
 router = APIRouter()
@@ -32,29 +44,116 @@ async def create_event(
     return crud.event.create_event(db, payload, cover_image_url=None)
 
 
-@router.get("/{event_id}", response_model=event_schemas.EventRead)
+@router.get("/search", response_model=event_schemas.EventSearchPage)
+def search_events(
+    q: Optional[str] = Query(None, max_length=100, description="Keywords matched against name, description and location"),
+    status: Optional[EventStatus] = None,
+    starts_after: Optional[datetime] = None,
+    starts_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, gt=0, le=100),
+    db: Session = Depends(get_db),
+):
+    """Ranked by relevance when ``q`` is given, otherwise by start time; pass ``next_cursor`` back for the next page."""
+    try:
+        hits, next_cursor = crud.event_search.search_events(
+            db,
+            q,
+            status=status.value if status else None,
+            starts_after=starts_after,
+            starts_before=starts_before,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = [
+        event_schemas.EventSearchHit.model_validate(event).model_copy(update={"score": score})
+        for event, score in hits
+    ]
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _event_dict(db_event: models.Event) -> dict:
+    return event_schemas.EventRead.model_validate(db_event).model_dump(mode="json")
+
+
+def _event_validator(event_id: int, db: Session = Depends(get_db)):
+    updated_at = db.execute(select(models.Event.updated_at).where(models.Event.id == event_id)).scalar_one_or_none()
+    return None if updated_at is None else (catalog.events.version(), updated_at)
+
+
+def _events_validator():
+    # 所有活动写入都经 crud 层失效目录缓存，版本号即可代表列表内容，无需查库
+    return catalog.events.validator()
+
+
+# 公开读接口走两级缓存（进程内 + Redis），写接口在 crud 层提交后失效；
+# ETag 只由 updated_at/版本号计算，If-None-Match 命中时不会执行接口本身
+@router.get(
+    "/{event_id}",
+    response_model=event_schemas.EventRead,
+    dependencies=[Depends(http_cache.conditional("events", _event_validator))],
+)
 def read_event(event_id: int, db: Session = Depends(get_db)):
-    db_event = crud.event.get_event(db, event_id)
-    if not db_event:
+    def load():
+        db_event = crud.event.get_event(db, event_id)
+        return _event_dict(db_event) if db_event else None
+
+    data = catalog.events.get_or_load(f"id:{event_id}", load)
+    if data is None:
         raise HTTPException(status_code=404, detail="Event not found")
-    return db_event
+    return data
+
+
+def _detail_entry(db: Session, event_id: int) -> Optional[dict]:
+    detail = crud.event_detail.get_event_detail(db, event_id)
+    if detail is None:
+        return None
+    body = json.dumps(detail, ensure_ascii=False, separators=(",", ":"))
+    return {"etag": '"%s"' % hashlib.sha1(body.encode()).hexdigest()[:20], "body": body}
+
+
+@router.get("/{event_id}/detail", response_model=event_schemas.EventDetail)
+def read_event_detail(event_id: int, request: Request, db: Session = Depends(get_db)):
+    """Event, sessions, ticket types and per-session availability in one response (ETag-validated)."""
+    entry = catalog.details.get_or_load(f"id:{event_id}", lambda: _detail_entry(db, event_id))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    headers = {"ETag": entry["etag"], "Cache-Control": "no-cache"}
+    if http_cache.etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
 
 
-@router.get("/", response_model=List[event_schemas.EventRead])
+@router.get(
+    "/",
+    response_model=List[event_schemas.EventRead],
+    dependencies=[Depends(http_cache.conditional("events", _events_validator))],
+)
 def list_events(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return crud.event.list_events(db, skip=skip, limit=limit)
+    return catalog.events.get_or_load(
+        f"list:{skip}:{limit}",
+        lambda: [_event_dict(e) for e in crud.event.list_events(db, skip=skip, limit=limit)],
+    )
 
 
 @router.put("/{event_id}", response_model=event_schemas.EventRead)
 def update_event(
     event_id: int,
     payload: event_schemas.EventUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    _: models.User = Depends(require_admin),
+    admin_user: models.User = Depends(require_admin),
 ):
     db_event = crud.event.update_event(db, event_id, payload)
     if not db_event:
         raise HTTPException(status_code=404, detail="Event not found")
+    if payload.status == EventStatus.cancelled.value:
+        # 状态改为 cancelled 时同样触发批量退款
+        job = crud.cancellation.start_event_cancellation(db, event_id, requested_by=admin_user.id)
+        background_tasks.add_task(_run_cancellation_job, job.id)
+        db.refresh(db_event)
     return db_event
 
 
@@ -82,6 +181,62 @@ def publish_event(
     return db_event
 
 
+# ---------- Cancellation (mass refund) ----------
+def _run_cancellation_job(job_id: int, chunk_size: int = 1000) -> None:
+    db = SessionLocal()
+    try:
+        crud.cancellation.run_event_cancellation(db, job_id, chunk_size=chunk_size)
+    except Exception:
+        pass  # 失败原因已记录在 job.error，可通过 resume 接口重试
+    finally:
+        db.close()
+
+
+@router.post("/{event_id}/cancel", response_model=cancellation_schemas.CancellationJobRead)
+def cancel_event(
+    event_id: int,
+    background_tasks: BackgroundTasks,
+    chunk_size: int = Query(1000, gt=0, le=10000),
+    db: Session = Depends(get_db),
+    admin_user: models.User = Depends(require_admin),
+):
+    job = crud.cancellation.start_event_cancellation(db, event_id, requested_by=admin_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if job.status != CancellationJobStatus.completed:
+        background_tasks.add_task(_run_cancellation_job, job.id, chunk_size)
+    return job
+
+
+@router.get("/{event_id}/cancellation", response_model=cancellation_schemas.CancellationJobRead)
+def read_cancellation(
+    event_id: int,
+    db: Session = Depends(get_db),
+    _: models.User = Depends(require_admin),
+):
+    job = crud.cancellation.get_job(db, event_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Cancellation job not found")
+    return job
+
+
+@router.post("/{event_id}/cancellation/resume", response_model=cancellation_schemas.CancellationJobRead)
+def resume_cancellation(
+    event_id: int,
+    background_tasks: BackgroundTasks,
+    chunk_size: int = Query(1000, gt=0, le=10000),
+    db: Session = Depends(get_db),
+    _: models.User = Depends(require_admin),
+):
+    """从检查点继续执行（服务重启或失败后调用）。"""
+    job = crud.cancellation.get_job(db, event_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Cancellation job not found")
+    if job.status != CancellationJobStatus.completed:
+        background_tasks.add_task(_run_cancellation_job, job.id, chunk_size)
+    return job
+
+
 # ---------- Multipart create with cover image ----------
 async def build_event_create_from_form(
     name: str = Form(...),
@@ -114,11 +269,95 @@ async def create_event_with_cover(
 ):
     try:
         from app.utils import imageupload
-        cover_url = imageupload.save_uploaded_image(cover_image_file, folder="events")
+        cover_url = await imageupload.save_uploaded_image(cover_image_file, folder="events")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
 
     data.created_by = admin_user.id
-    return crud.event.create_event(db, data, cover_image_url=cover_url)
\ No newline at end of file
+    return crud.event.create_event(db, data, cover_image_url=cover_url)
+
+
+# ---------- Direct (presigned) cover upload ----------
+# 客户端直传对象存储，API 不经手原图：先取上传地址，PUT 完成后调用 finalize
+_COVER_TYPES = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp", "image/gif": "gif"}
+
+
+@router.post("/{event_id}/cover/upload-url", response_model=event_schemas.CoverUploadTicket)
+def create_cover_upload_url(
+    event_id: int,
+    payload: event_schemas.CoverUploadRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    _: models.User = Depends(require_admin),
+):
+    from app.utils.storage import DirectUploadUnavailable, get_storage
+
+    ext = _COVER_TYPES.get(payload.content_type)
+    if ext is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported content type; use one of {', '.join(_COVER_TYPES)}")
+    if not crud.event.get_event(db, event_id):
+        raise HTTPException(status_code=404, detail="Event not found")
+    settings = get_settings()
+    storage = get_storage()
+    key = f"events/{event_id}/{uuid4().hex}/original.{ext}"
+    try:
+        url, headers = storage.presign_put(key, payload.content_type, settings.upload_url_expires_seconds)
+    except DirectUploadUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if url.startswith("/"):
+        url = str(request.base_url).rstrip("/") + url
+    return {
+        "key": key,
+        "url": url,
+        "headers": headers,
+        "expires_at": datetime.utcnow() + timedelta(seconds=settings.upload_url_expires_seconds),
+        "max_bytes": storage.max_bytes,
+    }
+
+
+@router.post("/{event_id}/cover/finalize", response_model=event_schemas.EventRead)
+async def finalize_cover_upload(
+    event_id: int,
+    payload: event_schemas.CoverUploadFinalize,
+    db: Session = Depends(get_db),
+    _: models.User = Depends(require_admin),
+):
+    """Check the uploaded object (HEAD), render its variants and attach it as the event cover."""
+    from app.utils import image_variants, imageupload
+    from app.utils.storage import get_storage
+
+    m = re.fullmatch(rf"events/{event_id}/[0-9a-f]{{32}}/original\.(\w+)", payload.key)
+    if not m or m.group(1) not in _COVER_TYPES.values():
+        raise HTTPException(status_code=400, detail="Invalid upload key")
+    storage = get_storage()
+    # 先确认活动存在，再下载/渲染/写入变体；不存在时丢弃已直传的原件
+    if not await run_in_threadpool(crud.event.get_event, db, event_id):
+        await storage.delete(payload.key)
+        raise HTTPException(status_code=404, detail="Event not found")
+    info = await storage.head(payload.key)
+    if info is None:
+        raise HTTPException(status_code=400, detail="Upload not found")
+    if info.size > storage.max_bytes:
+        await storage.delete(payload.key)
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {storage.max_bytes} bytes")
+    if _COVER_TYPES.get(info.content_type or "") != m.group(1):
+        await storage.delete(payload.key)
+        raise HTTPException(status_code=400, detail="Uploaded object is not the announced image type")
+
+    try:
+        rendered = await imageupload.render_variants(await storage.get_bytes(payload.key))
+    except HTTPException:
+        await storage.delete(payload.key)  # 不是可解码的图片：与上面的校验失败一样不保留原件
+        raise
+    await imageupload.store_variants(storage, payload.key, rendered)
+    db_event = await run_in_threadpool(crud.event.set_cover_image, db, event_id, storage.public_url(payload.key))
+    if not db_event:
+        # 渲染期间活动被删除：清理原件与全部变体
+        await asyncio.gather(
+            storage.delete(payload.key),
+            *(storage.delete(image_variants.variant_key(payload.key, name)) for name in rendered),
+        )
+        raise HTTPException(status_code=404, detail="Event not found")
+    return db_event
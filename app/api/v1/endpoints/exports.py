@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.db.session import SessionLocal
+from app import crud, models
+from app.core.security import require_admin
+
+
+router = APIRouter()
+
+
+@router.get("/{kind}")
+def export_records(
+    kind: str,
+    event_id: int | None = None,
+    session_id: int | None = None,
+    format: str = Query("csv", description="csv | ndjson"),
+    gzip: bool = False,
+    _: models.User = Depends(require_admin),
+):
+    """结算导出：服务端游标流式输出，内存占用与行数无关。"""
+    if kind not in crud.export.EXPORT_KINDS:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    if format not in crud.export.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Unsupported format")
+
+    def body():
+        # 流式响应期间持有独立会话（服务端游标占用该连接直到导出结束）
+        db = SessionLocal()
+        try:
+            yield from crud.export.stream_export(
+                db, kind, format, event_id=event_id, session_id=session_id, compress=gzip
+            )
+        finally:
+            db.close()
+
+    scope = f"event{event_id}" if event_id is not None else f"session{session_id}" if session_id is not None else "all"
+    filename = f"{kind}-{scope}.{format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else ("text/csv" if format == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,12 +1,16 @@
+import hashlib
+from array import array
 from datetime import datetime, timedelta
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import select, func
 
 from app.db.session import SessionLocal
 from app import models
+from app.core import http_cache
+from app.core.responses import fast_json
 from app.models.ticket import Ticket
 from app.models.enums import TicketStatus
 from app.models.inventory import TicketInventory
@@ -148,15 +152,11 @@ def get_seat_state_by_session_path(
     return SeatStateRead(sessionId=session_id, ticketTypeId=ticket_type_id, sold=sold_rows, locked=locked_rows, stats=stats)
 
 
-@router.get("/map", response_model=seat_schemas.SeatMapRead)
-def seat_map(
-    event_id: int,
-    session_id: int | None = None,
-    ticket_type_id: int | None = None,
-    db: Session = Depends(get_db),
-):
+def _overlay_ids(
+    db: Session, event_id: int, session_id: int | None, ticket_type_id: int | None
+) -> tuple[set[int], set[int]]:
+    """(sold seat ids for the session/ticket type, currently locked seat ids of the event)."""
     now = datetime.utcnow()
-    # overlay sold/locked for provided session/ticket_type
     sold_ids: set[int] = set()
     if session_id is not None:
         q = select(Ticket.seat_id).where(
@@ -176,46 +176,79 @@ def seat_map(
             )
         )
     }
-    # load all seats for event
+    return sold_ids, locked_ids
+
+
+def _id_digest(ids: set[int]) -> str:
+    return hashlib.blake2b(array("q", sorted(ids)).tobytes(), digest_size=16).hexdigest()
+
+
+def _seat_map_validator(
+    request: Request,
+    event_id: int,
+    session_id: int | None = None,
+    ticket_type_id: int | None = None,
+    db: Session = Depends(get_db),
+):
+    # 座位/票据没有可靠的修改时间：对已售、已锁座位 id 集合做摘要（锁过期也会改变结果），
+    # 集合交给 seat_map 复用；座位布局本身只按数量与最大 id 判断
+    sold_ids, locked_ids = _overlay_ids(db, event_id, session_id, ticket_type_id)
+    request.state.seat_overlay = (sold_ids, locked_ids)
+    layout = db.execute(select(func.count(Seat.id), func.max(Seat.id)).where(Seat.event_id == event_id)).one()
+    return (*layout, _id_digest(sold_ids), _id_digest(locked_ids))
+
+
+@router.get(
+    "/map",
+    response_model=seat_schemas.SeatMapRead,
+    dependencies=[Depends(http_cache.conditional("seats", _seat_map_validator))],
+)
+def seat_map(
+    event_id: int,
+    request: Request,
+    response: Response,
+    session_id: int | None = None,
+    ticket_type_id: int | None = None,
+    db: Session = Depends(get_db),
+):
+    # overlay sold/locked for provided session/ticket_type（校验依赖已查过则直接复用）
+    sold_ids, locked_ids = getattr(request.state, "seat_overlay", None) or _overlay_ids(
+        db, event_id, session_id, ticket_type_id
+    )
+    # load all seats for event（只取需要的列，不构造 ORM 对象）
     seats = db.execute(
-        select(Seat).where(Seat.event_id == event_id)
-    ).scalars().all()
+        select(Seat.id, Seat.section, Seat.row, Seat.number).where(Seat.event_id == event_id)
+    ).all()
 
-    rows: dict[str | None, list[seat_schemas.SeatItem]] = {}
-    total = 0
+    # 大响应：直接拼成 SeatMapRead 形状的 dict 并用 orjson 编码，跳过逐座位的 pydantic 构造与校验
+    rows: dict[str | None, list[dict]] = {}
     sold_cnt = 0
     locked_cnt = 0
-    for s in seats:
-        total += 1
-        if s.id in sold_ids:
+    for seat_id, section, row, number in seats:
+        if seat_id in sold_ids:
             status = "sold"
             sold_cnt += 1
-        elif s.id in locked_ids:
+        elif seat_id in locked_ids:
             status = "locked"
             locked_cnt += 1
         else:
             status = "available"
-        key = getattr(s, "row", None)
-        rows.setdefault(key, []).append(
-            seat_schemas.SeatItem(
-                id=s.id,
-                section=getattr(s, "section", None),
-                row=getattr(s, "row", None),
-                number=getattr(s, "number", None),
-                status=status,
-            )
+        rows.setdefault(row, []).append(
+            {"id": seat_id, "section": section, "row": row, "number": number, "status": status}
         )
-    groups = [
-        seat_schemas.SeatRowGroup(row=k, seats=v) for k, v in sorted(rows.items(), key=lambda x: (str(x[0] or ""),))
-    ]
+    total = len(seats)
+    groups = [{"row": k, "seats": v} for k, v in sorted(rows.items(), key=lambda x: (str(x[0] or ""),))]
     available = max(0, total - sold_cnt - locked_cnt)
-    stats = SeatStats(total=total, available=available, soldCount=sold_cnt, lockedCount=locked_cnt)
-    return seat_schemas.SeatMapRead(
-        eventId=event_id,
-        sessionId=session_id,
-        ticketTypeId=ticket_type_id,
-        rows=groups,
-        stats=stats,
+    stats = {"total": total, "available": available, "soldCount": sold_cnt, "lockedCount": locked_cnt}
+    return fast_json(
+        {
+            "eventId": event_id,
+            "sessionId": session_id,
+            "ticketTypeId": ticket_type_id,
+            "rows": groups,
+            "stats": stats,
+        },
+        response,
     )
 
 
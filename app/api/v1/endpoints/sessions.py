@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app import crud, models
 from app.schemas import session as session_schemas
+from app.core import catalog, http_cache
 from app.core.security import require_admin
 
 
@@ -20,14 +21,29 @@ def get_db():
         db.close()
 
 
-@router.get("/", response_model=List[session_schemas.SessionRead])
+def _sessions_validator():
+    # 场次写入都经 crud 层失效目录缓存，版本号即可代表列表内容，无需查库
+    return catalog.sessions.validator()
+
+
+@router.get(
+    "/",
+    response_model=List[session_schemas.SessionRead],
+    dependencies=[Depends(http_cache.conditional("sessions", _sessions_validator))],
+)
 def list_sessions(
     event_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 50,
     db: Session = Depends(get_db),
 ):
-    return crud.session.list_sessions(db, event_id=event_id, skip=skip, limit=limit)
+    return catalog.sessions.get_or_load(
+        f"list:{event_id}:{skip}:{limit}",
+        lambda: [
+            session_schemas.SessionRead.model_validate(row).model_dump(mode="json")
+            for row in crud.session.list_sessions(db, event_id=event_id, skip=skip, limit=limit)
+        ],
+    )
 
 
 @router.get("/{session_id}", response_model=session_schemas.SessionRead)
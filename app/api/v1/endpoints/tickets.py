@@ -1,22 +1,33 @@
+import base64
+import json
+import logging
+import weakref
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.db.session import SessionLocal
 from app import crud
 from app.schemas import ticket as ticket_schemas
 from app.schemas import inventory as inventory_schemas
+from app.core import http_cache
+from app.core.responses import fast_json
+from app.core.rate_limit import rate_limit
 from app.core.security import require_admin, get_current_user
 from app import models
 from app.schemas.ticket import TicketListItem
 from app.models.payment import Payment
 from app.models.refund import Refund
 from app.models.enums import RefundStatus, TicketStatus
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 from app.schemas import refund as refund_schemas
+from app.schemas import checkin as checkin_schemas
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -28,8 +39,23 @@ def get_db():
         db.close()
 
 
+def _inventory_validator(session_id: int | None = None, ticket_type_id: int | None = None, db: Session = Depends(get_db)):
+    # updated_at 只精确到秒，同一秒内的多次扣减要靠 available 合计区分
+    inv = models.TicketInventory
+    stmt = select(func.count(inv.id), func.max(inv.updated_at), func.sum(inv.available), func.sum(inv.total))
+    if session_id is not None:
+        stmt = stmt.where(inv.session_id == session_id)
+    if ticket_type_id is not None:
+        stmt = stmt.where(inv.ticket_type_id == ticket_type_id)
+    return tuple(db.execute(stmt).one())
+
+
 # --------- Inventory endpoints (GET is public read; mutations are admin) ---------
-@router.get("/inventory", response_model=List[inventory_schemas.InventoryRead])
+@router.get(
+    "/inventory",
+    response_model=List[inventory_schemas.InventoryRead],
+    dependencies=[Depends(http_cache.conditional("inventory", _inventory_validator))],
+)
 def list_inventory(
     skip: int = 0,
     limit: int = 50,
@@ -64,7 +90,7 @@ def update_inventory(
 
 
 # --------- Purchase & Seckill (place BEFORE /{ticket_id} for clarity) ---------
-@router.post("/purchase", response_model=ticket_schemas.TicketRead)
+@router.post("/purchase", response_model=ticket_schemas.TicketRead, dependencies=[Depends(rate_limit("purchase"))])
 def purchase_ticket(
     payload: ticket_schemas.TicketPurchase,
     db: Session = Depends(get_db),
@@ -89,7 +115,7 @@ def purchase_ticket(
         raise HTTPException(status_code=400, detail=msg)
 
 
-@router.post("/purchase/", response_model=ticket_schemas.TicketRead)
+@router.post("/purchase/", response_model=ticket_schemas.TicketRead, dependencies=[Depends(rate_limit("purchase"))])
 def purchase_ticket_trailing_slash(
     payload: ticket_schemas.TicketPurchase,
     db: Session = Depends(get_db),
@@ -98,7 +124,7 @@ def purchase_ticket_trailing_slash(
     return purchase_ticket(payload, db=db, current_user=current_user)
 
 
-@router.post("/seckill", response_model=ticket_schemas.TicketRead)
+@router.post("/seckill", response_model=ticket_schemas.TicketRead, dependencies=[Depends(rate_limit("purchase"))])
 def seckill_ticket(
     payload: ticket_schemas.TicketPurchase,
     db: Session = Depends(get_db),
@@ -107,6 +133,91 @@ def seckill_ticket(
     return purchase_ticket(payload, db=db, current_user=current_user)
 
 
+# --------- Gate check-in (staff) ---------
+@router.post("/check-in", response_model=checkin_schemas.CheckInResult)
+def check_in_ticket(
+    payload: checkin_schemas.CheckInRequest,
+    db: Session = Depends(get_db),
+    _: models.User = Depends(require_admin),
+):
+    return crud.checkin.check_in(db, payload.token, session_id=payload.session_id)
+
+
+@router.get("/check-in/manifest", response_model=checkin_schemas.ScannerManifest)
+def scanner_manifest(
+    session_id: int,
+    since: int | None = None,
+    db: Session = Depends(get_db),
+    _: models.User = Depends(require_admin),
+):
+    """离线闸机清单：不带 since 时下发全量，带上次的 version 时只下发增量。"""
+    return crud.checkin.build_manifest(db, session_id, since=since)
+
+
+@router.post("/check-in/batch", response_model=checkin_schemas.ScanBatchResult)
+def upload_scan_batch(
+    payload: checkin_schemas.ScanBatch,
+    db: Session = Depends(get_db),
+    _: models.User = Depends(require_admin),
+):
+    scans = [scan.model_dump() for scan in payload.scans]
+    return crud.checkin.apply_scan_batch(db, scans, session_id=payload.session_id)
+
+
+@router.post("/bulk")
+def create_tickets_bulk(
+    payload: ticket_schemas.TicketBulkCreate,
+    db: Session = Depends(get_db),
+    _: object = Depends(require_admin),
+):
+    """批量出票（赠票/赞助配额）：先一次性预占库存，再以 NDJSON 流式返回进度。
+
+    每行为一个已提交批次的进度：``{"issued", "total", "first_id", "last_id"}``。
+    出错时响应状态码已是 200，流以一行 ``{"error": ..., "issued": n}`` 结束：
+    前 n 张票已出，其余预占库存已归还。客户端应以最后一行判断结果。
+    """
+    if not crud.ticket.reserve_inventory(db, payload.session_id, payload.ticket_type_id, payload.quantity):
+        raise HTTPException(status_code=409, detail="Out of stock")
+    state = {"issued": 0}
+
+    def settle() -> None:
+        # 归还未出的预占库存：流结束、失败、客户端断开或流从未开始（生成器被回收）时执行，仅一次
+        remaining = payload.quantity - state["issued"]
+        if remaining <= 0:
+            return
+        release_db = SessionLocal()
+        try:
+            crud.ticket.release_inventory(release_db, payload.session_id, payload.ticket_type_id, remaining)
+        except Exception:
+            logger.exception("Failed to release %d reserved tickets", remaining)
+        finally:
+            release_db.close()
+
+    def progress():
+        # 流式响应期间使用独立会话，避免依赖的会话提前关闭
+        stream_db = SessionLocal()
+        try:
+            for step in crud.ticket.issue_tickets_bulk(
+                stream_db,
+                session_id=payload.session_id,
+                ticket_type_id=payload.ticket_type_id,
+                user_id=payload.user_id,
+                quantity=payload.quantity,
+                chunk_size=payload.chunk_size,
+            ):
+                state["issued"] = step["issued"]
+                yield json.dumps(step) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e), "issued": state["issued"]}) + "\n"
+        finally:
+            stream_db.close()
+            release()
+
+    stream = progress()
+    release = weakref.finalize(stream, settle)
+    return StreamingResponse(stream, media_type="application/x-ndjson")
+
+
 @router.post("/", response_model=ticket_schemas.TicketRead)
 def create_ticket(
     payload: ticket_schemas.TicketCreate,
@@ -116,17 +227,27 @@ def create_ticket(
     return crud.ticket.create_ticket(db, payload)
 
 
-@router.get("/{ticket_id}", response_model=ticket_schemas.TicketRead)
-def read_ticket(ticket_id: int, db: Session = Depends(get_db)):
-    db_ticket = crud.ticket.get_ticket(db, ticket_id)
-    if not db_ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-    return db_ticket
-
-
+def _ticket_dict(t: models.Ticket) -> dict:
+    # 与 TicketRead 的序列化结果一致（二维码为 base64）
+    return {
+        "id": t.id,
+        "ticket_type_id": t.ticket_type_id,
+        "session_id": t.session_id,
+        "user_id": t.user_id,
+        "seat_id": t.seat_id,
+        "status": TicketStatus(t.status).value,
+        "qr_code": base64.b64encode(t.qr_code).decode("ascii"),
+        "purchase_time": t.purchase_time,
+        "created_at": t.created_at,
+        "updated_at": t.updated_at,
+    }
+
+
+# 须声明在 /{ticket_id} 之前，否则 /my 会被当作 ticket_id 匹配。
+# 以下列表接口的数据直接来自数据库行：按 response_model 的形状拼 dict 并用 orjson 输出，不再逐行构造/校验模型
 @router.get("/", response_model=List[ticket_schemas.TicketRead])
 def list_tickets(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return crud.ticket.list_tickets(db, skip=skip, limit=limit)
+    return fast_json([_ticket_dict(t) for t in crud.ticket.list_tickets(db, skip=skip, limit=limit)])
 
 
 @router.get("/my", response_model=List[TicketListItem])
@@ -137,29 +258,52 @@ def list_my_tickets(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    q = select(models.Ticket).where(models.Ticket.user_id == current_user.id)
+    q = select(
+        models.Ticket.id,
+        models.Ticket.user_id,
+        models.Ticket.session_id,
+        models.Ticket.ticket_type_id,
+        models.Ticket.seat_id,
+        models.Ticket.status,
+        models.Ticket.created_at,
+    ).where(models.Ticket.user_id == current_user.id)
     if status:
         q = q.where(models.Ticket.status == status)
     q = q.offset(skip).limit(limit)
-    tickets = list(db.execute(q).scalars().all())
-    # attach price from payments (latest)
-    items: List[TicketListItem] = []
-    for t in tickets:
-        p = db.execute(select(Payment).where(Payment.ticket_id == t.id).order_by(Payment.id.desc()).limit(1)).scalars().first()
-        price = int(getattr(p, "amount", 0) or 0)
-        items.append(
-            TicketListItem(
-                id=t.id,
-                user_id=t.user_id,
-                session_id=t.session_id,
-                ticket_type_id=t.ticket_type_id,
-                seat_id=t.seat_id,
-                status=str(t.status),
-                price=price,
-                created_at=t.created_at,
-            )
+    tickets = db.execute(q).all()
+    # attach price from payments (latest)，一次查询取每张票最新的支付记录
+    prices: dict[int, int] = {}
+    if tickets:
+        latest = (
+            select(func.max(Payment.id))
+            .where(Payment.ticket_id.in_([t.id for t in tickets]))
+            .group_by(Payment.ticket_id)
         )
-    return items
+        rows = db.execute(select(Payment.ticket_id, Payment.amount).where(Payment.id.in_(latest)))
+        prices = {tid: int(amount or 0) for tid, amount in rows}
+    return fast_json(
+        [
+            {
+                "id": t.id,
+                "user_id": t.user_id,
+                "session_id": t.session_id,
+                "ticket_type_id": t.ticket_type_id,
+                "seat_id": t.seat_id,
+                "status": TicketStatus(t.status).value,
+                "price": prices.get(t.id, 0),
+                "created_at": t.created_at,
+            }
+            for t in tickets
+        ]
+    )
+
+
+@router.get("/{ticket_id}", response_model=ticket_schemas.TicketRead)
+def read_ticket(ticket_id: int, db: Session = Depends(get_db)):
+    db_ticket = crud.ticket.get_ticket(db, ticket_id)
+    if not db_ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    return db_ticket
 
 
 @router.post("/{ticket_id}/refund-request", response_model=refund_schemas.RefundRead)
@@ -209,6 +353,34 @@ def list_refund_requests(
     return list(db.execute(q).scalars().all())
 
 
+def _batch_review(payload: refund_schemas.RefundBatchReview, db: Session, admin: models.User, approve: bool) -> dict:
+    results = crud.refund.review_refunds(
+        db, payload.refund_ids, approve=approve, reviewer_id=admin.id, chunk_size=payload.chunk_size
+    )
+    summary: dict = {}
+    for r in results:
+        summary[r["result"]] = summary.get(r["result"], 0) + 1
+    return {"results": results, "summary": summary}
+
+
+@router.post("/refund-requests/batch-approve", response_model=refund_schemas.RefundBatchResult)
+def batch_approve_refund_requests(
+    payload: refund_schemas.RefundBatchReview,
+    db: Session = Depends(get_db),
+    admin: models.User = Depends(require_admin),
+):
+    return _batch_review(payload, db, admin, approve=True)
+
+
+@router.post("/refund-requests/batch-reject", response_model=refund_schemas.RefundBatchResult)
+def batch_reject_refund_requests(
+    payload: refund_schemas.RefundBatchReview,
+    db: Session = Depends(get_db),
+    admin: models.User = Depends(require_admin),
+):
+    return _batch_review(payload, db, admin, approve=False)
+
+
 @router.post("/refund-requests/{refund_id}/approve", response_model=refund_schemas.RefundRead)
 def approve_refund_request(
     refund_id: int,
@@ -248,10 +420,19 @@ def approve_refund_request(
         db.execute(
             update(models.User).where(models.User.id == t.user_id).values(credit=models.User.credit + int(ref.amount or 0))
         )
+        # 同事务更新销售汇总
+        crud.rollup.record_refunds(
+            db, [crud.rollup.RollupDelta(t.purchase_time, t.session_id, t.ticket_type_id, 1, int(ref.amount or 0))]
+        )
         # 更新退款状态
         ref.status = RefundStatus.approved
         ref.reviewed_by = admin.id
+        refunded = crud.refund.RefundedTicket(
+            t.id, t.user_id, t.session_id, t.ticket_type_id, t.seat_id, int(ref.amount or 0), t.purchase_time
+        )
+        stock = crud.inventory.availability(db, [(t.session_id, t.ticket_type_id)])
         db.commit()
+        crud.refund.refunds_committed([refunded], stock)
         db.refresh(ref)
         return ref
     except Exception:
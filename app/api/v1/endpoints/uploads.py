@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from app.utils.storage import LocalStorage, UploadTooLarge, get_storage
+
+
+router = APIRouter()
+
+
+# 本地存储下代替对象存储接收预签名 PUT（开发/离线测试用）；S3 后端或未配置 SECRET_KEY 时不可用
+@router.put("/local/{key:path}")
+async def local_signed_put(key: str, expires: int, sig: str, request: Request):
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage) or not storage.accepts_signed_puts:
+        raise HTTPException(status_code=404, detail="Not found")
+    content_type = request.headers.get("content-type", "")
+    if not storage.verify_put(key, content_type, expires, sig):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > storage.max_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {storage.max_bytes} bytes")
+    try:
+        await storage.save_stream(key, request.stream())
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(status_code=200)
@@ -1,12 +1,19 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException
+import io
+import json
+import re
+from pathlib import Path
+from typing import List, Optional
+from uuid import uuid4
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.db.session import SessionLocal
 from app import crud
 from app.schemas import user as user_schemas
-from app.core.security import get_current_user
+from app.core.config import get_settings
+from app.core.security import get_current_user, require_admin
 from app import models
 
 
@@ -21,6 +28,47 @@ def get_db():
         db.close()
 
 
+@router.post("/import")
+def import_users(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    chunk_size: int = Query(1000, ge=1, le=10000),
+    _: models.User = Depends(require_admin),
+):
+    """批量导入用户（CSV/NDJSON），以 NDJSON 流式返回进度；被拒行写入可下载的报告。"""
+    fmt = format or ("ndjson" if (file.filename or "").endswith((".ndjson", ".jsonl")) else "csv")
+    import_id = uuid4().hex
+    reject_dir = Path(get_settings().import_reject_dir)
+    reject_dir.mkdir(parents=True, exist_ok=True)
+
+    def progress():
+        stream_db = SessionLocal()
+        text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        try:
+            with open(reject_dir / f"{import_id}.ndjson", "w", encoding="utf-8") as rejected:
+                for step in crud.user_import.import_users(
+                    stream_db, crud.user_import.iter_records(text, fmt), chunk_size=chunk_size, rejected=rejected
+                ):
+                    yield json.dumps({"import_id": import_id, **step}) + "\n"
+        except Exception as e:
+            yield json.dumps({"import_id": import_id, "error": str(e)}) + "\n"
+        finally:
+            text.detach()
+            stream_db.close()
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+
+@router.get("/import/{import_id}/rejected")
+def download_rejected_rows(import_id: str, _: models.User = Depends(require_admin)):
+    if not re.fullmatch(r"[0-9a-f]{32}", import_id):
+        raise HTTPException(status_code=404, detail="Import not found")
+    path = Path(get_settings().import_reject_dir) / f"{import_id}.ndjson"
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Import not found")
+    return FileResponse(path, media_type="application/x-ndjson", filename=f"rejected-{import_id}.ndjson")
+
+
 @router.post("/", response_model=user_schemas.UserRead)
 def create_user(user: user_schemas.UserCreate, db: Session = Depends(get_db)):
     exists = crud.user.get_user_by_email(db, email=user.email)
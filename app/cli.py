@@ -0,0 +1,86 @@
+"""Operational commands: ``python -m app.cli <command> [options]``."""
+
+from __future__ import annotations
+
+import argparse
+from typing import List, Optional
+
+from app import crud
+from app.core.config import get_settings
+from app.db.session import SessionLocal, init_db
+
+
+def _init_db(args: argparse.Namespace) -> None:
+    init_db()
+    print("Created missing tables")
+
+
+def _rebuild_rollups(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        rows = crud.rollup.rebuild(db, batch=args.batch)
+    finally:
+        db.close()
+    print(f"Rebuilt sales rollups: {rows} rows")
+
+
+def _build_snapshot(args: argparse.Namespace) -> None:
+    from app.crud import snapshot  # 按需导入（依赖 numpy）
+
+    db = SessionLocal()
+    try:
+        manifest = snapshot.build_snapshot(db, args.dir or get_settings().snapshot_dir, batch=args.batch)
+    finally:
+        db.close()
+    rows = ", ".join(f"{t}={m['rows']}" for t, m in manifest["tables"].items())
+    print(f"Built snapshot {manifest['name']}: {rows}")
+
+
+def _import_users(args: argparse.Namespace) -> None:
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    rejected_path = args.rejected or f"{args.path}.rejected.ndjson"
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as src, open(rejected_path, "w", encoding="utf-8") as rej:
+            step = {"processed": 0, "inserted": 0, "rejected": 0}
+            for step in crud.user_import.import_users(
+                db, crud.user_import.iter_records(src, fmt), chunk_size=args.chunk_size, rejected=rej
+            ):
+                print(f"processed={step['processed']} inserted={step['inserted']} rejected={step['rejected']}", flush=True)
+    finally:
+        db.close()
+    print(f"Done: {step['inserted']} users imported, {step['rejected']} rejected (see {rejected_path})")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Ticketing API maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("init-db", help="Create missing tables (dev/test; production uses alembic upgrade head)")
+    p.set_defaults(func=_init_db)
+
+    p = sub.add_parser("rebuild-rollups", help="Recompute hourly sales rollups from history")
+    p.add_argument("--batch", type=int, default=5000, help="Rows fetched / inserted per round trip")
+    p.set_defaults(func=_rebuild_rollups)
+
+    p = sub.add_parser("build-snapshot", help="Export tickets/payments/refunds to columnar NumPy snapshots")
+    p.add_argument("--dir", default=None, help="Snapshot root (defaults to SNAPSHOT_DIR)")
+    p.add_argument("--batch", type=int, default=20000, help="Rows fetched per round trip")
+    p.set_defaults(func=_build_snapshot)
+
+    p = sub.add_parser("import-users", help="Bulk-import users from a CSV (username,email,password) or NDJSON file")
+    p.add_argument("path")
+    p.add_argument("--format", choices=crud.user_import.IMPORT_FORMATS, default=None, help="Defaults from the file suffix")
+    p.add_argument("--chunk-size", type=int, default=1000, help="Rows validated, hashed and inserted per transaction")
+    p.add_argument("--rejected", default=None, help="Rejected-rows NDJSON (defaults to <path>.rejected.ndjson)")
+    p.set_defaults(func=_import_users)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""Caching: Redis with an in-process fallback.
+
+``ResultCache`` keys every entry by a time bucket. A request in a new bucket
+serves the previous bucket's value (stale-while-revalidate) while exactly one
+worker recomputes it (single-flight via ``SET NX`` in Redis or a per-key lock
+in process).
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.core.redis_client import get_redis
+
+
+_MISSING = object()
+
+
+class LocalTTLCache:
+    """Thread-safe bounded LRU whose entries expire after their TTL."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ResultCache:
+    def __init__(self, namespace: str, bucket_seconds: int = 60, stale_buckets: int = 1, lock_seconds: int = 30) -> None:
+        self.namespace = namespace
+        self.bucket_seconds = max(1, bucket_seconds)
+        self.stale_buckets = max(0, stale_buckets)
+        self.lock_seconds = lock_seconds
+        self._local = LocalTTLCache(maxsize=2048)
+        self._local_locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    # ----- storage -----
+    def _key(self, key: str, bucket: int) -> str:
+        return f"cache:{self.namespace}:{key}:{bucket}"
+
+    def _ttl(self) -> int:
+        return self.bucket_seconds * (1 + self.stale_buckets)
+
+    def _load(self, rds, full_key: str) -> Any:
+        if rds:
+            try:
+                raw = rds.get(full_key)
+                return _MISSING if raw is None else json.loads(raw)
+            except Exception:
+                pass
+        return self._local.get(full_key, _MISSING)
+
+    def _store(self, rds, full_key: str, value: Any) -> None:
+        if rds:
+            try:
+                rds.set(full_key, json.dumps(value, default=str), ex=self._ttl())
+                return
+            except Exception:
+                pass
+        self._local.set(full_key, value, self._ttl())
+
+    # ----- single-flight -----
+    def _acquire(self, rds, full_key: str) -> bool:
+        if rds:
+            try:
+                return bool(rds.set(f"{full_key}:lock", "1", nx=True, ex=self.lock_seconds))
+            except Exception:
+                pass
+        with self._guard:
+            lock = self._local_locks.setdefault(full_key, threading.Lock())
+        return lock.acquire(blocking=False)
+
+    def _release(self, rds, full_key: str) -> None:
+        if rds:
+            try:
+                rds.delete(f"{full_key}:lock")
+                return
+            except Exception:
+                pass
+        with self._guard:
+            lock = self._local_locks.pop(full_key, None)
+        if lock is not None and lock.locked():
+            lock.release()
+
+    def _compute_and_store(self, rds, full_key: str, compute: Callable[[], Any]) -> Any:
+        try:
+            value = compute()
+            if value is not None:  # None 表示"不存在"，缓存后会在整个时间桶内返回过期的 404
+                self._store(rds, full_key, value)
+            return value
+        finally:
+            self._release(rds, full_key)
+
+    # ----- public API -----
+    def get_or_compute(self, key: str, compute: Callable[[], Any], wait_seconds: float = 5.0) -> Any:
+        """Return the cached value for ``key`` in the current time bucket.
+
+        ``compute`` must be self-contained (open its own DB session): it may run
+        on a background thread after the request that triggered it finished.
+        ``None`` results are returned but not cached.
+        """
+        rds = get_redis()  # 每次调用只解析一次连接
+        bucket = int(time.time() // self.bucket_seconds)
+        full_key = self._key(key, bucket)
+        value = self._load(rds, full_key)
+        if value is not _MISSING:
+            return value
+
+        # stale-while-revalidate：返回上一时间桶的值，由一个 worker 后台刷新
+        for age in range(1, self.stale_buckets + 1):
+            stale = self._load(rds, self._key(key, bucket - age))
+            if stale is not _MISSING:
+                if self._acquire(rds, full_key):
+                    threading.Thread(target=self._refresh_quietly, args=(rds, full_key, compute), daemon=True).start()
+                return stale
+
+        if self._acquire(rds, full_key):
+            return self._compute_and_store(rds, full_key, compute)
+        # 其它 worker 正在计算：短暂等待其结果，超时则自行计算
+        deadline = time.monotonic() + wait_seconds
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = self._load(rds, full_key)
+            if value is not _MISSING:
+                return value
+            # 锁已释放却没有结果（计算失败或结果为 None）：不再等待，自行计算
+            if self._acquire(rds, full_key):
+                return self._compute_and_store(rds, full_key, compute)
+        return compute()
+
+    def _refresh_quietly(self, rds, full_key: str, compute: Callable[[], Any]) -> None:
+        try:
+            self._compute_and_store(rds, full_key, compute)
+        except Exception:
+            pass  # 下次请求会重试；旧值仍在过期前可用
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop cached buckets (for ``key``, or the whole namespace)."""
+        pattern = f"cache:{self.namespace}:{key + ':' if key else ''}*"
+        rds = get_redis()
+        if rds:
+            try:
+                for k in rds.scan_iter(match=pattern, count=500):
+                    rds.delete(k)
+            except Exception:
+                pass
+        self._local.clear()
+
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+_two_tier: Dict[str, "TwoTierCache"] = {}
+_listeners: Dict[str, Callable[[Optional[str]], None]] = {}
+_subscriber: Optional[threading.Thread] = None
+_subscriber_lock = threading.Lock()
+
+
+def _subscribe_forever() -> None:
+    """Apply version bumps published by other workers; reconnects with backoff."""
+    backoff = 1.0
+    while True:
+        rds = get_redis()
+        if rds is None:
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+            continue
+        try:
+            pubsub = rds.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            backoff = 1.0
+            # 断线期间的消息已丢失：重读各缓存的版本号，其它监听方整体丢弃
+            for cache in list(_two_tier.values()):
+                cache._reload_version(rds)
+            for callback in list(_listeners.values()):
+                callback(None)
+            while True:
+                msg = pubsub.get_message(timeout=1.0)
+                if not msg:
+                    continue
+                data = msg["data"].decode() if isinstance(msg["data"], bytes) else str(msg["data"])
+                namespace, _, payload = data.rpartition(":")
+                cache = _two_tier.get(namespace)
+                if cache is not None:
+                    # 消息只作通知：以计数器当前值为准，乱序到达的旧版本号不会回退本地版本
+                    cache._reload_version(rds)
+                elif namespace in _listeners:
+                    _listeners[namespace](payload)
+        except Exception:
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+def _ensure_subscriber() -> None:
+    global _subscriber
+    if _subscriber is None:
+        with _subscriber_lock:
+            if _subscriber is None:
+                _subscriber = threading.Thread(target=_subscribe_forever, name="cache-invalidation", daemon=True)
+                _subscriber.start()
+
+
+def on_invalidation(namespace: str, callback: Callable[[Optional[str]], None]) -> None:
+    """Run ``callback(payload)`` for every ``publish_invalidation(namespace, payload)``.
+
+    ``callback(None)`` is called whenever the subscriber (re)connects, since
+    messages sent while it was disconnected are lost.
+    """
+    _listeners[namespace] = callback
+
+
+def invalidation_channel() -> bool:
+    """True when invalidations published by any worker also reach this one."""
+    if get_redis() is None:
+        return False
+    _ensure_subscriber()
+    return True
+
+
+def publish_invalidation(namespace: str, payload: str) -> None:
+    """Broadcast ``payload`` to the ``on_invalidation`` callbacks of every worker (best-effort)."""
+    rds = get_redis()
+    if rds:
+        try:
+            rds.publish(INVALIDATION_CHANNEL, f"{namespace}:{payload}")
+        except Exception:
+            pass
+
+
+class TwoTierCache:
+    """Per-worker LRU+TTL (L1) in front of Redis (L2), with versioned keys.
+
+    ``invalidate`` bumps the namespace version (Redis ``INCR``) and publishes
+    it, so every worker stops reading older entries at once; stale entries
+    simply age out. Workers also re-read the version every
+    ``version_refresh`` seconds in case a message was missed.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        local_ttl: float = 10.0,
+        redis_ttl: int = 300,
+        maxsize: int = 2048,
+        version_refresh: float = 5.0,
+    ) -> None:
+        self.namespace = namespace
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self.version_refresh = version_refresh
+        self._local = LocalTTLCache(maxsize=maxsize)
+        self._version = 0
+        self._version_checked = 0.0
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+            "lookup_seconds": 0.0,
+            "load_seconds": 0.0,
+        }
+        _two_tier[namespace] = self
+
+    @property
+    def _version_key(self) -> str:
+        return f"cache:{self.namespace}:version"
+
+    def _apply_version(self, version: int) -> None:
+        # 任何变化都视为失效：Redis 清空/重启或断线期间的本地递增后，共享计数器可能小于本地版本
+        if version != self._version:
+            self._version = version
+            self._local.clear()
+
+    def _reload_version(self, rds) -> None:
+        self._version_checked = time.monotonic()
+        self._apply_version(int(rds.get(self._version_key) or 0))
+
+    def _current_version(self, rds) -> int:
+        now = time.monotonic()
+        if rds and now - self._version_checked > self.version_refresh:
+            try:
+                self._reload_version(rds)
+            except Exception:
+                pass
+        return self._version
+
+    def version(self) -> int:
+        """Version the next ``get_or_load`` reads under (changes on every invalidation)."""
+        rds = get_redis()
+        if rds:
+            _ensure_subscriber()
+        return self._current_version(rds)
+
+    def validator(self) -> Tuple[int, ...]:
+        """Cheap HTTP validator for data served through this cache, without a DB query.
+
+        With Redis the version is shared, so it changes exactly when entries
+        do. Without Redis other workers' writes only show up once L1 entries
+        expire, so the current ``local_ttl`` window is part of the validator.
+        """
+        rds = get_redis()
+        version = self.version()
+        if rds:
+            return (version,)
+        return (version, int(time.time() // max(self.local_ttl, 1.0)))
+
+    def _count(self, field: str, started: float, load_seconds: float = 0.0) -> None:
+        with self._stats_lock:
+            self._stats[field] += 1
+            self._stats["lookup_seconds"] += time.perf_counter() - started
+            self._stats["load_seconds"] += load_seconds
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Cached JSON-serializable value for ``key``; ``None`` results are not cached."""
+        started = time.perf_counter()
+        rds = get_redis()
+        if rds:
+            _ensure_subscriber()
+        version = self._current_version(rds)
+        local_key = (version, key)
+        value = self._local.get(local_key, _MISSING)
+        if value is not _MISSING:
+            self._count("l1_hits", started)
+            return value
+        redis_key = f"cache:{self.namespace}:v{version}:{key}"
+        if rds:
+            try:
+                raw = rds.get(redis_key)
+                if raw is not None:
+                    value = json.loads(raw)
+                    self._local.set(local_key, value, self.local_ttl)
+                    self._count("l2_hits", started)
+                    return value
+            except Exception:
+                pass
+        load_started = time.perf_counter()
+        value = loader()
+        load_seconds = time.perf_counter() - load_started
+        if value is not None:
+            self._local.set(local_key, value, self.local_ttl)
+            if rds:
+                try:
+                    rds.set(redis_key, json.dumps(value, default=str), ex=self.redis_ttl)
+                except Exception:
+                    pass
+        self._count("misses", started, load_seconds)
+        return value
+
+    def invalidate(self) -> None:
+        """Bump the version here and, through Redis pub/sub, in every other worker."""
+        with self._stats_lock:
+            self._stats["invalidations"] += 1
+        self._local.clear()
+        rds = get_redis()
+        if rds:
+            try:
+                version = int(rds.incr(self._version_key))
+                rds.publish(INVALIDATION_CHANNEL, f"{self.namespace}:{version}")
+                self._apply_version(version)
+                return
+            except Exception:
+                pass
+        self._version += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            s = dict(self._stats)
+        lookups = s["l1_hits"] + s["l2_hits"] + s["misses"]
+        return {
+            "version": self._version,
+            "entries": len(self._local),
+            "lookups": lookups,
+            "l1_hits": s["l1_hits"],
+            "l2_hits": s["l2_hits"],
+            "misses": s["misses"],
+            "invalidations": s["invalidations"],
+            "hit_ratio": round((s["l1_hits"] + s["l2_hits"]) / lookups, 4) if lookups else 0.0,
+            "avg_lookup_ms": round(1000 * s["lookup_seconds"] / lookups, 3) if lookups else 0.0,
+            "avg_load_ms": round(1000 * s["load_seconds"] / s["misses"], 3) if s["misses"] else 0.0,
+        }
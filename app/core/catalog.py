@@ -0,0 +1,50 @@
+"""Two-tier caches for the public event catalog and sessions.
+
+Reads go through ``events`` / ``sessions`` / ``details``; the CRUD functions
+that change events, sessions or inventory call the matching ``invalidate_*``
+after committing. Ticket sales only age out of ``details`` by TTL.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from app.core.cache import TwoTierCache
+from app.core.config import get_settings
+
+
+_settings = get_settings()
+
+events = TwoTierCache(
+    "catalog:events",
+    local_ttl=_settings.catalog_cache_local_ttl_seconds,
+    redis_ttl=_settings.catalog_cache_redis_ttl_seconds,
+)
+sessions = TwoTierCache(
+    "catalog:sessions",
+    local_ttl=_settings.catalog_cache_local_ttl_seconds,
+    redis_ttl=_settings.catalog_cache_redis_ttl_seconds,
+)
+details = TwoTierCache(
+    "catalog:detail",
+    local_ttl=_settings.event_detail_cache_ttl_seconds,
+    redis_ttl=_settings.event_detail_cache_ttl_seconds,
+)
+
+
+def invalidate_events() -> None:
+    events.invalidate()
+    details.invalidate()
+
+
+def invalidate_sessions() -> None:
+    sessions.invalidate()
+    details.invalidate()
+
+
+def invalidate_details() -> None:
+    details.invalidate()
+
+
+def metrics() -> Dict[str, Any]:
+    return {"events": events.metrics(), "sessions": sessions.metrics(), "details": details.metrics()}
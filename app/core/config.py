@@ -49,6 +49,79 @@ class Settings(BaseSettings):
     redis_port: int = Field(default=6379, validation_alias=AliasChoices("REDIS_PORT"))
     redis_db: int = Field(default=0, validation_alias=AliasChoices("REDIS_DB"))
     redis_password: str | None = Field(default=None, validation_alias=AliasChoices("REDIS_PASSWORD"))
+    # Seconds before retrying an unreachable Redis (doubles on each failure, up to 30s)
+    redis_retry_seconds: float = Field(default=1.0, validation_alias=AliasChoices("REDIS_RETRY_SECONDS"))
+
+    # Access tokens (JWT)
+    secret_key: str | None = Field(default=None, validation_alias=AliasChoices("SECRET_KEY"))
+    algorithm: str = Field(default="HS256", validation_alias=AliasChoices("ALGORITHM"))
+    access_token_expire_minutes: int = Field(default=60, validation_alias=AliasChoices("ACCESS_TOKEN_EXPIRE_MINUTES"))
+
+    # Startup: create missing tables in the lifespan hook (dev convenience; with DB_CREATE_ALL=false
+    # the schema is managed by `alembic upgrade head`, which also adopts databases created by `init-db`)
+    db_create_all: bool = Field(default=True, validation_alias=AliasChoices("DB_CREATE_ALL"))
+    # Connections each worker opens at startup so the first requests skip the handshake
+    db_pool_prewarm: int = Field(default=2, ge=0, validation_alias=AliasChoices("DB_POOL_PREWARM"))
+
+    # Signed ticket QR tokens (falls back to SECRET_KEY when unset)
+    ticket_token_secret: str | None = Field(default=None, validation_alias=AliasChoices("TICKET_TOKEN_SECRET"))
+    ticket_token_grace_hours: int = Field(default=24, validation_alias=AliasChoices("TICKET_TOKEN_GRACE_HOURS"))
+
+    # CPU-bound worker pool (QR rendering etc.); defaults to os.cpu_count()
+    process_pool_workers: int | None = Field(default=None, validation_alias=AliasChoices("PROCESS_POOL_WORKERS"))
+
+    # Password hashing: bcrypt cost (hashes with another cost are upgraded on login) and hashing threads
+    bcrypt_rounds: int = Field(default=12, ge=4, le=31, validation_alias=AliasChoices("BCRYPT_ROUNDS"))
+    password_hash_workers: int | None = Field(default=None, validation_alias=AliasChoices("PASSWORD_HASH_WORKERS"))
+
+    # Bulk user import: rejected-row reports (NDJSON) are kept here for download
+    import_reject_dir: str = Field(default="var/imports", validation_alias=AliasChoices("IMPORT_REJECT_DIR"))
+
+    # Rate limits per route group, "requests/seconds[/burst]", keyed by user id or client IP
+    rate_limit_enabled: bool = Field(default=True, validation_alias=AliasChoices("RATE_LIMIT_ENABLED"))
+    rate_limit_purchase: str = Field(default="10/60", validation_alias=AliasChoices("RATE_LIMIT_PURCHASE"))
+    rate_limit_login: str = Field(default="10/60", validation_alias=AliasChoices("RATE_LIMIT_LOGIN"))
+
+    # Event/session catalog cache: per-worker TTL in front of Redis; writes bump a version via pub/sub
+    catalog_cache_local_ttl_seconds: float = Field(default=10.0, validation_alias=AliasChoices("CATALOG_CACHE_LOCAL_TTL_SECONDS"))
+    catalog_cache_redis_ttl_seconds: int = Field(default=300, validation_alias=AliasChoices("CATALOG_CACHE_REDIS_TTL_SECONDS"))
+    # Event detail pages include live availability, so they are only cached briefly
+    event_detail_cache_ttl_seconds: int = Field(default=3, ge=1, validation_alias=AliasChoices("EVENT_DETAIL_CACHE_TTL_SECONDS"))
+    # HTTP caching of public GETs per router, "max_age/stale_while_revalidate" seconds ("0" = always revalidate)
+    http_cache_enabled: bool = Field(default=True, validation_alias=AliasChoices("HTTP_CACHE_ENABLED"))
+    http_cache_events: str = Field(default="30/300", validation_alias=AliasChoices("HTTP_CACHE_EVENTS"))
+    http_cache_sessions: str = Field(default="30/300", validation_alias=AliasChoices("HTTP_CACHE_SESSIONS"))
+    http_cache_inventory: str = Field(default="5/30", validation_alias=AliasChoices("HTTP_CACHE_INVENTORY"))
+    http_cache_seats: str = Field(default="2/10", validation_alias=AliasChoices("HTTP_CACHE_SEATS"))
+    # Responses at least this large are gzip-compressed when the client accepts it
+    gzip_minimum_size: int = Field(default=1024, ge=0, validation_alias=AliasChoices("GZIP_MINIMUM_SIZE"))
+    gzip_compresslevel: int = Field(default=5, ge=1, le=9, validation_alias=AliasChoices("GZIP_COMPRESSLEVEL"))
+
+    # Upload storage: "s3" (R2/S3), "local" (files served from /static, for dev and offline tests) or "auto" (s3 when credentials are set)
+    storage_backend: str = Field(default="auto", validation_alias=AliasChoices("STORAGE_BACKEND"))
+    storage_local_dir: str = Field(default="static/uploads", validation_alias=AliasChoices("STORAGE_LOCAL_DIR"))
+    storage_local_base_url: str = Field(default="/static/uploads", validation_alias=AliasChoices("STORAGE_LOCAL_BASE_URL"))
+    s3_access_key_id: str | None = Field(default=None, validation_alias=AliasChoices("R2_ACCESS_KEY_ID", "S3_ACCESS_KEY_ID"))
+    s3_secret_access_key: str | None = Field(default=None, validation_alias=AliasChoices("R2_SECRET_ACCESS_KEY", "S3_SECRET_ACCESS_KEY"))
+    s3_bucket_name: str = Field(default="imagestore", validation_alias=AliasChoices("S3_BUCKET_NAME"))
+    s3_endpoint_url: str | None = Field(default=None, validation_alias=AliasChoices("S3_ENDPOINT_URL"))
+    s3_region: str = Field(default="auto", validation_alias=AliasChoices("AWS_REGION"))
+    # Uploads stream in parts of this size (S3 multipart minimum is 5 MB), at most N parts in flight each
+    upload_part_size_mb: int = Field(default=8, ge=5, validation_alias=AliasChoices("UPLOAD_PART_SIZE_MB"))
+    upload_max_concurrency: int = Field(default=4, ge=1, validation_alias=AliasChoices("UPLOAD_MAX_CONCURRENCY"))
+    upload_max_bytes: int = Field(default=20 * 1024 * 1024, validation_alias=AliasChoices("UPLOAD_MAX_BYTES"))
+    storage_io_workers: int = Field(default=8, ge=1, validation_alias=AliasChoices("STORAGE_IO_WORKERS"))
+    # Direct (presigned) uploads: URL lifetime; the local backend accepts the signed PUTs on this path
+    upload_url_expires_seconds: int = Field(default=900, ge=60, validation_alias=AliasChoices("UPLOAD_URL_EXPIRES_SECONDS"))
+    storage_local_upload_path: str = Field(default="/api/v1/uploads/local", validation_alias=AliasChoices("STORAGE_LOCAL_UPLOAD_PATH"))
+
+    # Analytics result cache: entries are keyed per time bucket; stale buckets are served while refreshing
+    analytics_cache_bucket_seconds: int = Field(default=60, validation_alias=AliasChoices("ANALYTICS_CACHE_BUCKET_SECONDS"))
+    analytics_cache_stale_buckets: int = Field(default=1, validation_alias=AliasChoices("ANALYTICS_CACHE_STALE_BUCKETS"))
+
+    # Columnar NumPy snapshots for offline analytics (python -m app.cli build-snapshot)
+    snapshot_dir: str = Field(default="var/snapshots", validation_alias=AliasChoices("SNAPSHOT_DIR"))
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_prefix="",
@@ -0,0 +1,79 @@
+"""Shared worker pools for CPU-bound work kept off request threads."""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.core.config import get_settings
+
+
+_process_pool: ProcessPoolExecutor | None = None
+_hash_pool: ThreadPoolExecutor | None = None
+_io_pool: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def process_pool_size() -> int:
+    return get_settings().process_pool_workers or os.cpu_count() or 1
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Lazily create the per-worker process pool.
+
+    Uses the ``spawn`` start method so children never inherit open DB or Redis
+    sockets from the (threaded) server process.
+    """
+    global _process_pool
+    if _process_pool is None:
+        with _lock:
+            if _process_pool is None:
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=process_pool_size(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _process_pool
+
+
+def get_hash_pool() -> ThreadPoolExecutor:
+    """Bounded threads for bcrypt.
+
+    bcrypt releases the GIL, so threads hash in parallel; the bound keeps a
+    login storm from starving the request threadpool and the event loop.
+    """
+    global _hash_pool
+    if _hash_pool is None:
+        with _lock:
+            if _hash_pool is None:
+                workers = get_settings().password_hash_workers or os.cpu_count() or 1
+                _hash_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+    return _hash_pool
+
+
+def get_io_pool() -> ThreadPoolExecutor:
+    """Threads for blocking object-storage and file I/O (uploads).
+
+    Separate from the request threadpool so slow uploads cannot exhaust it.
+    """
+    global _io_pool
+    if _io_pool is None:
+        with _lock:
+            if _io_pool is None:
+                _io_pool = ThreadPoolExecutor(max_workers=get_settings().storage_io_workers, thread_name_prefix="storage")
+    return _io_pool
+
+
+def shutdown_pools() -> None:
+    global _process_pool, _hash_pool, _io_pool
+    with _lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=False, cancel_futures=True)
+            _hash_pool = None
+        if _io_pool is not None:
+            _io_pool.shutdown(wait=False, cancel_futures=True)
+            _io_pool = None
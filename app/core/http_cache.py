@@ -0,0 +1,92 @@
+"""HTTP validators and ``Cache-Control`` for public GETs.
+
+``conditional("events", validator)`` is a route dependency. ``validator`` is
+itself a dependency returning something small that changes whenever the
+response would (a row's ``updated_at``, counts, a cache version), so the ETag
+is computed without rendering the body. A matching ``If-None-Match`` is
+answered with 304 before the endpoint runs. Policies are configured per
+router in settings as ``"max_age/stale_while_revalidate"`` seconds.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+
+from app.core.config import get_settings
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    name: str
+    max_age: int  # 秒
+    stale_while_revalidate: int = 0  # 过期后仍可先用旧响应、后台再校验的秒数
+
+    @property
+    def header(self) -> str:
+        if self.max_age <= 0:
+            return "no-cache"
+        value = f"public, max-age={self.max_age}"
+        if self.stale_while_revalidate > 0:
+            value += f", stale-while-revalidate={self.stale_while_revalidate}"
+        return value
+
+
+def parse_policy(name: str, spec: str) -> CachePolicy:
+    """``"30/120"`` = fresh for 30s, then served stale for up to 120s while revalidating; ``"0"`` = always revalidate."""
+    parts = [p.strip() for p in spec.split("/")]
+    max_age = int(parts[0])
+    swr = int(parts[1]) if len(parts) > 1 else 0
+    if max_age < 0 or swr < 0:
+        raise ValueError(f"Invalid cache policy for {name}: {spec}")
+    return CachePolicy(name, max_age, swr)
+
+
+@lru_cache(maxsize=1)
+def get_policies() -> Dict[str, CachePolicy]:
+    settings = get_settings()
+    return {
+        "events": parse_policy("events", settings.http_cache_events),
+        "sessions": parse_policy("sessions", settings.http_cache_sessions),
+        "inventory": parse_policy("inventory", settings.http_cache_inventory),
+        "seats": parse_policy("seats", settings.http_cache_seats),
+    }
+
+
+def make_etag(name: str, value: Any) -> str:
+    """Weak ETag: equal validator values mean semantically equal responses, not byte-identical ones."""
+    return 'W/"%s"' % hashlib.sha1(repr((name, value)).encode()).hexdigest()[:20]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match 使用弱比较：忽略 W/ 前缀
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def conditional(policy_name: str, validator: Callable[..., Any]) -> Callable[..., None]:
+    """Dependency adding ``ETag``/``Cache-Control`` from ``validator`` and answering 304.
+
+    ``validator`` may take the route's own parameters; returning ``None``
+    (e.g. the row does not exist) leaves the response untouched.
+    """
+
+    def dependency(request: Request, response: Response, value: Any = Depends(validator)) -> None:
+        if value is None or not get_settings().http_cache_enabled:
+            return
+        policy: Optional[CachePolicy] = get_policies().get(policy_name)
+        if policy is None:
+            return
+        etag = make_etag(policy.name, value)
+        headers = {"ETag": etag, "Cache-Control": policy.header}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return dependency
@@ -0,0 +1,201 @@
+"""Per-minute live sales counters for on-sale dashboards.
+
+Writers bump ``live:{session}:{minute}`` hashes with HINCRBY (fields
+``sold:{type}``, ``rev:{type}``, ``ref:{type}``, ``refamt:{type}``) after their
+transaction commits; readers only ever touch Redis, never MySQL. When Redis is
+unavailable the counters live in process memory instead.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.redis_client import get_redis
+
+
+COUNTER_TTL_SECONDS = 2 * 3600
+MAX_WINDOW_MINUTES = 120
+_FIELDS = ("sold", "rev", "ref", "refamt")
+
+# 进程内回退：(session_id, minute) -> {field: value}
+_local: Dict[Tuple[int, int], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+_local_stock: Dict[int, Dict[int, int]] = defaultdict(dict)
+_local_lock = threading.Lock()
+
+
+def _minute(ts: Optional[float] = None) -> int:
+    return int((ts if ts is not None else time.time()) // 60)
+
+
+def _key(session_id: int, minute: int) -> str:
+    return f"live:{session_id}:{minute}"
+
+
+def _stock_key(session_id: int) -> str:
+    return f"live:{session_id}:stock"
+
+
+def _bump(
+    deltas: Iterable[Tuple[int, int, int, int]],
+    count_field: str,
+    amount_field: str,
+    stock: Optional[Dict[Tuple[int, int], int]] = None,
+) -> None:
+    """deltas: (session_id, ticket_type_id, count, amount)."""
+    acc: Dict[Tuple[int, int], List[int]] = defaultdict(lambda: [0, 0])
+    for sid, tt, count, amount in deltas:
+        slot = acc[(sid, tt)]
+        slot[0] += count
+        slot[1] += int(amount or 0)
+    if not acc and not stock:
+        return
+    minute = _minute()
+    rds = get_redis()
+    if rds:
+        try:
+            pipe = rds.pipeline(transaction=False)
+            for (sid, tt), (count, amount) in acc.items():
+                key = _key(sid, minute)
+                pipe.hincrby(key, f"{count_field}:{tt}", count)
+                if amount:
+                    pipe.hincrby(key, f"{amount_field}:{tt}", amount)
+                pipe.expire(key, COUNTER_TTL_SECONDS)
+            for (sid, tt), available in (stock or {}).items():
+                pipe.hset(_stock_key(sid), str(tt), available)
+                pipe.expire(_stock_key(sid), COUNTER_TTL_SECONDS)
+            pipe.execute()
+            return
+        except Exception:
+            pass
+    with _local_lock:
+        for (sid, tt), (count, amount) in acc.items():
+            bucket = _local[(sid, minute)]
+            bucket[f"{count_field}:{tt}"] += count
+            bucket[f"{amount_field}:{tt}"] += amount
+        for (sid, tt), available in (stock or {}).items():
+            _local_stock[sid][tt] = available
+        # 丢弃超出保留期的分钟桶
+        floor = minute - COUNTER_TTL_SECONDS // 60
+        for k in [k for k in _local if k[1] < floor]:
+            del _local[k]
+
+
+def record_sales(
+    deltas: Iterable[Tuple[int, int, int, int]],
+    stock: Optional[Dict[Tuple[int, int], int]] = None,
+) -> None:
+    """Count committed sales; ``stock`` maps (session, type) to remaining availability.
+
+    Best-effort: a failure here must never fail the purchase that already committed.
+    """
+    try:
+        _bump(deltas, "sold", "rev", stock)
+    except Exception:
+        pass
+
+
+def record_refunds(
+    deltas: Iterable[Tuple[int, int, int, int]],
+    stock: Optional[Dict[Tuple[int, int], int]] = None,
+) -> None:
+    """Count committed refunds; ``stock`` as in ``record_sales`` (best-effort)."""
+    try:
+        _bump(deltas, "ref", "refamt", stock)
+    except Exception:
+        pass
+
+
+def record_stock(stock: Dict[Tuple[int, int], int]) -> None:
+    """Publish availability changed without a sale or refund (released reservations)."""
+    try:
+        _bump((), "sold", "rev", stock)
+    except Exception:
+        pass
+
+
+def _read(session_id: int, minutes: List[int]) -> Tuple[List[Dict[str, int]], Dict[int, int]]:
+    rds = get_redis()
+    if rds:
+        try:
+            pipe = rds.pipeline(transaction=False)
+            for m in minutes:
+                pipe.hgetall(_key(session_id, m))
+            pipe.hgetall(_stock_key(session_id))
+            *raw, raw_stock = pipe.execute()
+            buckets = [{k.decode(): int(v) for k, v in h.items()} for h in raw]
+            return buckets, {int(k): int(v) for k, v in raw_stock.items()}
+        except Exception:
+            pass
+    with _local_lock:
+        buckets = [dict(_local.get((session_id, m), {})) for m in minutes]
+        return buckets, dict(_local_stock.get(session_id, {}))
+
+
+def snapshot(session_id: int, window_minutes: int = 15) -> dict:
+    """Sliding-window sales velocity and estimated sellout for one session."""
+    window_minutes = max(1, min(window_minutes, MAX_WINDOW_MINUTES))
+    now_ts = time.time()
+    current = _minute(now_ts)
+    minutes = list(range(current - window_minutes + 1, current + 1))
+    buckets, stock = _read(session_id, minutes)
+
+    series = []
+    per_type: Dict[int, Dict[str, int]] = defaultdict(lambda: {f: 0 for f in _FIELDS})
+    for m, bucket in zip(minutes, buckets):
+        totals = {f: 0 for f in _FIELDS}
+        for field, value in bucket.items():
+            name, _, tt = field.partition(":")
+            if name not in totals:
+                continue
+            totals[name] += value
+            per_type[int(tt)][name] += value
+        series.append(
+            {
+                "minute": datetime.utcfromtimestamp(m * 60).isoformat(),
+                "sold": totals["sold"],
+                "revenue": totals["rev"],
+                "refunded": totals["ref"],
+                "refundAmount": totals["refamt"],
+            }
+        )
+
+    # 当前分钟只过去了一部分，按实际经过的时间计算速度
+    elapsed = max(1.0, (window_minutes - 1) + (now_ts % 60) / 60.0)
+    now = datetime.utcfromtimestamp(now_ts)
+
+    def estimate(net: int, available: Optional[int]) -> Tuple[float, Optional[str]]:
+        velocity = net / elapsed
+        if available is None or velocity <= 0:
+            return round(velocity, 3), None
+        return round(velocity, 3), (now + timedelta(minutes=available / velocity)).isoformat()
+
+    by_type = {}
+    for tt in sorted(set(per_type) | set(stock)):
+        c = per_type[tt]
+        velocity, sellout = estimate(c["sold"] - c["ref"], stock.get(tt))
+        by_type[str(tt)] = {
+            "sold": c["sold"],
+            "revenue": c["rev"],
+            "refunded": c["ref"],
+            "available": stock.get(tt),
+            "velocityPerMin": velocity,
+            "estimatedSelloutAt": sellout,
+        }
+    net_sold = sum(c["sold"] - c["ref"] for c in per_type.values())
+    velocity, sellout = estimate(net_sold, sum(stock.values()) if stock else None)
+    return {
+        "sessionId": session_id,
+        "windowMinutes": window_minutes,
+        "generatedAt": now.isoformat(),
+        "sold": sum(c["sold"] for c in per_type.values()),
+        "revenue": sum(c["rev"] for c in per_type.values()),
+        "refunded": sum(c["ref"] for c in per_type.values()),
+        "velocityPerMin": velocity,
+        "estimatedSelloutAt": sellout,
+        "byType": by_type,
+        "series": series,
+    }
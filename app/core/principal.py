@@ -0,0 +1,90 @@
+"""Principal cache for authentication.
+
+Decoded JWT payloads are cached by token hash until the token's ``exp``; users
+are cached for a short TTL, keyed by the ``uid`` claim, as detached snapshots
+that each request merges into its own session without a SELECT. Writers that
+change a user (profile, role, credit, deletion) call ``invalidate_user``, which
+reaches every worker through the cache invalidation channel; without Redis
+users are not cached at all, since other workers would never hear about it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Iterable, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import LocalTTLCache, invalidation_channel, on_invalidation, publish_invalidation
+from app.models.user import User
+from app.schemas import auth as auth_svc
+
+
+USER_CACHE_TTL_SECONDS = 30
+_INVALIDATION_NAMESPACE = "principal:users"
+
+_tokens = LocalTTLCache(maxsize=20000)
+_users = LocalTTLCache(maxsize=20000)
+
+
+def decode_token(token: str) -> Optional[dict]:
+    """Verified JWT payload, served from the token LRU after the first decode."""
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _tokens.get(key)
+    if payload is not None:
+        return payload
+    payload = auth_svc.verify_token(token)
+    if not payload:
+        return None
+    ttl = float(payload.get("exp", 0)) - time.time()
+    if ttl > 0:
+        _tokens.set(key, payload, ttl)
+    return payload
+
+
+def _snapshot(user: User) -> User:
+    # 复制已加载的列并转为 detached 状态（保留主键身份），不与任何会话绑定
+    snap = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(snap)
+    return snap
+
+
+def remember_user(user: User) -> None:
+    if invalidation_channel():
+        _users.set(user.id, _snapshot(user), USER_CACHE_TTL_SECONDS)
+
+
+def cached_user(db: Session, user_id: int) -> Optional[User]:
+    """The cached user merged into ``db`` (no SQL), or None on a miss."""
+    snap = _users.get(user_id)
+    if snap is None:
+        return None
+    return db.merge(snap, load=False)
+
+
+def _drop(payload: Optional[str]) -> None:
+    # payload 为逗号分隔的用户 id；None 表示可能漏收了消息，整体清空
+    if payload is None:
+        _users.clear()
+        return
+    for uid in payload.split(","):
+        if uid.isdigit():
+            _users.delete(int(uid))
+
+
+on_invalidation(_INVALIDATION_NAMESPACE, _drop)
+
+
+def invalidate_user(user_id: int) -> None:
+    invalidate_users([user_id])
+
+
+def invalidate_users(user_ids: Iterable[int]) -> None:
+    ids = sorted(set(user_ids))
+    if not ids:
+        return
+    for uid in ids:
+        _users.delete(uid)
+    publish_invalidation(_INVALIDATION_NAMESPACE, ",".join(map(str, ids)))
@@ -0,0 +1,144 @@
+"""Per-route rate limiting.
+
+``rate_limit("purchase")`` is a FastAPI dependency. Callers are keyed by the
+user id in their bearer token, or by client IP when there is none. In Redis
+the check is GCRA, evaluated atomically by one Lua script with Redis' own
+clock. Without Redis each worker falls back to an in-process token bucket.
+Rejections are 429 with ``Retry-After``.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+
+from app.core import principal
+from app.core.cache import LocalTTLCache
+from app.core.config import get_settings
+from app.core.redis_client import get_redis
+
+
+@dataclass(frozen=True)
+class RatePolicy:
+    name: str
+    limit: int  # 每个周期允许的请求数（稳态速率）
+    period: float  # 秒
+    burst: int  # 允许的瞬时突发
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.limit
+
+
+def parse_policy(name: str, spec: str) -> RatePolicy:
+    """``"20/60"`` = 20 requests per 60s; an optional ``"20/60/5"`` sets the burst."""
+    parts = [p.strip() for p in spec.split("/")]
+    limit, period = int(parts[0]), float(parts[1])
+    burst = int(parts[2]) if len(parts) > 2 else limit
+    if limit <= 0 or period <= 0 or burst <= 0:
+        raise ValueError(f"Invalid rate limit for {name}: {spec}")
+    return RatePolicy(name, limit, period, burst)
+
+
+@lru_cache(maxsize=1)
+def get_policies() -> Dict[str, RatePolicy]:
+    settings = get_settings()
+    return {
+        "purchase": parse_policy("purchase", settings.rate_limit_purchase),
+        "login": parse_policy("login", settings.rate_limit_login),
+    }
+
+
+# GCRA：键值为理论到达时间 TAT（毫秒）。返回 {是否放行, 重试等待毫秒, 剩余额度}
+_GCRA_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - burst * interval
+if allow_at > now then
+  return {0, allow_at - now, 0}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+return {1, 0, math.floor((now - allow_at) / interval)}
+"""
+
+_scripts: Dict[int, object] = {}
+_buckets = LocalTTLCache(maxsize=100000)
+_bucket_lock = threading.Lock()
+
+
+def _redis_hit(rds, policy: RatePolicy, ident: str) -> Tuple[bool, float, int]:
+    script = _scripts.get(id(rds))
+    if script is None:
+        script = _scripts[id(rds)] = rds.register_script(_GCRA_LUA)
+    allowed, retry_ms, remaining = script(
+        keys=[f"rl:{policy.name}:{ident}"], args=[policy.interval * 1000.0, policy.burst]
+    )
+    return bool(int(allowed)), float(retry_ms) / 1000.0, int(remaining)
+
+
+def _local_hit(policy: RatePolicy, ident: str) -> Tuple[bool, float, int]:
+    """Token bucket: capacity ``burst``, refilled at ``limit / period`` per second."""
+    key = (policy.name, ident)
+    rate = policy.limit / policy.period
+    now = time.monotonic()
+    with _bucket_lock:
+        tokens, last = _buckets.get(key) or (float(policy.burst), now)
+        tokens = min(float(policy.burst), tokens + (now - last) * rate)
+        if tokens >= 1.0:
+            tokens -= 1.0
+            allowed, retry_after = True, 0.0
+        else:
+            allowed, retry_after = False, (1.0 - tokens) / rate
+        _buckets.set(key, (tokens, now), policy.period * 2)
+    return allowed, retry_after, int(tokens)
+
+
+def hit(policy: RatePolicy, ident: str) -> Tuple[bool, float, int]:
+    """Count one request; returns (allowed, retry_after_seconds, remaining)."""
+    rds = get_redis()
+    if rds:
+        try:
+            return _redis_hit(rds, policy, ident)
+        except Exception:
+            pass  # Redis 异常时退回进程内令牌桶
+    return _local_hit(policy, ident)
+
+
+def client_identity(request: Request) -> str:
+    auth = request.headers.get("authorization", "")
+    if auth[:7].lower() == "bearer ":
+        payload = principal.decode_token(auth[7:].strip())
+        if payload:
+            uid = payload.get("uid")
+            return f"user:{uid}" if uid is not None else f"name:{payload.get('sub')}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def rate_limit(policy_name: str) -> Callable[[Request, Response], None]:
+    """Dependency enforcing the named policy (see ``get_policies``)."""
+
+    def dependency(request: Request, response: Response) -> None:
+        if not get_settings().rate_limit_enabled:
+            return
+        policy: Optional[RatePolicy] = get_policies().get(policy_name)
+        if policy is None:
+            return
+        allowed, retry_after, remaining = hit(policy, client_identity(request))
+        headers = {"X-RateLimit-Limit": str(policy.burst), "X-RateLimit-Remaining": str(max(remaining, 0))}
+        if not allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+            raise HTTPException(status_code=429, detail="Too many requests", headers=headers)
+        response.headers.update(headers)
+
+    return dependency
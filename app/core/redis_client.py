@@ -1,33 +1,51 @@
 from __future__ import annotations
 
-import redis
+import threading
+import time
+from typing import TYPE_CHECKING
 
 from app.core.config import get_settings
 
-_client: redis.Redis | None = None
+if TYPE_CHECKING:
+    import redis
 
+_client: "redis.Redis | None" = None
+# 连接失败后的退避：在 _retry_at 之前直接返回 None，避免每次调用都等待连接超时
+_retry_at = 0.0
+_backoff = 0.0
+_lock = threading.Lock()
 
-def get_redis() -> redis.Redis | None:
-    global _client
+
+def get_redis() -> "redis.Redis | None":
+    global _client, _retry_at, _backoff
     if _client is not None:
         return _client
-    settings = get_settings()
-    try:
-        _client = redis.Redis(
-            host=settings.redis_host,
-            port=settings.redis_port,
-            db=settings.redis_db,
-            password=settings.redis_password or None,
-            socket_timeout=3,
-            socket_connect_timeout=3,
-            health_check_interval=30,
-        )
-        # probe
-        _client.ping()
-        return _client
-    except Exception:
-        # Redis 不可用时返回 None，业务回退到 DB 原子更新
-        _client = None
+    if time.monotonic() < _retry_at:
         return None
+    with _lock:
+        if _client is not None:
+            return _client
+        if time.monotonic() < _retry_at:
+            return None
+        settings = get_settings()
+        try:
+            import redis  # 延迟导入：首次使用时才加载
 
-
+            client = redis.Redis(
+                host=settings.redis_host,
+                port=settings.redis_port,
+                db=settings.redis_db,
+                password=settings.redis_password or None,
+                socket_timeout=3,
+                socket_connect_timeout=3,
+                health_check_interval=30,
+            )
+            # probe
+            client.ping()
+            _client, _backoff = client, 0.0
+            return _client
+        except Exception:
+            # Redis 不可用时返回 None，业务回退到 DB 原子更新
+            _backoff = min(max(_backoff * 2, settings.redis_retry_seconds), 30.0)
+            _retry_at = time.monotonic() + _backoff
+            return None
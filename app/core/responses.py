@@ -0,0 +1,53 @@
+"""JSON responses encoded with orjson.
+
+``ORJSONResponse`` is the application's default response class. Routes with a
+``response_model`` are still validated and serialized by FastAPI/pydantic;
+the class is used for everything else (plain dicts, lists). When orjson is
+not installed it falls back to the stdlib encoder.
+
+``fast_json`` is for large payloads the endpoint builds itself from trusted
+rows (seat maps, ticket lists): they are already in the documented shape, so
+``response_model`` stays on the route for OpenAPI but validation is skipped.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 为可选依赖
+    orjson = None
+
+_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+
+def _default(value: Any) -> Any:
+    # orjson 不认识的类型：pydantic 模型、Decimal 等
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if hasattr(value, "__float__"):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+def fast_json(content: Any, response: Optional[Response] = None, status_code: int = 200) -> ORJSONResponse:
+    """Encode trusted ``content`` directly, bypassing ``response_model`` validation.
+
+    Headers that dependencies set on the injected ``response`` (ETag,
+    rate-limit counters) are carried over, since FastAPI only merges them
+    into responses it builds itself.
+    """
+    out = ORJSONResponse(content, status_code=status_code)
+    if response is not None:
+        out.headers.raw.extend(response.headers.raw)
+    return out
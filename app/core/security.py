@@ -5,7 +5,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
-from app.schemas import auth as auth_svc
+from app.core import principal
 from app import models
 from app.models.enums import UserRole
 
@@ -14,7 +14,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
-    payload = auth_svc.verify_token(token)
+    payload = principal.decode_token(token)
     if not payload or not payload.get("sub"):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -22,9 +22,17 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             headers={"WWW-Authenticate": "Bearer"},
         )
     username = payload["sub"]
+    user_id = payload.get("uid")
+    if user_id is not None:
+        user = principal.cached_user(db, user_id)
+        # 改名后旧令牌失效（与按用户名查找的语义一致）
+        if user is not None and user.username == username:
+            return user
     user = db.query(models.User).filter(models.User.username == username).first()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    if user_id is not None and user.id == user_id:
+        principal.remember_user(user)
     return user
 
 
@@ -3,7 +3,16 @@
 from app.crud import user  # noqa: F401
 from app.crud import ticket  # noqa: F401
 from app.crud import event  # noqa: F401
+from app.crud import event_search  # noqa: F401
+from app.crud import event_detail  # noqa: F401
 from app.crud import inventory  # noqa: F401
 from app.crud import session  # noqa: F401
+from app.crud import checkin  # noqa: F401
+from app.crud import export  # noqa: F401
+from app.crud import refund  # noqa: F401
+from app.crud import cancellation  # noqa: F401
+from app.crud import rollup  # noqa: F401
 
 
+# crud.snapshot is imported on demand (it pulls in numpy)
+from app.crud import user_import  # noqa: F401
@@ -0,0 +1,146 @@
+"""Event cancellation: resumable mass refund of every active ticket of an event."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core import catalog
+from app.crud.refund import RefundedTicket, apply_refund_effects, refunds_committed
+from app.models.cancellation import EventCancellationJob
+from app.models.enums import CancellationJobStatus, EventStatus, RefundStatus, TicketStatus
+from app.models.event import Event
+from app.models.payment import Payment
+from app.models.refund import Refund
+from app.models.session import EventSession
+from app.models.ticket import Ticket
+
+
+CANCELLATION_REASON = "Event cancelled"
+
+
+def get_job(db: Session, event_id: int) -> Optional[EventCancellationJob]:
+    return db.execute(
+        select(EventCancellationJob).where(EventCancellationJob.event_id == event_id)
+    ).scalars().first()
+
+
+def start_event_cancellation(db: Session, event_id: int, requested_by: Optional[int] = None) -> Optional[EventCancellationJob]:
+    """Mark the event cancelled and create (or re-arm) its refund job."""
+    event = db.get(Event, event_id)
+    if not event:
+        return None
+    event.status = EventStatus.cancelled
+    job = get_job(db, event_id)
+    if job is None:
+        job = EventCancellationJob(event_id=event_id, requested_by=requested_by, status=CancellationJobStatus.pending)
+        db.add(job)
+    elif job.status == CancellationJobStatus.failed:
+        job.status = CancellationJobStatus.pending
+        job.error = None
+    db.commit()
+    catalog.invalidate_events()
+    db.refresh(job)
+    return job
+
+
+def _process_chunk(db: Session, job_id: int, chunk_size: int) -> bool:
+    """Refund the next keyset chunk in one transaction; False when nothing is left."""
+    # 锁住 job 行：并发执行的 runner 串行化，且总是读取最新检查点
+    job = db.execute(
+        select(EventCancellationJob)
+        .where(EventCancellationJob.id == job_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one()
+    rows = db.execute(
+        select(Ticket.id, Ticket.user_id, Ticket.session_id, Ticket.ticket_type_id, Ticket.seat_id, Ticket.purchase_time)
+        .where(
+            Ticket.session_id.in_(select(EventSession.id).where(EventSession.event_id == job.event_id)),
+            Ticket.status == TicketStatus.active,
+            Ticket.id > job.last_ticket_id,
+        )
+        .order_by(Ticket.id)
+        .limit(chunk_size)
+        .with_for_update()
+    ).all()
+    if not rows:
+        job.status = CancellationJobStatus.completed
+        db.commit()
+        return False
+
+    ticket_ids = [r.id for r in rows]
+    # 退款金额取最近一条支付记录（与单笔退款申请一致）
+    amounts: Dict[int, int] = {}
+    for tid, amount in db.execute(
+        select(Payment.ticket_id, Payment.amount).where(Payment.ticket_id.in_(ticket_ids)).order_by(Payment.id)
+    ).all():
+        amounts[tid] = int(amount or 0)
+    now = datetime.utcnow()
+    # 已有待审退款申请的票：直接批准该申请，避免之后被重复退款
+    open_requests = {
+        tid: rid
+        for rid, tid in db.execute(
+            select(Refund.id, Refund.ticket_id).where(
+                Refund.ticket_id.in_(ticket_ids), Refund.status == RefundStatus.requested
+            )
+        ).all()
+    }
+    if open_requests:
+        db.execute(
+            update(Refund)
+            .where(Refund.id.in_(list(open_requests.values())))
+            .values(status=RefundStatus.approved, reviewed_by=job.requested_by, refundtime=now)
+        )
+    new_refunds = [
+        {
+            "ticket_id": r.id,
+            "user_id": r.user_id,
+            "amount": amounts.get(r.id, 0),
+            "reason": CANCELLATION_REASON,
+            "status": RefundStatus.approved,
+            "reviewed_by": job.requested_by,
+            "refundtime": now,
+        }
+        for r in rows
+        if r.id not in open_requests
+    ]
+    if new_refunds:
+        db.execute(insert(Refund), new_refunds)
+
+    refunded = [
+        RefundedTicket(r.id, r.user_id, r.session_id, r.ticket_type_id, r.seat_id, amounts.get(r.id, 0), r.purchase_time)
+        for r in rows
+    ]
+    stock = apply_refund_effects(db, refunded)
+    job.last_ticket_id = ticket_ids[-1]
+    job.processed = (job.processed or 0) + len(rows)
+    job.refunded_amount = (job.refunded_amount or 0) + sum(amounts.get(tid, 0) for tid in ticket_ids)
+    job.status = CancellationJobStatus.running
+    db.commit()
+    refunds_committed(refunded, stock)
+    return True
+
+
+def run_event_cancellation(db: Session, job_id: int, chunk_size: int = 1000) -> EventCancellationJob:
+    """Drive a job to completion, committing a checkpoint after every chunk.
+
+    Safe to call again after a crash or restart: it resumes after
+    ``last_ticket_id`` and only ever touches tickets that are still active.
+    """
+    try:
+        while _process_chunk(db, job_id, chunk_size):
+            pass
+    except Exception as e:
+        db.rollback()
+        db.execute(
+            update(EventCancellationJob)
+            .where(EventCancellationJob.id == job_id)
+            .values(status=CancellationJobStatus.failed, error=str(e)[:2000])
+        )
+        db.commit()
+        raise
+    return db.get(EventCancellationJob, job_id)
@@ -0,0 +1,289 @@
+"""Gate check-in: signature verification, duplicate detection, conditional UPDATE."""
+
+from __future__ import annotations
+
+import base64
+import calendar
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core import ticket_token
+from app.core.redis_client import get_redis
+from app.models.enums import TicketStatus
+from app.models.ticket import Ticket
+
+
+# 结果码（闸机端据此显示）
+ADMITTED = "admitted"
+DUPLICATE = "duplicate"
+INVALID = "invalid"
+EXPIRED = "expired"
+WRONG_SESSION = "wrong_session"
+REJECTED = "rejected"
+
+# 离线扫描时间允许超前服务器的时钟偏差（秒），超过即视为伪造/错误时间
+SCAN_CLOCK_SKEW_SECONDS = 60
+
+# Redis 不可用时的进程内去重集合：session_id -> {ticket_id}
+_local_seen: Dict[int, Set[int]] = {}
+_local_lock = threading.Lock()
+
+
+def _seen_key(session_id: int) -> str:
+    return f"checkin:{session_id}"
+
+
+def mark_seen(session_id: int, ticket_id: int, expires_at: int) -> bool:
+    """Record a scan; return False if this ticket was already scanned for the session."""
+    rds = get_redis()
+    if rds:
+        try:
+            pipe = rds.pipeline(transaction=False)
+            pipe.sadd(_seen_key(session_id), ticket_id)
+            pipe.expireat(_seen_key(session_id), max(int(expires_at), int(time.time()) + 60))
+            added, _ = pipe.execute()
+            return bool(added)
+        except Exception:
+            pass
+    with _local_lock:
+        seen = _local_seen.setdefault(session_id, set())
+        if ticket_id in seen:
+            return False
+        seen.add(ticket_id)
+        return True
+
+
+def mark_seen_many(session_id: int, ticket_ids: Iterable[int], expires_at: int) -> None:
+    ids = list(ticket_ids)
+    if not ids:
+        return
+    rds = get_redis()
+    if rds:
+        try:
+            pipe = rds.pipeline(transaction=False)
+            pipe.sadd(_seen_key(session_id), *ids)
+            pipe.expireat(_seen_key(session_id), max(int(expires_at), int(time.time()) + 60))
+            pipe.execute()
+            return
+        except Exception:
+            pass
+    with _local_lock:
+        _local_seen.setdefault(session_id, set()).update(ids)
+
+
+def unmark_seen(session_id: int, ticket_id: int) -> None:
+    rds = get_redis()
+    if rds:
+        try:
+            rds.srem(_seen_key(session_id), ticket_id)
+            return
+        except Exception:
+            pass
+    with _local_lock:
+        _local_seen.get(session_id, set()).discard(ticket_id)
+
+
+def _verify(
+    raw_token: str, session_id: Optional[int], now: Optional[float] = None
+) -> Tuple[Optional[ticket_token.TicketToken], Optional[dict]]:
+    try:
+        claims = ticket_token.decode_token(raw_token, now=now)
+    except ticket_token.ExpiredTicketToken as e:
+        return None, {"result": EXPIRED, "ticket_id": None, "session_id": None, "detail": str(e)}
+    except ticket_token.InvalidTicketToken as e:
+        return None, {"result": INVALID, "ticket_id": None, "session_id": None, "detail": str(e)}
+    if session_id is not None and claims.session_id != session_id:
+        return claims, {
+            "result": WRONG_SESSION,
+            "ticket_id": claims.ticket_id,
+            "session_id": claims.session_id,
+            "detail": "Ticket is for another session",
+        }
+    return claims, None
+
+
+def check_in(db: Session, raw_token: str, session_id: Optional[int] = None) -> dict:
+    """Admit a scanned ticket.
+
+    The token is verified without I/O; the duplicate set answers repeat scans
+    without touching MySQL, and the first scan flips the ticket to ``used``
+    with a single conditional UPDATE.
+    """
+    claims, failure = _verify(raw_token, session_id)
+    if failure:
+        return failure
+    out = {"ticket_id": claims.ticket_id, "session_id": claims.session_id, "detail": None}
+    if not mark_seen(claims.session_id, claims.ticket_id, claims.expires_at):
+        return {**out, "result": DUPLICATE, "detail": "Already checked in"}
+
+    try:
+        res = db.execute(
+            update(Ticket)
+            .where(
+                Ticket.id == claims.ticket_id,
+                Ticket.session_id == claims.session_id,
+                Ticket.status == TicketStatus.active,
+            )
+            .values(status=TicketStatus.used)
+        )
+        db.commit()
+    except Exception:
+        # 写库失败（超时、死锁、断连）：撤销去重标记，否则后续扫码都会被判为重复
+        db.rollback()
+        unmark_seen(claims.session_id, claims.ticket_id)
+        raise
+    if res.rowcount == 1:
+        return {**out, "result": ADMITTED}
+
+    # 罕见路径：票已被使用（其它 worker 先写库）或状态不可入场
+    current = db.execute(select(Ticket.status).where(Ticket.id == claims.ticket_id)).scalar()
+    if current == TicketStatus.used:
+        return {**out, "result": DUPLICATE, "detail": "Already checked in"}
+    unmark_seen(claims.session_id, claims.ticket_id)
+    detail = f"Ticket status is {current.value}" if current is not None else "Ticket not found"
+    return {**out, "result": REJECTED, "detail": detail}
+
+
+# --------- Offline scanners: manifest export & batched scan upload ---------
+def _epoch(dt: Optional[datetime]) -> int:
+    return calendar.timegm(dt.utctimetuple()) if dt else 0
+
+
+def _pack_ids(ids: List[int]) -> str:
+    arr = array("I", ids)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return base64.b64encode(arr.tobytes()).decode("ascii")
+
+
+def build_manifest(db: Session, session_id: int, since: Optional[int] = None) -> dict:
+    """Valid-ticket manifest for a session.
+
+    Without ``since`` the full set of admissible ticket ids is returned as a
+    sorted little-endian uint32 array; with ``since`` only the ids whose state
+    changed at or after that version are returned. ``version`` is the newest
+    ``updated_at`` among the session's tickets, so clients simply echo it back.
+    """
+    latest = db.execute(select(func.max(Ticket.updated_at)).where(Ticket.session_id == session_id)).scalar()
+    version = _epoch(latest)
+    if since is None:
+        ids = list(
+            db.execute(
+                select(Ticket.id)
+                .where(Ticket.session_id == session_id, Ticket.status == TicketStatus.active)
+                .order_by(Ticket.id)
+            ).scalars()
+        )
+        return {"session_id": session_id, "version": version, "count": len(ids), "ids": _pack_ids(ids)}
+
+    # updated_at 为秒级精度，用 >= 覆盖同一秒内的变更（重复下发是幂等的）
+    changed = db.execute(
+        select(Ticket.id, Ticket.status)
+        .where(Ticket.session_id == session_id, Ticket.updated_at >= datetime.utcfromtimestamp(since))
+        .order_by(Ticket.id)
+    ).all()
+    added = [tid for tid, st in changed if st == TicketStatus.active]
+    removed = [tid for tid, st in changed if st != TicketStatus.active]
+    return {
+        "session_id": session_id,
+        "version": max(version, since),
+        "count": len(changed),
+        "delta": {"added": added, "removed": removed},
+    }
+
+
+def _scan_time(value: Optional[datetime]) -> Optional[datetime]:
+    # 设备时间可能带或不带时区：统一为 naive UTC，避免排序时混合比较报错
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def apply_scan_batch(db: Session, scans: List[dict], session_id: Optional[int] = None, chunk_size: int = 1000) -> dict:
+    """Apply offline scan records with set-based UPDATEs.
+
+    Conflicts are resolved earliest-scan-wins inside the batch; against the
+    database the current ticket state wins (a ticket already ``used`` reports
+    ``duplicate``). Rows are locked for the duration of each chunk so online
+    gates and batch uploads cannot both admit the same ticket. Token expiry is
+    checked against ``scanned_at`` when the record has one (scans made offline
+    before expiry stay valid); ``scanned_at`` in the future is ``invalid``.
+    """
+    results: List[Optional[dict]] = [None] * len(scans)
+    winners: Dict[int, Tuple[int, ticket_token.TicketToken]] = {}  # ticket_id -> (scan index, claims)
+    times = [_scan_time(scan.get("scanned_at")) for scan in scans]
+    order = sorted(range(len(scans)), key=lambda i: (times[i] is None, times[i] or datetime.min))
+    latest = time.time() + SCAN_CLOCK_SKEW_SECONDS
+    for i in order:
+        scanned = _epoch(times[i]) if times[i] is not None else None
+        if scanned is not None and scanned > latest:
+            results[i] = {"result": INVALID, "ticket_id": None, "session_id": None, "detail": "scanned_at is in the future"}
+            continue
+        claims, failure = _verify(scans[i]["token"], session_id, now=scanned)
+        if failure:
+            results[i] = failure
+            continue
+        if claims.ticket_id in winners:
+            results[i] = {
+                "result": DUPLICATE,
+                "ticket_id": claims.ticket_id,
+                "session_id": claims.session_id,
+                "detail": "Duplicate scan in batch",
+            }
+            continue
+        winners[claims.ticket_id] = (i, claims)
+
+    admitted: Dict[int, List[int]] = {}  # session_id -> ticket ids
+    expiry: Dict[int, int] = {}
+    ticket_ids = sorted(winners)
+    try:
+        for start in range(0, len(ticket_ids), chunk_size):
+            chunk = ticket_ids[start:start + chunk_size]
+            rows = {
+                tid: (sid, st)
+                for tid, sid, st in db.execute(
+                    select(Ticket.id, Ticket.session_id, Ticket.status).where(Ticket.id.in_(chunk)).with_for_update()
+                ).all()
+            }
+            to_admit = []
+            for tid in chunk:
+                i, claims = winners[tid]
+                out = {"ticket_id": tid, "session_id": claims.session_id, "detail": None}
+                row = rows.get(tid)
+                if row is None or row[0] != claims.session_id:
+                    results[i] = {**out, "result": REJECTED, "detail": "Ticket not found"}
+                elif row[1] == TicketStatus.active:
+                    results[i] = {**out, "result": ADMITTED}
+                    to_admit.append(tid)
+                    admitted.setdefault(claims.session_id, []).append(tid)
+                    expiry[claims.session_id] = max(expiry.get(claims.session_id, 0), claims.expires_at)
+                elif row[1] == TicketStatus.used:
+                    results[i] = {**out, "result": DUPLICATE, "detail": "Already checked in"}
+                else:
+                    results[i] = {**out, "result": REJECTED, "detail": f"Ticket status is {row[1].value}"}
+            if to_admit:
+                db.execute(
+                    update(Ticket)
+                    .where(Ticket.id.in_(to_admit), Ticket.status == TicketStatus.active)
+                    .values(status=TicketStatus.used)
+                )
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # 同步到在线闸机的去重集合
+    for sid, ids in admitted.items():
+        mark_seen_many(sid, ids, expiry[sid])
+
+    summary: Dict[str, int] = {}
+    for r in results:
+        summary[r["result"]] = summary.get(r["result"], 0) + 1
+    return {"results": results, "summary": summary}
@@ -1,6 +1,8 @@
 from typing import List, Optional
 from uuid import uuid4
 
+from app.core import catalog
+from app.crud import event_search
 from app.models.enums import EventStatus
 from sqlalchemy.orm import Session
 from sqlalchemy import select
@@ -29,6 +31,8 @@ def create_event(db: Session, data: EventCreate, cover_image_url: Optional[str]
     db.add(db_event)
     db.commit()
     db.refresh(db_event)
+    catalog.invalidate_events()
+    event_search.event_changed(db_event)
     return db_event
 
 def update_event(db: Session, event_id: int, data: EventUpdate) -> Optional[Event]:
@@ -47,6 +51,8 @@ def update_event(db: Session, event_id: int, data: EventUpdate) -> Optional[Even
         db_event.status = data.status
     db.commit()
     db.refresh(db_event)
+    catalog.invalidate_events()
+    event_search.event_changed(db_event)
     return db_event
 
 def delete_event(db: Session, event_id: int) -> Optional[Event]:
@@ -55,7 +61,10 @@ def delete_event(db: Session, event_id: int) -> Optional[Event]:
         return None
     db.delete(db_event)
     db.commit()
-    return db_event     
+    catalog.invalidate_events()
+    catalog.invalidate_sessions()
+    event_search.event_removed(event_id)
+    return db_event
 
 def publish_event(db: Session, event_id: int)  -> Optional[Event]:
     db_event = get_event(db, event_id)
@@ -64,4 +73,16 @@ def publish_event(db: Session, event_id: int)  -> Optional[Event]:
     db_event.status = EventStatus.published
     db.commit()
     db.refresh(db_event)
-    return db_event
\ No newline at end of file
+    catalog.invalidate_events()
+    event_search.event_changed(db_event)
+    return db_event
+
+def set_cover_image(db: Session, event_id: int, cover_image_url: str) -> Optional[Event]:
+    db_event = get_event(db, event_id)
+    if not db_event:
+        return None
+    db_event.cover_image = cover_image_url
+    db.commit()
+    db.refresh(db_event)
+    catalog.invalidate_events()
+    return db_event
@@ -0,0 +1,104 @@
+"""Everything an event page needs, in one response.
+
+Built with a fixed number of queries regardless of how many sessions or
+ticket types the event has: the event, its sessions, inventory for all
+sessions (``IN``), the ticket types referenced (``IN``) and a seat summary.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.enums import SeatStatus
+from app.models.event import Event
+from app.models.inventory import TicketInventory
+from app.models.seat import Seat
+from app.models.session import EventSession
+from app.models.ticket_type import TicketType
+from app.schemas.event import EventDetail, EventRead
+
+
+def _seat_summary(db: Session, event_id: int) -> Dict[str, int]:
+    now = datetime.utcnow()
+    held = and_(Seat.status == SeatStatus.locked, or_(Seat.locked_until.is_(None), Seat.locked_until >= now))
+    # 过期的锁视为可售
+    free = or_(Seat.status == SeatStatus.available, and_(Seat.status == SeatStatus.locked, Seat.locked_until < now))
+    row = db.execute(
+        select(
+            func.count(Seat.id),
+            func.sum(case((free, 1), else_=0)),
+            func.sum(case((held, 1), else_=0)),
+            func.sum(case((Seat.status == SeatStatus.sold, 1), else_=0)),
+        ).where(or_(Seat.event_id == event_id, Seat.eventid == event_id))
+    ).one()
+    return {"total": int(row[0] or 0), "available": int(row[1] or 0), "locked": int(row[2] or 0), "sold": int(row[3] or 0)}
+
+
+def get_event_detail(db: Session, event_id: int) -> Optional[dict]:
+    """JSON-ready ``EventDetail`` for the event, or ``None`` if it does not exist."""
+    event = db.get(Event, event_id)
+    if event is None:
+        return None
+    sessions = list(
+        db.execute(
+            select(EventSession).where(EventSession.event_id == event_id).order_by(EventSession.sessiontime, EventSession.id)
+        ).scalars()
+    )
+    session_ids = [s.id for s in sessions]
+    inventory = (
+        list(db.execute(select(TicketInventory).where(TicketInventory.session_id.in_(session_ids))).scalars())
+        if session_ids
+        else []
+    )
+    type_ids = {inv.ticket_type_id for inv in inventory}
+    # 票种：挂在该活动上的，或被场次库存引用的
+    type_filter = or_(TicketType.event_id == event_id, TicketType.eventid == event_id)
+    if type_ids:
+        type_filter = or_(type_filter, TicketType.id.in_(type_ids))
+    ticket_types = list(db.execute(select(TicketType).where(type_filter).order_by(TicketType.price, TicketType.id)).scalars())
+    names = {tt.id: tt.name for tt in ticket_types}
+
+    by_session: Dict[int, list] = {sid: [] for sid in session_ids}
+    for inv in sorted(inventory, key=lambda i: (i.price, i.ticket_type_id)):
+        by_session[inv.session_id].append(
+            {
+                "ticket_type_id": inv.ticket_type_id,
+                "ticket_type_name": names.get(inv.ticket_type_id),
+                "price": inv.price,
+                "total": inv.total,
+                "available": inv.available,
+                "sold": max(0, inv.total - inv.available),
+            }
+        )
+    session_items = []
+    for s in sessions:
+        items = by_session[s.id]
+        total = sum(i["total"] for i in items)
+        available = sum(i["available"] for i in items)
+        session_items.append(
+            {
+                "id": s.id,
+                "sessiontime": s.sessiontime,
+                "capacity": s.capacity,
+                "total": total,
+                "available": available,
+                "sold_out": bool(items) and available == 0,
+                "min_price": min((i["price"] for i in items if i["available"] > 0), default=None),
+                "inventory": items,
+            }
+        )
+
+    return EventDetail.model_validate(
+        {
+            "event": EventRead.model_validate(event),
+            "sessions": session_items,
+            "ticket_types": [
+                {"id": tt.id, "name": tt.name, "price": tt.price, "description": tt.description} for tt in ticket_types
+            ],
+            "seats": _seat_summary(db, event_id),
+        }
+    ).model_dump(mode="json")
@@ -0,0 +1,297 @@
+"""Keyword search over events, ranked and cursor-paginated.
+
+On MySQL the ``ft_events_text`` FULLTEXT (ngram) index answers the keyword
+part (created by ``create_all`` or the alembic revision for existing tables;
+checked once per worker). Other databases, or MySQL without the index, use
+a per-worker ``InvertedIndex``: built in a background thread at startup
+(``start_index_build``), updated directly by the event CRUD functions and,
+for changes made by other workers, caught up from ``Event.updated_at`` every
+few seconds. Until the build finishes, searches use a weighted ``LIKE`` scan.
+Deleted events that another worker still has indexed are dropped when
+hydration misses them.
+"""
+
+from __future__ import annotations
+
+import base64
+import heapq
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, inspect, or_, select
+from sqlalchemy.dialects.mysql import match as mysql_match
+from sqlalchemy.orm import Session
+
+from app.models.enums import EventStatus
+from app.models.event import Event
+from app.utils.search_index import InvertedIndex, tokenize
+
+
+logger = logging.getLogger(__name__)
+
+FULLTEXT_INDEX = "ft_events_text"
+FIELD_WEIGHTS = {"name": 3.0, "location": 2.0, "description": 1.0}
+SYNC_INTERVAL_SECONDS = 2.0
+# 长事务可能以较早的 updated_at 晚提交，增量同步时回看一段时间
+_SYNC_OVERLAP = timedelta(seconds=60)
+
+_index = InvertedIndex(FIELD_WEIGHTS)  # 全量构建完成后整体替换
+# 串行化所有写索引的操作（同步、CRUD 钩子），避免旧版本的行覆盖新版本；查询不加此锁
+_index_lock = threading.Lock()
+_state = {"ready": False, "watermark": None, "checked": 0.0, "fulltext": None, "building": False}
+
+# (事件, 分数)；无关键词时分数为 None
+SearchHit = Tuple[Event, Optional[float]]
+
+
+def encode_cursor(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(data, dict) or "i" not in data:
+        raise ValueError("Invalid cursor")
+    return data
+
+
+def _status_value(status) -> str:
+    return status.value if isinstance(status, EventStatus) else str(status)
+
+
+def _index_row(row, index: Optional[InvertedIndex] = None) -> None:
+    (_index if index is None else index).add(
+        row.id,
+        {"name": row.name, "description": row.description, "location": row.location},
+        (_status_value(row.status), row.start_time),
+    )
+
+
+def _rows_stmt():
+    return select(
+        Event.id, Event.name, Event.description, Event.location, Event.status, Event.start_time, Event.updated_at
+    ).execution_options(yield_per=5000)
+
+
+def build_index() -> None:
+    """Full build into a fresh index, swapped in when complete; runs off the request path."""
+    global _index
+    from app.db import session as db_session
+
+    try:
+        with db_session.SessionLocal() as db:
+            if db.get_bind().dialect.name == "mysql" and _has_fulltext(db):
+                return  # 由全文索引检索，无需进程内索引
+            fresh = InvertedIndex(FIELD_WEIGHTS)
+            watermark = None
+            for row in db.execute(_rows_stmt()):
+                _index_row(row, fresh)
+                if watermark is None or row.updated_at > watermark:
+                    watermark = row.updated_at
+        with _index_lock:
+            _index = fresh
+            _state.update(ready=True, watermark=watermark, checked=time.monotonic())
+        logger.info("Event search index built (%d events)", len(fresh))
+    except Exception:
+        logger.exception("Event search index build failed")
+    finally:
+        _state["building"] = False
+
+
+def start_index_build() -> None:
+    """Run ``build_index`` in a daemon thread unless it is running or done (idempotent)."""
+    with _index_lock:
+        if _state["ready"] or _state["building"]:
+            return
+        _state["building"] = True
+    threading.Thread(target=build_index, name="event-search-index", daemon=True).start()
+
+
+def _sync(db: Session) -> None:
+    """Index rows changed since the watermark; skipped while another request is syncing."""
+    if time.monotonic() - _state["checked"] < SYNC_INTERVAL_SECONDS:
+        return
+    if not _index_lock.acquire(blocking=False):
+        return  # 其他请求正在同步，本次沿用当前索引
+    try:
+        if time.monotonic() - _state["checked"] < SYNC_INTERVAL_SECONDS:
+            return
+        watermark = _state["watermark"]
+        stmt = _rows_stmt()
+        if watermark is not None:
+            stmt = stmt.where(Event.updated_at >= watermark - _SYNC_OVERLAP)
+        for row in db.execute(stmt):
+            _index_row(row)
+            if watermark is None or row.updated_at > watermark:
+                watermark = row.updated_at
+        _state.update(watermark=watermark, checked=time.monotonic())
+    finally:
+        _index_lock.release()
+
+
+def event_changed(event: Event) -> None:
+    """Re-index an event after its change was committed (no-op until the index is built)."""
+    with _index_lock:
+        if _state["ready"]:
+            _index_row(event)
+
+
+def event_removed(event_id: int) -> None:
+    with _index_lock:
+        _index.remove(event_id)
+
+
+def _filters(status: Optional[str], starts_after: Optional[datetime], starts_before: Optional[datetime]) -> list:
+    conds = []
+    if status is not None:
+        conds.append(Event.status == status)
+    if starts_after is not None:
+        conds.append(Event.start_time >= starts_after)
+    if starts_before is not None:
+        conds.append(Event.start_time < starts_before)
+    return conds
+
+
+def _browse(db: Session, conds: list, cursor: Optional[dict], limit: int) -> List[SearchHit]:
+    """No keywords: upcoming-first by start time, keyset on (start_time, id)."""
+    stmt = select(Event).where(*conds)
+    if cursor:
+        t = datetime.fromisoformat(cursor["t"])
+        stmt = stmt.where(or_(Event.start_time > t, and_(Event.start_time == t, Event.id > cursor["i"])))
+    stmt = stmt.order_by(Event.start_time, Event.id).limit(limit + 1)
+    return [(e, None) for e in db.execute(stmt).scalars()]
+
+
+def _has_fulltext(db: Session) -> bool:
+    """Whether MySQL has the FULLTEXT index; ``MATCH`` without it fails with error 1191."""
+    if _state["fulltext"] is None:
+        names = {ix["name"] for ix in inspect(db.get_bind()).get_indexes(Event.__tablename__)}
+        _state["fulltext"] = FULLTEXT_INDEX in names
+        if not _state["fulltext"]:
+            logger.warning("%s is missing (run `alembic upgrade head`); using the in-process search index", FULLTEXT_INDEX)
+    return _state["fulltext"]
+
+
+def _fulltext(db: Session, q: str, conds: list, cursor: Optional[dict], limit: int) -> List[SearchHit]:
+    # 分数取 6 位小数作为排序键，保证游标比较稳定
+    score = func.round(mysql_match(Event.name, Event.description, Event.location, against=q), 6)
+    stmt = select(Event, score.label("score")).where(score > 0, *conds)
+    if cursor:
+        stmt = stmt.where(or_(score < cursor["s"], and_(score == cursor["s"], Event.id < cursor["i"])))
+    stmt = stmt.order_by(score.desc(), Event.id.desc()).limit(limit + 1)
+    return [(e, float(s)) for e, s in db.execute(stmt).all()]
+
+
+def _like_scan(db: Session, q: str, conds: list, cursor: Optional[dict], limit: int) -> List[SearchHit]:
+    """Stand-in while the in-process index is being built: field-weighted ``LIKE`` matches.
+
+    Scores are on a different scale than the index's, so a cursor taken here
+    may end pagination early once the index is ready.
+    """
+    terms = set(tokenize(q))
+    if not terms:
+        return []
+    # tokenize 的结果只含字母数字与 CJK，不会出现 LIKE 通配符
+    score = sum(
+        case((getattr(Event, field).ilike(f"%{term}%"), weight), else_=0.0)
+        for term in sorted(terms)
+        for field, weight in FIELD_WEIGHTS.items()
+    )
+    stmt = select(Event, score.label("score")).where(score > 0, *conds)
+    if cursor:
+        stmt = stmt.where(or_(score < cursor["s"], and_(score == cursor["s"], Event.id < cursor["i"])))
+    stmt = stmt.order_by(score.desc(), Event.id.desc()).limit(limit + 1)
+    return [(e, round(float(s), 6)) for e, s in db.execute(stmt).all()]
+
+
+def _in_process(
+    db: Session,
+    q: str,
+    status: Optional[str],
+    starts_after: Optional[datetime],
+    starts_before: Optional[datetime],
+    cursor: Optional[dict],
+    limit: int,
+) -> List[SearchHit]:
+    if not _state["ready"]:
+        start_index_build()
+        return _like_scan(db, q, _filters(status, starts_after, starts_before), cursor, limit)
+    _sync(db)
+    ranked = []
+    for doc_id, s in _index.score(q).items():
+        meta = _index.meta.get(doc_id)
+        if meta is None:
+            continue
+        doc_status, start_time = meta
+        if status is not None and doc_status != status:
+            continue
+        if starts_after is not None and start_time < starts_after:
+            continue
+        if starts_before is not None and start_time >= starts_before:
+            continue
+        s = round(s, 6)
+        if cursor and not (s < cursor["s"] or (s == cursor["s"] and doc_id < cursor["i"])):
+            continue
+        ranked.append((s, doc_id))
+    top = heapq.nsmallest(limit + 1, ranked, key=lambda r: (-r[0], -r[1]))
+    if not top:
+        return []
+    rows = {e.id: e for e in db.execute(select(Event).where(Event.id.in_([i for _, i in top]))).scalars()}
+    hits: List[SearchHit] = []
+    for s, doc_id in top:
+        event = rows.get(doc_id)
+        if event is None:
+            event_removed(doc_id)  # 其他进程已删除
+            continue
+        if (
+            (status is not None and _status_value(event.status) != status)
+            or (starts_after is not None and event.start_time < starts_after)
+            or (starts_before is not None and event.start_time >= starts_before)
+        ):
+            event_changed(event)  # 元数据已过期，刷新后不会再次命中
+            continue
+        hits.append((event, s))
+    if len(hits) < len(top) and len(top) > limit:
+        # 有条目失效，重新取一页（被移除的条目不会再次命中）
+        return _in_process(db, q, status, starts_after, starts_before, cursor, limit)
+    return hits
+
+
+def search_events(
+    db: Session,
+    q: Optional[str] = None,
+    *,
+    status: Optional[str] = None,
+    starts_after: Optional[datetime] = None,
+    starts_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+) -> Tuple[List[SearchHit], Optional[str]]:
+    """One page of hits and the cursor for the next page (``None`` at the end)."""
+    q = (q or "").strip()
+    after = decode_cursor(cursor) if cursor else None
+    if after is not None and ("s" if q else "t") not in after:
+        raise ValueError("Cursor does not belong to this query")
+    conds = _filters(status, starts_after, starts_before)
+    if not q:
+        hits = _browse(db, conds, after, limit)
+    elif db.get_bind().dialect.name == "mysql" and _has_fulltext(db):
+        hits = _fulltext(db, q, conds, after, limit)
+    else:
+        hits = _in_process(db, q, status, starts_after, starts_before, after, limit)
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        last, s = hits[-1]
+        next_cursor = encode_cursor(
+            {"i": last.id, "t": last.start_time.isoformat()} if s is None else {"i": last.id, "s": s}
+        )
+    return hits, next_cursor
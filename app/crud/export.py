@@ -0,0 +1,138 @@
+"""Streaming exports of tickets, payments and refunds for settlement reports."""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Iterator, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.payment import Payment
+from app.models.refund import Refund
+from app.models.session import EventSession
+from app.models.ticket import Ticket
+
+
+EXPORT_KINDS = ("tickets", "payments", "refunds")
+EXPORT_FORMATS = ("csv", "ndjson")
+STREAM_BATCH = 2000
+
+
+def _statement(kind: str, event_id: Optional[int], session_id: Optional[int]):
+    # 只选需要的列（不含二维码 BLOB），不构造 ORM 对象
+    if kind == "tickets":
+        stmt = select(
+            Ticket.id,
+            Ticket.user_id,
+            Ticket.session_id,
+            Ticket.ticket_type_id,
+            Ticket.seat_id,
+            Ticket.status,
+            Ticket.purchase_time,
+            Ticket.created_at,
+        ).order_by(Ticket.id)
+    elif kind == "payments":
+        stmt = (
+            select(
+                Payment.id,
+                Payment.ticket_id,
+                Payment.user_id,
+                Ticket.session_id,
+                Ticket.ticket_type_id,
+                Payment.amount,
+                Payment.paymentmethod.label("payment_method"),
+                Payment.status,
+                Payment.transaction_id,
+                Payment.payment_time,
+                Payment.createdat.label("created_at"),
+            )
+            .join(Ticket, Ticket.id == Payment.ticket_id)
+            .order_by(Payment.id)
+        )
+    elif kind == "refunds":
+        stmt = (
+            select(
+                Refund.id,
+                Refund.ticket_id,
+                Refund.user_id,
+                Ticket.session_id,
+                Ticket.ticket_type_id,
+                Refund.amount,
+                Refund.status,
+                Refund.reason,
+                Refund.reviewed_by,
+                Refund.refundtime,
+                Refund.created_at,
+            )
+            .join(Ticket, Ticket.id == Refund.ticket_id)
+            .order_by(Refund.id)
+        )
+    else:
+        raise ValueError(f"Unknown export kind: {kind}")
+    if session_id is not None:
+        stmt = stmt.where(Ticket.session_id == session_id)
+    if event_id is not None:
+        stmt = stmt.where(Ticket.session_id.in_(select(EventSession.id).where(EventSession.event_id == event_id)))
+    return stmt
+
+
+def _cell(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _encode_csv(rows: List[Sequence]) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerows([_cell(v) for v in row] for row in rows)
+    return buf.getvalue()
+
+
+def _encode_ndjson(header: Sequence[str], rows: List[Sequence]) -> str:
+    return "".join(
+        json.dumps(dict(zip(header, (_cell(v) for v in row))), ensure_ascii=False) + "\n" for row in rows
+    )
+
+
+def stream_export(
+    db: Session,
+    kind: str,
+    fmt: str = "csv",
+    *,
+    event_id: Optional[int] = None,
+    session_id: Optional[int] = None,
+    compress: bool = False,
+) -> Iterator[bytes]:
+    """Yield the export body in chunks.
+
+    Rows come from a server-side cursor (``stream_results``) in partitions of
+    ``STREAM_BATCH``, so memory stays flat no matter how many rows match.
+    """
+    stmt = _statement(kind, event_id, session_id).execution_options(stream_results=True, yield_per=STREAM_BATCH)
+    result = db.execute(stmt)
+    header = list(result.keys())
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def emit(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return gz.compress(data) if gz else data
+
+    try:
+        if fmt == "csv":
+            yield emit(_encode_csv([header]))
+        for rows in result.partitions():
+            out = emit(_encode_csv(rows) if fmt == "csv" else _encode_ndjson(header, rows))
+            if out:  # gzip 可能缓冲而暂无输出
+                yield out
+        if gz:
+            yield gz.flush()
+    finally:
+        result.close()
@@ -1,8 +1,9 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy import select, update
+from sqlalchemy import select, tuple_, update
 from sqlalchemy.orm import Session
 
+from app.core import catalog
 from app.models.inventory import TicketInventory
 from app.schemas.inventory import InventoryCreate, InventoryUpdate
 
@@ -19,6 +20,19 @@ def get_inventory_by_key(db: Session, session_id: int, ticket_type_id: int) -> O
     return db.execute(stmt).scalars().first()
 
 
+def availability(db: Session, keys: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], int]:
+    """``available`` per (session, ticket type), read in the caller's transaction after its UPDATE."""
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+    rows = db.execute(
+        select(TicketInventory.session_id, TicketInventory.ticket_type_id, TicketInventory.available).where(
+            tuple_(TicketInventory.session_id, TicketInventory.ticket_type_id).in_(keys)
+        )
+    )
+    return {(sid, tt): max(0, int(available)) for sid, tt, available in rows}
+
+
 def list_inventory(
     db: Session,
     skip: int = 0,
@@ -49,6 +63,7 @@ def create_inventory(db: Session, data: InventoryCreate) -> TicketInventory:
     db.add(row)
     db.commit()
     db.refresh(row)
+    catalog.invalidate_details()
     return row
 
 
@@ -67,6 +82,7 @@ def update_inventory(db: Session, inventory_id: int, data: InventoryUpdate) -> O
         row.available = max(0, data.available)
     db.commit()
     db.refresh(row)
+    catalog.invalidate_details()
     return row
 
 
@@ -0,0 +1,190 @@
+"""Refund review in bulk: one validation query, aggregated set-based side effects."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core import live_counters, principal
+from app.crud import rollup
+from app.crud.inventory import availability
+from app.models.enums import RefundStatus, SeatStatus, TicketStatus
+from app.models.inventory import TicketInventory
+from app.models.refund import Refund
+from app.models.seat import Seat
+from app.models.ticket import Ticket
+from app.models.user import User
+
+
+class RefundedTicket(NamedTuple):
+    ticket_id: int
+    user_id: int
+    session_id: int
+    ticket_type_id: int
+    seat_id: Optional[int]
+    amount: int
+    purchase_time: Optional[datetime] = None
+
+
+_inventory_tbl = TicketInventory.__table__
+_user_tbl = User.__table__
+
+# executemany：每个 (场次, 票种) / 每个用户只更新一次，增量在应用侧聚合
+_restock_stmt = (
+    update(_inventory_tbl)
+    .where(
+        _inventory_tbl.c.session_id == bindparam("b_session_id"),
+        _inventory_tbl.c.ticket_type_id == bindparam("b_ticket_type_id"),
+    )
+    .values(available=_inventory_tbl.c.available + bindparam("b_count"))
+)
+_credit_stmt = (
+    update(_user_tbl)
+    .where(_user_tbl.c.id == bindparam("b_user_id"))
+    .values(credit=_user_tbl.c.credit + bindparam("b_amount"))
+)
+
+
+def apply_refund_effects(db: Session, tickets: Iterable[RefundedTicket]) -> Dict[Tuple[int, int], int]:
+    """Refund side effects for many tickets at once (caller commits).
+
+    Tickets flip to ``refunded`` and seats are released with one UPDATE each;
+    inventory and credit increments are summed per (session, ticket_type) and
+    per user so every hot row is written exactly once. Returns the restocked
+    availability for ``refunds_committed``.
+    """
+    tickets = list(tickets)
+    if not tickets:
+        return {}
+    restock: Dict[Tuple[int, int], int] = defaultdict(int)
+    credits: Dict[int, int] = defaultdict(int)
+    seat_ids: List[int] = []
+    for t in tickets:
+        restock[(t.session_id, t.ticket_type_id)] += 1
+        credits[t.user_id] += int(t.amount or 0)
+        if t.seat_id is not None:
+            seat_ids.append(t.seat_id)
+
+    db.execute(
+        update(Ticket).where(Ticket.id.in_([t.ticket_id for t in tickets])).values(status=TicketStatus.refunded)
+    )
+    db.execute(
+        _restock_stmt,
+        [{"b_session_id": s, "b_ticket_type_id": tt, "b_count": n} for (s, tt), n in restock.items()],
+    )
+    if seat_ids:
+        db.execute(
+            update(Seat).where(Seat.id.in_(seat_ids)).values(status=SeatStatus.available, locked_until=None)
+        )
+    credit_rows = [{"b_user_id": uid, "b_amount": amt} for uid, amt in credits.items() if amt]
+    if credit_rows:
+        db.execute(_credit_stmt, credit_rows)
+    rollup.record_refunds(
+        db, (rollup.RollupDelta(t.purchase_time, t.session_id, t.ticket_type_id, 1, t.amount) for t in tickets)
+    )
+    # 库存行已被本事务的 UPDATE 锁住，读回的即提交后的可售数
+    return availability(db, restock)
+
+
+def refunds_committed(tickets: Iterable[RefundedTicket], stock: Optional[Dict[Tuple[int, int], int]] = None) -> None:
+    """Post-commit hooks: live per-minute counters (and stock) and cached principals (credit changed)."""
+    tickets = list(tickets)
+    live_counters.record_refunds([(t.session_id, t.ticket_type_id, 1, t.amount) for t in tickets], stock)
+    principal.invalidate_users({t.user_id for t in tickets})
+
+
+def review_refunds(
+    db: Session,
+    refund_ids: List[int],
+    *,
+    approve: bool,
+    reviewer_id: int,
+    chunk_size: int = 500,
+) -> List[dict]:
+    """Approve or reject many refund requests, committing every ``chunk_size``.
+
+    All ids are validated with one joined query; each chunk then re-locks its
+    still-requested rows, applies the aggregated effects and commits. Returns
+    one ``{"id", "result", "detail"}`` entry per requested id, in input order.
+    """
+    ids = list(dict.fromkeys(refund_ids))
+    rows = {
+        r.id: r
+        for r in db.execute(
+            select(
+                Refund.id,
+                Refund.status,
+                Refund.amount,
+                Ticket.id.label("ticket_id"),
+                Ticket.user_id,
+                Ticket.session_id,
+                Ticket.ticket_type_id,
+                Ticket.seat_id,
+                Ticket.purchase_time,
+            )
+            .outerjoin(Ticket, Ticket.id == Refund.ticket_id)
+            .where(Refund.id.in_(ids))
+        ).all()
+    }
+    results: Dict[int, dict] = {}
+    pending: List[int] = []
+    for rid in ids:
+        row = rows.get(rid)
+        if row is None:
+            results[rid] = {"id": rid, "result": "not_found", "detail": "Refund not found"}
+        elif row.status != RefundStatus.requested:
+            results[rid] = {"id": rid, "result": "conflict", "detail": "Refund not in request state"}
+        elif approve and row.ticket_id is None:
+            results[rid] = {"id": rid, "result": "not_found", "detail": "Ticket not found"}
+        else:
+            pending.append(rid)
+
+    new_status = RefundStatus.approved if approve else RefundStatus.rejected
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        try:
+            # 行锁 + 二次校验，防止与单笔审批并发重复退款
+            locked = set(
+                db.execute(
+                    select(Refund.id)
+                    .where(Refund.id.in_(chunk), Refund.status == RefundStatus.requested)
+                    .with_for_update()
+                ).scalars()
+            )
+            values = {"status": new_status, "reviewed_by": reviewer_id}
+            refunded: List[RefundedTicket] = []
+            stock: Dict[Tuple[int, int], int] = {}
+            if approve:
+                values["refundtime"] = func.now()
+                refunded = [
+                    RefundedTicket(
+                        rows[rid].ticket_id,
+                        rows[rid].user_id,
+                        rows[rid].session_id,
+                        rows[rid].ticket_type_id,
+                        rows[rid].seat_id,
+                        int(rows[rid].amount or 0),
+                        rows[rid].purchase_time,
+                    )
+                    for rid in chunk
+                    if rid in locked
+                ]
+                stock = apply_refund_effects(db, refunded)
+            if locked:
+                db.execute(update(Refund).where(Refund.id.in_(locked)).values(**values))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        refunds_committed(refunded, stock)
+        for rid in chunk:
+            if rid in locked:
+                results[rid] = {"id": rid, "result": new_status.value, "detail": None}
+            else:
+                results[rid] = {"id": rid, "result": "conflict", "detail": "Refund not in request state"}
+    return [results[rid] for rid in ids]
@@ -0,0 +1,166 @@
+"""Incrementally maintained hourly sales rollups.
+
+Writers call ``record_sales`` / ``record_refunds`` inside their own
+transaction, so a rollup row never disagrees with the tickets it counts.
+``rebuild`` recomputes everything from history.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.models.enums import PaymentStatus, RefundStatus
+from app.models.payment import Payment
+from app.models.refund import Refund
+from app.models.rollup import SalesRollup
+from app.models.session import EventSession
+from app.models.ticket import Ticket
+
+
+class RollupDelta(NamedTuple):
+    purchase_time: Optional[datetime]
+    session_id: int
+    ticket_type_id: int
+    count: int = 1
+    amount: int = 0
+
+
+_Key = Tuple[datetime, int, int]
+_COUNTERS = ("sold_count", "revenue", "refund_count", "refund_amount")
+
+
+def hour_bucket(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def _aggregate(deltas: Iterable[RollupDelta]) -> Dict[_Key, List[int]]:
+    acc: Dict[_Key, List[int]] = defaultdict(lambda: [0, 0])
+    for d in deltas:
+        if d.purchase_time is None:
+            continue  # 未成交（无购买时间）的票不计入销售
+        slot = acc[(hour_bucket(d.purchase_time), d.session_id, d.ticket_type_id)]
+        slot[0] += d.count
+        slot[1] += int(d.amount or 0)
+    return acc
+
+
+def _event_ids(db: Session, session_ids: Iterable[int]) -> Dict[int, int]:
+    ids = list(set(session_ids))
+    if not ids:
+        return {}
+    return dict(db.execute(select(EventSession.id, EventSession.event_id).where(EventSession.id.in_(ids))).all())
+
+
+def _upsert(db: Session, rows: List[dict]) -> None:
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql_insert(SalesRollup)
+        stmt = stmt.on_duplicate_key_update(
+            {c: getattr(SalesRollup, c) + getattr(stmt.inserted, c) for c in _COUNTERS}
+        )
+        db.execute(stmt, rows)
+        return
+    # 其它方言（开发/测试用 SQLite 等）：先加后插
+    for row in rows:
+        res = db.execute(
+            update(SalesRollup)
+            .where(
+                SalesRollup.bucket == row["bucket"],
+                SalesRollup.session_id == row["session_id"],
+                SalesRollup.ticket_type_id == row["ticket_type_id"],
+            )
+            .values({c: getattr(SalesRollup, c) + row[c] for c in _COUNTERS})
+        )
+        if res.rowcount == 0:
+            db.execute(insert(SalesRollup), [row])
+
+
+def _record(db: Session, deltas: Iterable[RollupDelta], count_col: str, amount_col: str) -> None:
+    acc = _aggregate(deltas)
+    if not acc:
+        return
+    events = _event_ids(db, (sid for _, sid, _ in acc))
+    rows = []
+    for (bucket, sid, tt), (count, amount) in acc.items():
+        row = {
+            "bucket": bucket,
+            "event_id": events.get(sid, 0),
+            "session_id": sid,
+            "ticket_type_id": tt,
+            **{c: 0 for c in _COUNTERS},
+        }
+        row[count_col] = count
+        row[amount_col] = amount
+        rows.append(row)
+    _upsert(db, rows)
+
+
+def record_sales(db: Session, deltas: Iterable[RollupDelta]) -> None:
+    """Add sold tickets / revenue (caller commits)."""
+    _record(db, deltas, "sold_count", "revenue")
+
+
+def record_refunds(db: Session, deltas: Iterable[RollupDelta]) -> None:
+    """Add refunded tickets / amounts against their purchase hour (caller commits)."""
+    _record(db, deltas, "refund_count", "refund_amount")
+
+
+def rebuild(db: Session, batch: int = 5000) -> int:
+    """Recompute all rollups from tickets, payments and refunds; returns row count."""
+    paid = (
+        select(Payment.ticket_id, func.sum(Payment.amount).label("amount"))
+        .where(Payment.status == PaymentStatus.paid)
+        .group_by(Payment.ticket_id)
+        .subquery()
+    )
+    sales = db.execute(
+        select(Ticket.purchase_time, Ticket.session_id, Ticket.ticket_type_id, func.coalesce(paid.c.amount, 0))
+        .outerjoin(paid, paid.c.ticket_id == Ticket.id)
+        .where(Ticket.purchase_time.isnot(None))
+        .execution_options(stream_results=True, yield_per=batch)
+    )
+    sold = _aggregate(RollupDelta(pt, sid, tt, 1, amt) for pt, sid, tt, amt in sales)
+    refunds = db.execute(
+        select(Ticket.purchase_time, Ticket.session_id, Ticket.ticket_type_id, Refund.amount)
+        .join(Ticket, Ticket.id == Refund.ticket_id)
+        .where(Refund.status.in_([RefundStatus.approved, RefundStatus.completed]))
+        .execution_options(stream_results=True, yield_per=batch)
+    )
+    refunded = _aggregate(RollupDelta(pt, sid, tt, 1, amt) for pt, sid, tt, amt in refunds)
+
+    keys = set(sold) | set(refunded)
+    events = _event_ids(db, (sid for _, sid, _ in keys))
+    rows = []
+    for key in keys:
+        bucket, sid, tt = key
+        sold_count, revenue = sold.get(key, (0, 0))
+        refund_count, refund_amount = refunded.get(key, (0, 0))
+        rows.append(
+            {
+                "bucket": bucket,
+                "event_id": events.get(sid, 0),
+                "session_id": sid,
+                "ticket_type_id": tt,
+                "sold_count": sold_count,
+                "revenue": revenue,
+                "refund_count": refund_count,
+                "refund_amount": refund_amount,
+            }
+        )
+    try:
+        db.execute(delete(SalesRollup))
+        for start in range(0, len(rows), batch):
+            db.execute(insert(SalesRollup), rows[start:start + batch])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
@@ -3,6 +3,7 @@ from typing import List, Optional
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core import catalog
 from app.models.session import EventSession
 from app.schemas.session import SessionCreate, SessionUpdate
 
@@ -24,6 +25,7 @@ def create_session(db: Session, data: SessionCreate) -> EventSession:
     db.add(row)
     db.commit()
     db.refresh(row)
+    catalog.invalidate_sessions()
     return row
 
 
@@ -37,6 +39,7 @@ def update_session(db: Session, session_id: int, data: SessionUpdate) -> Optiona
         row.capacity = data.capacity
     db.commit()
     db.refresh(row)
+    catalog.invalidate_sessions()
     return row
 
 
@@ -46,6 +49,7 @@ def delete_session(db: Session, session_id: int) -> Optional[EventSession]:
         return None
     db.delete(row)
     db.commit()
+    catalog.invalidate_sessions()
     return row
 
 
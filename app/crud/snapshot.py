@@ -0,0 +1,184 @@
+"""Export tickets, payments and refunds into columnar NumPy snapshots.
+
+Each table becomes one ``.npy`` file per column (fixed-width ints, enums as
+int8 codes, timestamps as epoch seconds, ``-1`` for NULL) plus a
+``manifest.json``. ``app.utils.snapshot`` memory-maps them for analytics.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+from uuid import uuid4
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.enums import PaymentMethod, PaymentStatus, RefundStatus, TicketStatus
+from app.models.payment import Payment
+from app.models.refund import Refund
+from app.models.session import EventSession
+from app.models.ticket import Ticket
+
+
+CURRENT_POINTER = "CURRENT"
+KEEP_SNAPSHOTS = 2
+_EPOCH = datetime(1970, 1, 1)
+
+# (列名, dtype, SQL 表达式, 编码方式：None=整数 / "ts"=时间戳 / Enum 类=枚举码)
+_Column = Tuple[str, str, object, object]
+
+_TABLES: Dict[str, Tuple[object, Sequence[_Column]]] = {
+    "tickets": (
+        Ticket.id,
+        (
+            ("id", "int64", Ticket.id, None),
+            ("event_id", "int32", func.coalesce(EventSession.event_id, 0), None),
+            ("session_id", "int32", Ticket.session_id, None),
+            ("ticket_type_id", "int32", Ticket.ticket_type_id, None),
+            ("user_id", "int32", Ticket.user_id, None),
+            ("status", "int8", Ticket.status, TicketStatus),
+            ("purchase_ts", "int64", Ticket.purchase_time, "ts"),
+            ("created_ts", "int64", Ticket.created_at, "ts"),
+        ),
+    ),
+    "payments": (
+        Payment.id,
+        (
+            ("id", "int64", Payment.id, None),
+            ("ticket_id", "int64", Payment.ticket_id, None),
+            ("event_id", "int32", func.coalesce(EventSession.event_id, 0), None),
+            ("session_id", "int32", func.coalesce(Ticket.session_id, 0), None),
+            ("ticket_type_id", "int32", func.coalesce(Ticket.ticket_type_id, 0), None),
+            ("user_id", "int32", Payment.user_id, None),
+            ("amount", "int64", Payment.amount, None),
+            ("method", "int8", Payment.paymentmethod, PaymentMethod),
+            ("status", "int8", Payment.status, PaymentStatus),
+            ("paid_ts", "int64", Payment.payment_time, "ts"),
+        ),
+    ),
+    "refunds": (
+        Refund.id,
+        (
+            ("id", "int64", Refund.id, None),
+            ("ticket_id", "int64", Refund.ticket_id, None),
+            ("event_id", "int32", func.coalesce(EventSession.event_id, 0), None),
+            ("session_id", "int32", func.coalesce(Ticket.session_id, 0), None),
+            ("ticket_type_id", "int32", func.coalesce(Ticket.ticket_type_id, 0), None),
+            ("user_id", "int32", Refund.user_id, None),
+            ("amount", "int64", Refund.amount, None),
+            ("status", "int8", Refund.status, RefundStatus),
+            ("refund_ts", "int64", Refund.refundtime, "ts"),
+            ("created_ts", "int64", Refund.created_at, "ts"),
+        ),
+    ),
+}
+
+
+def _statement(table: str, max_id: int):
+    pk, columns = _TABLES[table]
+    stmt = select(*[expr.label(name) for name, _, expr, _ in columns])
+    if table == "tickets":
+        stmt = stmt.select_from(Ticket)
+    else:
+        model = Payment if table == "payments" else Refund
+        stmt = stmt.select_from(model).outerjoin(Ticket, Ticket.id == model.ticket_id)
+    return (
+        stmt.outerjoin(EventSession, EventSession.id == Ticket.session_id)
+        .where(pk <= max_id)
+        .order_by(pk)
+    )
+
+
+def _encoder(kind):
+    if kind == "ts":
+        return lambda v: -1 if v is None else int((v - _EPOCH).total_seconds())
+    if isinstance(kind, type) and issubclass(kind, Enum):
+        codes = {member: i for i, member in enumerate(kind)}
+        codes.update({member.value: i for i, member in enumerate(kind)})
+        return lambda v: codes.get(v, -1)
+    return lambda v: -1 if v is None else int(v)
+
+
+def _export_table(db: Session, table: str, out: Path, batch: int) -> int:
+    pk, columns = _TABLES[table]
+    # 以导出开始时的最大主键为界，行数与数组长度一致
+    max_id = db.execute(select(func.coalesce(func.max(pk), 0))).scalar()
+    expected = db.execute(select(func.count()).select_from(pk.class_).where(pk <= max_id)).scalar()
+    arrays = {
+        name: np.lib.format.open_memmap(out / f"{table}.{name}.npy", mode="w+", dtype=dtype, shape=(expected,))
+        for name, dtype, _, _ in columns
+    }
+    encoders = [_encoder(kind) for _, _, _, kind in columns]
+    written = 0
+    result = db.execute(_statement(table, max_id).execution_options(stream_results=True, yield_per=batch))
+    try:
+        for rows in result.partitions():
+            n = min(len(rows), expected - written)
+            if n <= 0:
+                break
+            for i, (name, dtype, _, _) in enumerate(columns):
+                enc = encoders[i]
+                arrays[name][written:written + n] = np.fromiter((enc(r[i]) for r in rows[:n]), dtype=dtype, count=n)
+            written += n
+    finally:
+        result.close()
+    for arr in arrays.values():
+        arr.flush()
+    return written
+
+
+def build_snapshot(db: Session, directory: str, batch: int = 20000) -> dict:
+    """Write a new snapshot under ``directory`` and point ``CURRENT`` at it.
+
+    The snapshot is written to a temporary directory and renamed into place,
+    so readers only ever see complete snapshots. Returns the manifest.
+    """
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    name = f"snap-{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid4().hex[:8]}"
+    tmp = root / f"{name}.tmp"
+    tmp.mkdir()
+    try:
+        tables: Dict[str, dict] = {}
+        for table, (_, columns) in _TABLES.items():
+            rows = _export_table(db, table, tmp, batch)
+            tables[table] = {"rows": rows, "columns": {c: dtype for c, dtype, _, _ in columns}}
+        manifest = {
+            "name": name,
+            "created_at": datetime.utcnow().isoformat(),
+            "tables": tables,
+            "enums": {
+                f"{table}.{c}": [m.value for m in kind]
+                for table, (_, columns) in _TABLES.items()
+                for c, _, _, kind in columns
+                if isinstance(kind, type) and issubclass(kind, Enum)
+            },
+        }
+        (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2))
+        tmp.rename(root / name)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    pointer = root / f"{CURRENT_POINTER}.tmp"
+    pointer.write_text(name)
+    os.replace(pointer, root / CURRENT_POINTER)
+    _prune(root, keep=name)
+    return manifest
+
+
+def _prune(root: Path, keep: str) -> None:
+    snaps: List[Path] = sorted(
+        (p for p in root.glob("snap-*") if p.is_dir() and not p.name.endswith(".tmp")),
+        key=lambda p: p.stat().st_mtime,
+    )
+    # 保留最近几份（读者可能仍映射着旧快照）
+    for old in [p for p in snaps if p.name != keep][: max(0, len(snaps) - KEEP_SNAPSHOTS)]:
+        shutil.rmtree(old, ignore_errors=True)
@@ -1,8 +1,9 @@
-from typing import List, Optional
+from functools import partial
+from typing import Iterator, List, Optional
 from uuid import uuid4
 
 from sqlalchemy.orm import Session
-from sqlalchemy import select, update, text
+from sqlalchemy import insert, select, update, text
 from sqlalchemy.sql import func
 
 from app.models.ticket import Ticket
@@ -18,12 +19,24 @@ from app.models.enums import SeatStatus
 from app.models.payment import Payment
 from app.models.enums import PaymentMethod, PaymentStatus
 from app.core.redis_client import get_redis
+from app.core import live_counters, principal, ticket_token
+from app.core.executors import get_process_pool, process_pool_size
+from app.crud import rollup
+from app.crud.inventory import availability
 
 
-def generate_qr_code() -> bytes:
-    unique = uuid4().hex
-    # 模拟验证链接内容，扫描后会看到这个 URL（无需真实可访问）
-    content = f"https://mock-verify.local/qr/{unique}"
+# 批量出票固定掩码，跳过 8 种掩码的评分搜索（任一掩码均符合规范）
+BULK_QR_MASK = 0
+
+
+def generate_qr_code(db: Session, ticket: Ticket) -> bytes:
+    """Render the QR PNG carrying a signed token for an already-flushed ticket."""
+    sessiontime = db.execute(
+        select(EventSession.sessiontime).where(EventSession.id == ticket.session_id)
+    ).scalar()
+    expires_at = ticket_token.expiry_for_session(sessiontime)
+    # 扫码内容为带 HMAC 签名的验证链接，闸机可离线校验
+    content = ticket_token.qr_content(ticket.id, ticket.session_id, expires_at)
     return generate_qr_png_bytes(content)
 
 
@@ -43,14 +56,123 @@ def create_ticket(db: Session, data: TicketCreate) -> Ticket:
         user_id=data.user_id,
         seat_id=data.seat_id,
         status=TicketStatus.pending,
-        qr_code=generate_qr_code(),  # 存为 PNG 二进制
+        qr_code=b"",  # 取得 ID 后再生成签名二维码
     )
     db.add(db_ticket)
+    db.flush()
+    db_ticket.qr_code = generate_qr_code(db, db_ticket)  # 存为 PNG 二进制
     db.commit()
     db.refresh(db_ticket)
     return db_ticket
 
 
+def reserve_inventory(db: Session, session_id: int, ticket_type_id: int, quantity: int) -> bool:
+    """Take ``quantity`` units from inventory in one conditional UPDATE."""
+    res = db.execute(
+        update(TicketInventory)
+        .where(
+            TicketInventory.session_id == session_id,
+            TicketInventory.ticket_type_id == ticket_type_id,
+            TicketInventory.available >= quantity,
+        )
+        .values(available=TicketInventory.available - quantity)
+    )
+    if res.rowcount != 1:
+        db.rollback()
+        return False
+    stock = availability(db, [(session_id, ticket_type_id)])
+    db.commit()
+    live_counters.record_stock(stock)
+    return True
+
+
+def release_inventory(db: Session, session_id: int, ticket_type_id: int, quantity: int) -> None:
+    """Return ``quantity`` reserved units that were not issued."""
+    if quantity <= 0:
+        return
+    db.execute(
+        update(TicketInventory)
+        .where(
+            TicketInventory.session_id == session_id,
+            TicketInventory.ticket_type_id == ticket_type_id,
+        )
+        .values(available=TicketInventory.available + quantity)
+    )
+    stock = availability(db, [(session_id, ticket_type_id)])
+    db.commit()
+    live_counters.record_stock(stock)
+
+
+def issue_tickets_bulk(
+    db: Session,
+    *,
+    session_id: int,
+    ticket_type_id: int,
+    user_id: int,
+    quantity: int,
+    chunk_size: int = 1000,
+) -> Iterator[dict]:
+    """Issue ``quantity`` active tickets whose inventory was already reserved.
+
+    Each chunk is inserted with one executemany, its ids are read back by a
+    per-chunk marker, QR PNGs are rendered in the process pool and written back
+    with a bulk UPDATE by primary key. Yields a progress dict after every
+    committed chunk. The caller owns the reservation: if this raises or is
+    closed early, it must ``release_inventory`` the part not yet reported as
+    issued.
+    """
+    sessiontime = db.execute(select(EventSession.sessiontime).where(EventSession.id == session_id)).scalar()
+    expires_at = ticket_token.expiry_for_session(sessiontime)
+    batch = uuid4().hex
+    pool = get_process_pool()
+    issued = 0
+    try:
+        for index, start in enumerate(range(0, quantity, chunk_size)):
+            size = min(chunk_size, quantity - start)
+            marker = f"pending:{batch}:{index}".encode("ascii")
+            floor_id = db.execute(select(func.coalesce(func.max(Ticket.id), 0))).scalar()
+            # 与单张购票（purchase_time=func.now()）同一时钟：汇总与快照按 purchase_time 分桶
+            now = db.execute(select(func.now())).scalar_one()
+            db.execute(
+                insert(Ticket),
+                [
+                    {
+                        "ticket_type_id": ticket_type_id,
+                        "session_id": session_id,
+                        "user_id": user_id,
+                        "status": TicketStatus.active,
+                        "qr_code": marker,
+                        "purchase_time": now,
+                    }
+                    for _ in range(size)
+                ],
+            )
+            # 主键范围 + 标记取回本批 ID（MySQL executemany 不返回自增主键）
+            ids = list(
+                db.execute(
+                    select(Ticket.id).where(Ticket.id > floor_id, Ticket.qr_code == marker).order_by(Ticket.id)
+                ).scalars()
+            )
+            if len(ids) != size:
+                raise RuntimeError(f"Bulk chunk {index} read back {len(ids)} of {size} tickets")
+            contents = [ticket_token.qr_content(tid, session_id, expires_at) for tid in ids]
+            pngs = pool.map(
+                partial(generate_qr_png_bytes, mask_pattern=BULK_QR_MASK),
+                contents,
+                chunksize=max(1, len(contents) // (process_pool_size() * 4)),
+            )
+            db.execute(update(Ticket), [{"id": tid, "qr_code": png} for tid, png in zip(ids, pngs)])
+            rollup.record_sales(db, [rollup.RollupDelta(now, session_id, ticket_type_id, len(ids), 0)])
+            stock = availability(db, [(session_id, ticket_type_id)])
+            db.commit()
+            live_counters.record_sales([(session_id, ticket_type_id, len(ids), 0)], stock=stock)
+            issued += len(ids)
+            yield {"issued": issued, "total": quantity, "first_id": ids[0], "last_id": ids[-1]}
+    except Exception:
+        db.rollback()
+        raise
+
+
 def update_ticket(db: Session, ticket_id: int, data: TicketUpdate) -> Optional[Ticket]:
     db_ticket = get_ticket(db, ticket_id)
     if not db_ticket:
@@ -168,6 +290,13 @@ def purchase_ticket_with_credit(
         )
         if inv_res.rowcount != 1:
             raise RuntimeError("Out of stock")
+        # 扣减后在同一事务内读回（行锁仍由本事务持有），发布的是本次购买后的真实余量
+        available_after = db.execute(
+            select(TicketInventory.available).where(
+                TicketInventory.session_id == session_id,
+                TicketInventory.ticket_type_id == ticket_type_id,
+            )
+        ).scalar_one()
 
         # 2) 扣减用户积分（仅当 credit >= price）
         credit_res = db.execute(
@@ -186,13 +315,14 @@ def purchase_ticket_with_credit(
             user_id=user_id,
             seat_id=seat_id,
             status=TicketStatus.active,
-            qr_code=generate_qr_code(),
+            qr_code=b"",
             purchase_time=func.now(),
         )
         db.add(db_ticket)
         # 刷新以取回 ID
         db.flush()
         db.refresh(db_ticket)
+        db_ticket.qr_code = generate_qr_code(db, db_ticket)
 
         # 3.5) 记录支付
         payment = Payment(
@@ -205,6 +335,7 @@ def purchase_ticket_with_credit(
             payment_time=func.now(),
         )
         db.add(payment)
+        rollup.record_sales(db, [rollup.RollupDelta(db_ticket.purchase_time, session_id, ticket_type_id, 1, price)])
 
         # 4) If seat locked earlier, mark as sold
         if seat_id is not None:
@@ -215,6 +346,11 @@ def purchase_ticket_with_credit(
             )
 
         db.commit()
+        principal.invalidate_user(user_id)
+        live_counters.record_sales(
+            [(session_id, ticket_type_id, 1, price)],
+            stock={(session_id, ticket_type_id): max(0, int(available_after))},
+        )
         return db_ticket
     except Exception:
         db.rollback()
@@ -2,6 +2,7 @@ from typing import List, Optional
 
 from sqlalchemy.orm import Session
 
+from app.core import principal
 from app.models.user import User, DEFAULT_AVATAR
 from app.schemas.user import UserCreate, UserUpdate
 
@@ -49,6 +50,7 @@ def update_user(db: Session, user_id: int, user: UserUpdate) -> Optional[User]:
         db_user.avatar = user.avatar
 
     db.commit()
+    principal.invalidate_user(user_id)
     db.refresh(db_user)
     return db_user
 
@@ -59,6 +61,7 @@ def delete_user(db: Session, user_id: int) -> Optional[User]:
         return None
     db.delete(db_user)
     db.commit()
+    principal.invalidate_user(user_id)
     return db_user
 
 
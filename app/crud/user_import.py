@@ -0,0 +1,164 @@
+"""Streaming bulk user import (partner member lists).
+
+Rows are read lazily from CSV or NDJSON, validated with ``UserCreate``,
+de-duplicated against the table with one query per chunk, hashed in the
+process pool and inserted with one executemany per chunk.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from typing import IO, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.executors import get_process_pool, process_pool_size
+from app.models.enums import UserRole
+from app.models.user import DEFAULT_AVATAR, User
+from app.schemas import auth as auth_svc
+from app.schemas.user import UserCreate
+
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# (行号, 原始记录) 或 (行号, 解析错误)
+_Record = Tuple[int, Union[dict, str]]
+
+
+def iter_records(stream: IO[str], fmt: str) -> Iterator[_Record]:
+    """Parse ``stream`` lazily; CSV needs a header row (username,email,password)."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "ndjson":
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError as e:
+                yield line_no, f"Invalid JSON: {e}"
+                continue
+            yield line_no, obj if isinstance(obj, dict) else "Expected a JSON object"
+    else:
+        raise ValueError(f"Unknown import format: {fmt}")
+
+
+def _hash_password(password: str) -> str:
+    # 顶层函数，可被 spawn 子进程按名称导入
+    return auth_svc.get_password_hash(password)
+
+
+def _reject(out: Optional[IO[str]], line_no: int, raw, reason: str) -> None:
+    if out is None:
+        return
+    row = {k: v for k, v in raw.items() if k != "password"} if isinstance(raw, dict) else None
+    out.write(json.dumps({"line": line_no, "reason": reason, "row": row}, ensure_ascii=False, default=str) + "\n")
+
+
+def _chunks(records: Iterable[_Record], size: int) -> Iterator[List[_Record]]:
+    chunk: List[_Record] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_users(
+    db: Session,
+    records: Iterable[_Record],
+    *,
+    chunk_size: int = 1000,
+    rejected: Optional[IO[str]] = None,
+) -> Iterator[dict]:
+    """Insert valid, new users chunk by chunk; yields a progress dict per committed chunk.
+
+    Rejected rows (parse/validation errors, duplicates within the file or
+    against existing users) are written to ``rejected`` as NDJSON, without
+    their passwords.
+    """
+    pool = get_process_pool()
+    seen_emails: Set[str] = set()
+    seen_usernames: Set[str] = set()
+    processed = inserted = rejected_count = 0
+    for chunk in _chunks(records, chunk_size):
+        valid: List[Tuple[int, dict, UserCreate]] = []
+        for line_no, raw in chunk:
+            if isinstance(raw, str):
+                _reject(rejected, line_no, None, raw)
+                continue
+            try:
+                user = UserCreate.model_validate(raw)
+            except ValidationError as e:
+                reason = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                _reject(rejected, line_no, raw, reason)
+                continue
+            email, username = user.email.lower(), user.username
+            if email in seen_emails or username in seen_usernames:
+                _reject(rejected, line_no, raw, "Duplicate email or username in file")
+                continue
+            seen_emails.add(email)
+            seen_usernames.add(username)
+            valid.append((line_no, raw, user))
+
+        # 一次集合查询判重，走 email 唯一索引（MySQL 默认排序规则本身不区分大小写）
+        existing_emails: Set[str] = set()
+        existing_usernames: Set[str] = set()
+        if valid:
+            for email, username in db.execute(
+                select(User.email, User.username).where(
+                    or_(
+                        User.email.in_([u.email for _, _, u in valid]),
+                        User.username.in_([u.username for _, _, u in valid]),
+                    )
+                )
+            ).all():
+                existing_emails.add(email.lower())
+                existing_usernames.add(username)
+        fresh = []
+        for line_no, raw, user in valid:
+            if user.email.lower() in existing_emails:
+                _reject(rejected, line_no, raw, "Email already registered")
+            elif user.username in existing_usernames:
+                _reject(rejected, line_no, raw, "Username already registered")
+            else:
+                fresh.append(user)
+
+        if fresh:
+            hashes = pool.map(
+                _hash_password,
+                [u.password for u in fresh],
+                chunksize=max(1, len(fresh) // (process_pool_size() * 4)),
+            )
+            try:
+                db.execute(
+                    insert(User),
+                    [
+                        {
+                            "username": u.username,
+                            "email": u.email,
+                            "password": h,
+                            "role": UserRole.customer,
+                            "avatar": DEFAULT_AVATAR,
+                            "credit": 0,
+                        }
+                        for u, h in zip(fresh, hashes)
+                    ],
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        processed += len(chunk)
+        inserted += len(fresh)
+        rejected_count += len(chunk) - len(fresh)
+        if rejected is not None:
+            rejected.flush()
+        yield {"processed": processed, "inserted": inserted, "rejected": rejected_count}
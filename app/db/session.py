@@ -4,6 +4,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import get_settings
+from app.db.base import Base
 
 
 settings = get_settings()
@@ -31,3 +32,22 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def init_db() -> None:
+    """Create missing tables (lifespan hook when ``DB_CREATE_ALL``, or ``python -m app.cli init-db``)."""
+    import app.models  # noqa: F401  注册全部模型
+
+    Base.metadata.create_all(bind=engine)
+
+
+def prewarm_pool(connections: int) -> int:
+    """Open up to ``connections`` pooled connections and return them to the pool; returns how many."""
+    opened = []
+    try:
+        for _ in range(min(connections, settings.db_connection_limit)):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
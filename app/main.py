@@ -1,9 +1,19 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
-from app.db.session import engine, get_db
+from app.core.config import get_settings
+from app.core.executors import shutdown_pools
+from app.crud import event_search
+from app.core.responses import ORJSONResponse
+from app.db import session as db_session
+from app.db.session import get_db
 from fastapi.staticfiles import StaticFiles
 from app import models
 from app.schemas import user as schemas
@@ -11,10 +21,32 @@ from app.schemas import auth as auth
 from app.models.enums import UserRole
 
 from app.api.router import api_router
+from app.core.rate_limit import rate_limit
+from app.core.security import get_current_user
+
+logger = logging.getLogger(__name__)
+
+
+# 导入时不做任何 I/O：建表与连接池预热放在 lifespan 中，每个 worker 启动时执行一次
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    if settings.db_create_all:
+        await run_in_threadpool(db_session.init_db)
+    if settings.db_pool_prewarm:
+        try:
+            await run_in_threadpool(db_session.prewarm_pool, settings.db_pool_prewarm)
+        except Exception:
+            logger.warning("DB pool prewarm failed", exc_info=True)
+    # 进程内搜索索引（非 MySQL 或缺少全文索引时使用）在后台线程构建，不阻塞启动
+    event_search.start_index_build()
+    yield
+    shutdown_pools()
+    db_session.engine.dispose()
+
 
-models.Base.metadata.create_all(bind=engine)
 # Initialize the FastAPI app
-app = FastAPI(title="Ticketing API", version="0.1.0")
+app = FastAPI(title="Ticketing API", version="0.1.0", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = [
         "http://localhost:8080",  # Example: your frontend's local development URL
@@ -29,32 +61,43 @@ app.add_middleware(
         allow_methods=["*"],  # Allows all HTTP methods (GET, POST, PUT, DELETE, etc.)
         allow_headers=["*"],  # Allows all headers
     )
+# 座位图、票据列表等大响应压缩后传输；小响应不值得压缩
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=get_settings().gzip_minimum_size,
+    compresslevel=get_settings().gzip_compresslevel,
+)
 # static files for QR codes & assets
 app.mount("/static", StaticFiles(directory="static"), name="static")
 # mount versioned routers under /api
 app.include_router(api_router, prefix="/api")
-# Define the OAuth2 scheme for token-based authentication
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+def _find_user(db: Session, username: str):
+    return db.query(models.User).filter(models.User.username == username).first()
+
+
+def _save_user(db: Session, user: models.User) -> models.User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+# 注册/登录：同步 DB 访问放入线程池，bcrypt 放入有界哈希线程池，事件循环不被阻塞
 @app.post("/register", response_model=schemas.UserRead)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
+async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(_find_user, db, user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    hashed_password = auth.get_password_hash(user.password)
+    hashed_password = await auth.get_password_hash_async(user.password)
     new_user = models.User(username=user.username, email=user.email, password=hashed_password)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    return await run_in_threadpool(_save_user, db, new_user)
 
-@app.post("/token", response_model=schemas.Token)
+@app.post("/token", response_model=schemas.Token, dependencies=[Depends(rate_limit("login"))])
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.username == form_data.username).first()
-    is_valid = bool(user) and auth.verify_password(form_data.password, user.password)
-    # Auto-upgrade plaintext seed passwords to hashed on first successful login
+    user = await run_in_threadpool(_find_user, db, form_data.username)
+    is_valid = bool(user) and await auth.verify_password_async(form_data.password, user.password)
+    # Plaintext seed passwords also count as valid; they are hashed just below
     if user and not is_valid and user.password == form_data.password:
-        user.password = auth.get_password_hash(form_data.password)
-        db.commit()
         is_valid = True
     if not is_valid:
         raise HTTPException(
@@ -64,26 +107,14 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         )
     is_admin = (str(user.role) == UserRole.admin.value) or (user.role == UserRole.admin)
     roles = ["admin", "user"] if is_admin else ["user"]
-    user_id = user.id
-    print(user_id)
-    access_token = auth.create_access_token(data={"sub": user.username, "role": roles[0]})
+    user_id, username = user.id, user.username
+    # Rehash-on-login: plaintext seeds and hashes made with a different BCRYPT_ROUNDS
+    if auth.needs_rehash(user.password):
+        user.password = await auth.get_password_hash_async(form_data.password)
+        await run_in_threadpool(db.commit)
+    access_token = auth.create_access_token(data={"sub": username, "role": roles[0], "uid": user_id})
     return {"access_token": access_token, "token_type": "bearer", "isAdmin": is_admin, "roles": roles, "userId": user_id}
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    payload = auth.verify_token(token)
-    print(token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    username = payload.get("sub")
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if user is None:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
-    
 @app.get("/users/me", response_model=schemas.UserRead)
 async def read_users_me(current_user: models.User = Depends(get_current_user)):
     return current_user
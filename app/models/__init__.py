@@ -8,7 +8,9 @@ from app.models.ticket_type import TicketType  # noqa: F401
 from app.models.seat import Seat  # noqa: F401
 from app.models.payment import Payment  # noqa: F401
 from app.models.refund import Refund  # noqa: F401
+from app.models.cancellation import EventCancellationJob  # noqa: F401
+from app.models.rollup import SalesRollup  # noqa: F401
 
-__all__ = ["Base", "User", "Ticket", "Event", "TicketInventory", "EventSession", "TicketType", "Seat", "Payment", "Refund"]
+__all__ = ["Base", "User", "Ticket", "Event", "TicketInventory", "EventSession", "TicketType", "Seat", "Payment", "Refund", "EventCancellationJob", "SalesRollup"]
 
 
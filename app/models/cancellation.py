@@ -0,0 +1,25 @@
+from sqlalchemy import Column, DateTime, Enum as SAEnum, Integer, Text, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.models.enums import CancellationJobStatus
+
+
+class EventCancellationJob(Base):
+    __tablename__ = "event_cancellation_jobs"
+    __table_args__ = (UniqueConstraint("event_id", name="uq_cancellation_job_event"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(Integer, nullable=False)
+    status = Column(
+        SAEnum(CancellationJobStatus, name="cancellation_job_status"),
+        nullable=False,
+        default=CancellationJobStatus.pending,
+    )
+    last_ticket_id = Column(Integer, nullable=False, default=0)  # keyset checkpoint
+    processed = Column(Integer, nullable=False, default=0)
+    refunded_amount = Column(Integer, nullable=False, default=0)
+    requested_by = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -45,3 +45,10 @@ class RefundStatus(str, Enum):
     completed = "completed"
 
 
+
+
+class CancellationJobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
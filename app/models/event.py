@@ -1,10 +1,17 @@
-from sqlalchemy import Column, DateTime, Enum as SAEnum, Integer, String, Text, func
+from sqlalchemy import Column, DateTime, Enum as SAEnum, Index, Integer, String, Text, func
 
 from app.db.base import Base
 from app.models.enums import EventStatus
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # 关键词检索：MySQL 上为 ngram 全文索引（支持中文），其他方言为普通索引；
+        # 已有的表由 alembic 迁移 80b4b891635d 补建
+        Index("ft_events_text", "name", "description", "location", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        Index("ix_events_status_start", "status", "start_time"),
+        Index("ix_events_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(255), nullable=False)
@@ -16,4 +23,4 @@ class Event(Base):
     status = Column(SAEnum(EventStatus, name="event_status"), nullable=False, default=EventStatus.draft)
     created_by = Column(Integer, nullable=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, DateTime, Index, Integer, UniqueConstraint
+
+from app.db.base import Base
+
+
+class SalesRollup(Base):
+    """Hourly sales counters per session and ticket type.
+
+    Refunds are booked against the hour the ticket was *purchased*, so
+    ``sold_count - refund_count`` equals the tickets of that hour still held.
+    """
+
+    __tablename__ = "sales_rollups"
+    __table_args__ = (
+        UniqueConstraint("bucket", "session_id", "ticket_type_id", name="uq_rollup_bucket_session_type"),
+        Index("ix_rollup_event_bucket", "event_id", "bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    bucket = Column(DateTime, nullable=False)  # purchase hour (UTC, truncated)
+    event_id = Column(Integer, nullable=False, default=0)
+    session_id = Column(Integer, nullable=False)
+    ticket_type_id = Column(Integer, nullable=False)
+    sold_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Integer, nullable=False, default=0)
+    refund_count = Column(Integer, nullable=False, default=0)
+    refund_amount = Column(Integer, nullable=False, default=0)
@@ -15,7 +15,7 @@ class TicketType(Base):
     price = Column(Integer, nullable=False, default=0)  # 用整数价格（单位与 User.credit 对齐）
     totalstock = Column(Integer, nullable=False, default=0)
     availablestock = Column("available_stock", Integer, nullable=False, default=0)
-    description = Column(String, nullable=True)
+    description = Column(String(255), nullable=True)
     createdat = Column("createdat", DateTime, server_default=func.now(), nullable=False)
     updatedat = Column("updatedat", DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
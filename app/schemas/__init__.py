@@ -2,10 +2,11 @@
 
 # Re-export commonly used schemas
 from app.schemas.user import UserCreate, UserUpdate, UserRead  # noqa: F401
-from app.schemas.ticket import TicketCreate, TicketUpdate, TicketRead, TicketPurchase, TicketListItem  # noqa: F401
+from app.schemas.ticket import TicketCreate, TicketUpdate, TicketRead, TicketPurchase, TicketListItem, TicketBulkCreate  # noqa: F401
 from app.schemas.event import EventCreate, EventUpdate, EventRead  # noqa: F401
 from app.schemas.inventory import InventoryCreate, InventoryUpdate, InventoryRead  # noqa: F401
 from app.schemas.seat import SeatStateRead, SeatMapRead  # noqa: F401
 from app.schemas.session import SessionCreate, SessionRead, SessionUpdate  # noqa: F401
-from app.schemas.refund import RefundRequestCreate, RefundRead  # noqa: F401
-
+from app.schemas.refund import RefundRequestCreate, RefundRead, RefundBatchReview, RefundBatchResult  # noqa: F401
+from app.schemas.checkin import CheckInRequest, CheckInResult  # noqa: F401
+from app.schemas.cancellation import CancellationJobRead  # noqa: F401
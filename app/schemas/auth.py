@@ -1,17 +1,27 @@
+import asyncio
+
 from passlib.context import CryptContext
 from passlib.exc import UnknownHashError
 import jwt
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-import os
 
-load_dotenv()
+from app.core.config import get_settings
+from app.core.executors import get_hash_pool
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+_settings = get_settings()
+SECRET_KEY = _settings.secret_key
+ALGORITHM = _settings.algorithm
+ACCESS_TOKEN_EXPIRE_MINUTES = _settings.access_token_expire_minutes
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_rounds = _settings.bcrypt_rounds
+# min/max 与默认成本一致：成本不同的旧哈希会被 needs_update 标记，登录时升级
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=_rounds,
+    bcrypt__min_rounds=_rounds,
+    bcrypt__max_rounds=_rounds,
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
@@ -23,6 +33,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def needs_rehash(hashed_password: str) -> bool:
+    try:
+        return pwd_context.needs_update(hashed_password)
+    except (UnknownHashError, ValueError):
+        return True
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bounded hashing pool, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hash_pool(), verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hash_pool(), get_password_hash, password)
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+from pydantic import ConfigDict
+
+
+class CancellationJobRead(BaseModel):
+    id: int
+    event_id: int
+    status: str
+    last_ticket_id: int
+    processed: int
+    refunded_amount: int
+    requested_by: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
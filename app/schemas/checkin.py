@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class CheckInRequest(BaseModel):
+    token: str  # 二维码内容（签名 token 或完整验证链接）
+    session_id: Optional[int] = None  # 闸机所属场次，提供时校验一致
+
+
+class CheckInResult(BaseModel):
+    result: str  # admitted|duplicate|invalid|expired|wrong_session|rejected
+    ticket_id: Optional[int] = None
+    session_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class ScanRecord(BaseModel):
+    token: str
+    scanned_at: Optional[datetime] = None  # 扫描设备时间：用于冲突裁决（最早者生效）与令牌过期判断，不得晚于服务器时间
+    device_id: Optional[str] = None
+
+
+class ScanBatch(BaseModel):
+    session_id: Optional[int] = None
+    scans: List[ScanRecord]
+
+
+class ScanBatchResult(BaseModel):
+    results: List[CheckInResult]
+    summary: Dict[str, int]
+
+
+class ManifestDelta(BaseModel):
+    added: List[int]
+    removed: List[int]
+
+
+class ScannerManifest(BaseModel):
+    session_id: int
+    version: int  # 该场次票券最大 updated_at（epoch 秒），下次增量拉取时作为 since 传回
+    encoding: str = "u32le-sorted-base64"
+    count: int
+    ids: Optional[str] = None  # 全量：升序 uint32 小端数组的 base64
+    delta: Optional[ManifestDelta] = None  # 增量：自 since 以来新增可入场 / 失效的票 ID
@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
-from pydantic import ConfigDict
+from pydantic import ConfigDict, computed_field
+
+from app.utils.image_variants import variant_urls
 
 
 class EventCreate(BaseModel):
@@ -29,6 +31,12 @@ class EventRead(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+    @computed_field  # type: ignore[misc]
+    @property
+    def cover_variants(self) -> Optional[Dict[str, Dict[str, str]]]:
+        """Resized cover URLs by variant and format, e.g. ``cover_variants["card"]["webp"]``."""
+        return variant_urls(self.cover_image)
+
 class EventUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
@@ -37,5 +45,62 @@ class EventUpdate(BaseModel):
     location: Optional[str] = None
     status: Optional[str] = None
 
+class EventSearchHit(EventRead):
+    score: Optional[float] = None  # 关键词相关度；无关键词时为空
+
+
+class EventSearchPage(BaseModel):
+    items: List[EventSearchHit]
+    next_cursor: Optional[str] = None
+
+class TicketTypeSummary(BaseModel):
+    id: int
+    name: str
+    price: int
+    description: Optional[str] = None
+
+
+class SessionInventory(BaseModel):
+    ticket_type_id: int
+    ticket_type_name: Optional[str] = None
+    price: int
+    total: int
+    available: int
+    sold: int
+
+
+class SessionAvailability(BaseModel):
+    id: int
+    sessiontime: datetime
+    capacity: int
+    total: int
+    available: int
+    sold_out: bool
+    min_price: Optional[int] = None  # 仍有余票的最低票价
+    inventory: List[SessionInventory]
+
+
+class EventDetail(BaseModel):
+    event: EventRead
+    sessions: List[SessionAvailability]
+    ticket_types: List[TicketTypeSummary]
+    seats: Dict[str, int]  # total / available / locked / sold
+
+class CoverUploadRequest(BaseModel):
+    content_type: str
+
+
+class CoverUploadTicket(BaseModel):
+    key: str
+    url: str  # PUT the file here with ``headers``
+    method: str = "PUT"
+    headers: Dict[str, str]
+    expires_at: datetime
+    max_bytes: int
+
+
+class CoverUploadFinalize(BaseModel):
+    key: str
+
 # Backwards compatibility alias for existing imports
 eventCreate = EventCreate
\ No newline at end of file
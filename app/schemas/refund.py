@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pydantic import ConfigDict
 
 
@@ -21,3 +21,17 @@ class RefundRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class RefundBatchReview(BaseModel):
+    refund_ids: List[int] = Field(min_length=1, max_length=20000)
+    chunk_size: int = Field(default=500, gt=0, le=5000)  # 每批提交的退款数
+
+
+class RefundBatchItem(BaseModel):
+    id: int
+    result: str  # approved|rejected|not_found|conflict
+    detail: Optional[str] = None
+
+
+class RefundBatchResult(BaseModel):
+    results: List[RefundBatchItem]
+    summary: Dict[str, int]
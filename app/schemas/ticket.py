@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 
 from pydantic import BaseModel
-from pydantic import ConfigDict, field_serializer
+from pydantic import ConfigDict, Field, field_serializer
 import base64
 
 
@@ -19,6 +19,14 @@ class TicketCreate(BaseModel):
     seat_id: Optional[int] = None
 
 
+class TicketBulkCreate(BaseModel):
+    session_id: int
+    ticket_type_id: int
+    user_id: int  # 接收账户（赠票/赞助商配额）
+    quantity: int = Field(gt=0, le=50000)
+    chunk_size: int = Field(default=1000, gt=0, le=5000)
+
+
 class TicketUpdate(BaseModel):
     seat_id: Optional[int] = None
     status: Optional[str] = None
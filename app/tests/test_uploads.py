@@ -0,0 +1,195 @@
+"""Direct cover uploads against the local storage backend: presign -> PUT -> finalize."""
+
+import io
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+# 上传路由只在配置了 SECRET_KEY 时注册，须在导入应用之前设置
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from PIL import Image  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import app.models  # noqa: E402,F401  注册全部模型
+from app.api.v1.endpoints import event as event_endpoints  # noqa: E402
+from app.api.v1.endpoints import uploads as upload_endpoints  # noqa: E402
+from app.core.security import require_admin  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.event import Event  # noqa: E402
+from app.utils import storage as storage_module  # noqa: E402
+from app.utils.storage import LocalStorage  # noqa: E402
+
+MAX_BYTES = 256 * 1024
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    local = LocalStorage(
+        str(tmp_path / "uploads"),
+        "/static/uploads",
+        part_size=64 * 1024,
+        max_bytes=MAX_BYTES,
+        upload_path="/api/v1/uploads/local",
+        secret=b"test-secret",
+    )
+    monkeypatch.setattr(storage_module, "get_storage", lambda: local)
+    monkeypatch.setattr(upload_endpoints, "get_storage", lambda: local)
+    return local
+
+
+@pytest.fixture
+def event_id():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    with SessionLocal() as db:
+        event = Event(name="Cover test", start_time=datetime(2030, 1, 1, 20, 0), created_by=1)
+        db.add(event)
+        db.commit()
+        eid = event.id
+    app.dependency_overrides[event_endpoints.get_db] = get_db
+    app.dependency_overrides[require_admin] = lambda: SimpleNamespace(id=1)
+    yield eid
+    app.dependency_overrides.clear()
+    engine.dispose()
+
+
+@pytest.fixture
+def client():
+    # 不进入 lifespan：不连接 MySQL，也不启动后台任务
+    return TestClient(app)
+
+
+def _png() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (320, 200), (200, 30, 30)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _ticket(client, event_id, content_type="image/png"):
+    r = client.post(f"/api/v1/events/{event_id}/cover/upload-url", json={"content_type": content_type})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _files(storage):
+    return sorted(p.relative_to(storage.root).as_posix() for p in storage.root.rglob("*") if p.is_file())
+
+
+def test_presign_put_finalize(client, storage, event_id):
+    ticket = _ticket(client, event_id)
+    assert ticket["max_bytes"] == MAX_BYTES
+    r = client.put(ticket["url"], content=_png(), headers=ticket["headers"])
+    assert r.status_code == 200, r.text
+
+    r = client.post(f"/api/v1/events/{event_id}/cover/finalize", json={"key": ticket["key"]})
+    assert r.status_code == 200, r.text
+    assert r.json()["cover_image"] == storage.public_url(ticket["key"])
+    files = _files(storage)
+    assert ticket["key"] in files
+    assert len(files) > 1  # 原件之外还有渲染出的各尺寸变体
+
+
+def test_expired_signature_is_rejected(client, storage, event_id):
+    key = f"events/{event_id}/{'0' * 32}/original.png"
+    url, headers = storage.presign_put(key, "image/png", -1)
+    r = client.put(url, content=_png(), headers=headers)
+    assert r.status_code == 403
+    assert _files(storage) == []
+
+
+def test_tampered_signature_is_rejected(client, storage, event_id):
+    ticket = _ticket(client, event_id)
+    r = client.put(ticket["url"].replace("sig=", "sig=0"), content=_png(), headers=ticket["headers"])
+    assert r.status_code == 403
+    assert _files(storage) == []
+
+
+def test_wrong_content_type_is_rejected(client, storage, event_id):
+    ticket = _ticket(client, event_id)
+    r = client.put(ticket["url"], content=_png(), headers={"Content-Type": "image/jpeg"})
+    assert r.status_code == 403
+    assert _files(storage) == []
+
+
+def test_oversize_upload_is_rejected(client, storage, event_id):
+    ticket = _ticket(client, event_id)
+    r = client.put(ticket["url"], content=b"\0" * (MAX_BYTES + 1), headers=ticket["headers"])
+    assert r.status_code == 413
+    assert _files(storage) == []
+
+
+def test_oversize_stream_without_length_is_rejected(client, storage, event_id):
+    ticket = _ticket(client, event_id)
+
+    def body():
+        for _ in range(MAX_BYTES // 4096 + 1):
+            yield b"\0" * 4096
+
+    r = client.put(ticket["url"], content=body(), headers=ticket["headers"])
+    assert r.status_code == 413
+    assert _files(storage) == []
+
+
+def test_path_traversal_in_put_key_is_rejected(client, storage, event_id, tmp_path):
+    key = "../escaped.png"
+    url, headers = storage.presign_put(key, "image/png", 60)
+    # 编码 ".." 以免客户端先把路径规范化掉
+    r = client.put(url.replace("/../", "/%2E%2E/"), content=_png(), headers=headers)
+    assert r.status_code == 400
+    assert not (tmp_path / "escaped.png").exists()
+
+
+def test_path_traversal_in_finalize_key_is_rejected(client, storage, event_id):
+    r = client.post(
+        f"/api/v1/events/{event_id}/cover/finalize",
+        json={"key": f"events/{event_id}/{'0' * 32}/../../../original.png"},
+    )
+    assert r.status_code == 400
+
+
+def test_finalize_deletes_object_that_is_not_an_image(client, storage, event_id):
+    ticket = _ticket(client, event_id)
+    r = client.put(ticket["url"], content=b"not a png", headers=ticket["headers"])
+    assert r.status_code == 200, r.text
+
+    r = client.post(f"/api/v1/events/{event_id}/cover/finalize", json={"key": ticket["key"]})
+    assert r.status_code == 400
+    assert _files(storage) == []
+
+
+def test_finalize_for_missing_event_leaves_no_objects(client, storage, event_id):
+    missing = event_id + 1
+    key = f"events/{missing}/{'0' * 32}/original.png"
+    url, headers = storage.presign_put(key, "image/png", 60)
+    assert client.put(url, content=_png(), headers=headers).status_code == 200
+
+    r = client.post(f"/api/v1/events/{missing}/cover/finalize", json={"key": key})
+    assert r.status_code == 404
+    assert _files(storage) == []
+
+
+def test_finalize_cleans_up_when_event_disappears(client, storage, event_id, monkeypatch):
+    ticket = _ticket(client, event_id)
+    assert client.put(ticket["url"], content=_png(), headers=ticket["headers"]).status_code == 200
+    # 活动在渲染期间被删除
+    monkeypatch.setattr(event_endpoints.crud.event, "set_cover_image", lambda db, eid, url: None)
+
+    r = client.post(f"/api/v1/events/{event_id}/cover/finalize", json={"key": ticket["key"]})
+    assert r.status_code == 404
+    assert _files(storage) == []
@@ -0,0 +1,83 @@
+"""Resized, recompressed variants of uploaded cover images.
+
+``render_variants`` is CPU-bound and runs in the process pool. Variants are
+stored next to the original (``<folder>/<id>/original.<ext>`` becomes
+``<folder>/<id>/<variant>.webp`` and ``.jpg``), so their URLs can be derived
+from the cover URL alone (``variant_urls``).
+"""
+
+from __future__ import annotations
+
+import re
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+
+# 名称 -> (宽, 高, 是否裁剪为该比例)；从大到小排列，依次由上一级缩放得到
+VARIANTS: Dict[str, Tuple[int, int, bool]] = {
+    "hero": (1600, 900, False),
+    "card": (640, 360, True),
+    "thumb": (160, 160, True),
+}
+# 扩展名 -> (Pillow 格式, Content-Type, 编码参数)
+FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+_ORIGINAL_RE = re.compile(r"^(?P<base>.+/)original\.[A-Za-z0-9]+$")
+
+
+def variant_key(original_key: str, filename: str) -> str:
+    """Storage key of a rendered variant (``"card.webp"``) next to ``original_key``."""
+    return f"{original_key.rsplit('/', 1)[0]}/{filename}"
+
+
+def content_type(filename: str) -> str:
+    return FORMATS[filename.rsplit(".", 1)[1]][1]
+
+
+def variant_urls(cover_url: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    """``{"thumb": {"webp": url, "jpg": url}, ...}`` for covers uploaded with variants, else ``None``."""
+    m = _ORIGINAL_RE.match(cover_url or "")
+    if not m:
+        return None
+    base = m.group("base")
+    return {name: {ext: f"{base}{name}.{ext}" for ext in FORMATS} for name in VARIANTS}
+
+
+def render_variants(data: bytes) -> Dict[str, bytes]:
+    """Decode ``data`` once and encode every variant; keys are ``"<variant>.<ext>"``.
+
+    Raises ``ValueError`` when ``data`` is not a readable image.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        img = Image.open(BytesIO(data))
+        # JPEG 可在解码时直接按比例缩小，避免解出全尺寸位图
+        img.draft("RGB", VARIANTS["hero"][:2])
+        img = ImageOps.exif_transpose(img)
+        img.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Not a valid image: {e}") from e
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+
+    out: Dict[str, bytes] = {}
+    current = img
+    for name, (width, height, crop) in VARIANTS.items():
+        if crop and current.width >= width and current.height >= height:
+            current = ImageOps.fit(current, (width, height), Image.LANCZOS)
+        else:
+            current = current.copy()
+            current.thumbnail((width, height), Image.LANCZOS, reducing_gap=3.0)
+        for ext, (fmt, _, options) in FORMATS.items():
+            buf = BytesIO()
+            current.save(buf, fmt, **options)
+            out[f"{name}.{ext}"] = buf.getvalue()
+    return out
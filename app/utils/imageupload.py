@@ -1,60 +1,72 @@
-from fastapi import UploadFile, HTTPException
-import boto3
-from botocore.exceptions import ClientError
+import asyncio
 import uuid
-import os
-from dotenv import load_dotenv  # pip install python-dotenv if not installed
-
-# Load environment variables at the start
-load_dotenv()
-
-# Retrieve configs (these will now pull from your .env)
-R2_ACCESS_KEY_ID = os.getenv("R2_ACCESS_KEY_ID")
-R2_SECRET_ACCESS_KEY = os.getenv("R2_SECRET_ACCESS_KEY")
-S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME", "imagestore")
-S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
-AWS_REGION = os.getenv("AWS_REGION", "auto")
-
-# Check if required creds are set
-if not R2_ACCESS_KEY_ID or not R2_SECRET_ACCESS_KEY or not S3_ENDPOINT_URL:
-    raise ValueError("Missing required environment variables for R2 access. Check your .env file.")
-
-# Initialize S3 client for R2
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=R2_ACCESS_KEY_ID,
-    aws_secret_access_key=R2_SECRET_ACCESS_KEY,
-    endpoint_url=S3_ENDPOINT_URL,
-    region_name=AWS_REGION
-)
-
-def save_uploaded_image(upload_file: UploadFile, folder: str = "static") -> str:
+from typing import Dict
+
+from fastapi import UploadFile, HTTPException
+
+from app.core.executors import get_process_pool
+from app.utils import image_variants
+from app.utils.storage import Storage, UploadTooLarge, get_storage
+
+
+async def render_variants(data: bytes) -> Dict[str, bytes]:
+    """Render thumb/card/hero in the process pool; 400 if ``data`` is not an image."""
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_process_pool(), image_variants.render_variants, data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def store_variants(storage: Storage, original_key: str, rendered: Dict[str, bytes]) -> None:
+    await asyncio.gather(
+        *(
+            storage.put_bytes(image_variants.variant_key(original_key, name), body, image_variants.content_type(name))
+            for name, body in rendered.items()
+        )
+    )
+
+
+async def save_uploaded_image(upload_file: UploadFile, folder: str = "static", variants: bool = True) -> str:
     """
-    Utility function to upload an image to Cloudflare R2 and return its public URL.
-    (Same as before; no changes needed here.)
+    Stream an uploaded image to the configured storage backend and return its public URL.
+    The event loop is never blocked: see ``app.utils.storage``.
+
+    With ``variants`` the image is stored as ``<folder>/<id>/original.<ext>``, then
+    read back (bounded by ``max_bytes``) to render thumb/card/hero renditions
+    (WebP and JPEG, see ``app.utils.image_variants``) in the process pool, which
+    are stored next to it. An original that cannot be decoded is deleted (400).
     """
     # Validate that it's an image
     if not upload_file.content_type or not upload_file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="Uploaded file must be an image")
 
     # Generate a unique key
-    file_extension = upload_file.filename.split('.')[-1] if '.' in upload_file.filename else ''
-    unique_key = f"{folder}/{uuid.uuid4()}.{file_extension}"
+    filename = upload_file.filename or ""
+    file_extension = filename.split('.')[-1] if '.' in filename else ''
+    if variants:
+        unique_key = f"{folder}/{uuid.uuid4().hex}/original.{file_extension or 'img'}"
+    else:
+        unique_key = f"{folder}/{uuid.uuid4()}.{file_extension}"
+    storage = get_storage()
 
-    # Upload to R2
     try:
-        upload_file.file.seek(0)
-        s3_client.upload_fileobj(
-            upload_file.file,
-            S3_BUCKET_NAME,
-            unique_key,
-            ExtraArgs={"ContentType": upload_file.content_type}
-        )
-    except ClientError as e:
-        raise HTTPException(status_code=500, detail=f"Error uploading to R2: {str(e)}")
+        await upload_file.seek(0)
+        url = await storage.save(upload_file, unique_key, upload_file.content_type)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error uploading image: {str(e)}")
+    if not variants:
+        return url
 
-    # Public URL
-    image_url = f"{S3_ENDPOINT_URL}/{S3_BUCKET_NAME}/{unique_key}"
-    return image_url
\ No newline at end of file
+    # 流式写入后再从存储读回（save 已限制不超过 max_bytes）生成缩略图，与直传的 finalize 同一路径
+    try:
+        rendered = await render_variants(await storage.get_bytes(unique_key))
+    except HTTPException:
+        await storage.delete(unique_key)  # 不可解码：不保留原件
+        raise
+    try:
+        await store_variants(storage, unique_key, rendered)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error uploading image: {str(e)}")
+    return url
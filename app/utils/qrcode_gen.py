@@ -2,9 +2,10 @@ import os
 from typing import Optional
 from uuid import uuid4
 
-import qrcode
 from io import BytesIO
 
+# qrcode / Pillow are imported inside the functions so that importing the API stays fast
+
 
 DEFAULT_STATIC_DIR = "static"
 DEFAULT_QR_SUBDIR = "qrcodes"
@@ -27,6 +28,8 @@ def generate_qr_image(content: str, filename: Optional[str] = None) -> str:
 
     file_path = os.path.join(output_dir, filename)
 
+    import qrcode
+
     img = qrcode.make(content)
     img.save(file_path)
 
@@ -34,9 +37,23 @@ def generate_qr_image(content: str, filename: Optional[str] = None) -> str:
     return f"/static/{DEFAULT_QR_SUBDIR}/{filename}"
 
 
-def generate_qr_png_bytes(content: str) -> bytes:
-    """Return PNG bytes for the QR code of given content."""
-    img = qrcode.make(content)
+def generate_qr_png_bytes(content: str, mask_pattern: Optional[int] = None, box_size: int = 10, border: int = 4) -> bytes:
+    """Return PNG bytes for the QR code of given content.
+
+    Passing a fixed ``mask_pattern`` (0-7) skips the eight-way mask search,
+    which dominates render time; bulk issuance uses this. The module matrix is
+    scaled in one resize instead of drawing every module as a rectangle.
+    """
+    import qrcode
+    from PIL import Image
+
+    qr = qrcode.QRCode(box_size=box_size, border=border, mask_pattern=mask_pattern)
+    qr.add_data(content)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    n = len(matrix)
+    pixels = bytes(0 if dark else 255 for row in matrix for dark in row)
+    img = Image.frombytes("L", (n, n), pixels).convert("1").resize((n * box_size, n * box_size), Image.NEAREST)
     buf = BytesIO()
     img.save(buf, format="PNG")
     return buf.getvalue()
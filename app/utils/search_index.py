@@ -0,0 +1,88 @@
+"""Small in-process inverted index for keyword search.
+
+Latin/digit runs become whole-word tokens; CJK runs become overlapping
+bigrams (the same scheme as MySQL's ngram parser), so Chinese text is
+searchable without a segmenter. Scores are field-weighted tf·idf.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Hashable, List, Mapping, Optional
+
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"([{_CJK}]+)|[^\W_{_CJK}]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    tokens: List[str] = []
+    if not text:
+        return tokens
+    for match in _TOKEN_RE.finditer(text.lower()):
+        run = match.group(0)
+        if match.group(1):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+class InvertedIndex:
+    """Thread-safe token -> {doc: weight} postings plus per-document metadata."""
+
+    def __init__(self, field_weights: Mapping[str, float]) -> None:
+        self.field_weights = dict(field_weights)
+        self._postings: Dict[str, Dict[Hashable, float]] = {}
+        self._doc_terms: Dict[Hashable, List[str]] = {}
+        self.meta: Dict[Hashable, Any] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, doc_id: Hashable, fields: Mapping[str, Optional[str]], meta: Any = None) -> None:
+        """Index (or re-index) one document."""
+        weights: Counter = Counter()
+        for name, weight in self.field_weights.items():
+            for token in tokenize(fields.get(name)):
+                weights[token] += weight
+        with self._lock:
+            self._remove_locked(doc_id)
+            for token, weight in weights.items():
+                self._postings.setdefault(token, {})[doc_id] = 1.0 + math.log(weight)
+            self._doc_terms[doc_id] = list(weights)
+            self.meta[doc_id] = meta
+
+    def remove(self, doc_id: Hashable) -> None:
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: Hashable) -> None:
+        for token in self._doc_terms.pop(doc_id, ()):
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[token]
+        self.meta.pop(doc_id, None)
+
+    def score(self, query: str) -> Dict[Hashable, float]:
+        """Documents matching any query token, with their relevance."""
+        scores: Dict[Hashable, float] = {}
+        with self._lock:
+            total = len(self._doc_terms) or 1
+            for token in set(tokenize(query)):
+                posting = self._postings.get(token)
+                if not posting:
+                    continue
+                idf = math.log(1.0 + total / len(posting))
+                for doc_id, weight in posting.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * weight
+        return scores
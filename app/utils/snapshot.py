@@ -0,0 +1,246 @@
+"""Vectorized analytics over the memory-mapped snapshots written by ``crud.snapshot``.
+
+Arrays are opened with ``mmap_mode="r"`` so only the columns a query touches
+are paged in; group-bys use ``bincount`` over factorized keys and percentiles
+a single ``lexsort``, so multi-million-row reports stay well under a second.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+GROUP_KEYS = ("event_id", "session_id", "ticket_type_id", "user_id", "hour_of_day", "weekday", "day")
+_TIME_GROUPS = ("hour_of_day", "weekday", "day")
+_TIME_COLUMN = {"tickets": "purchase_ts", "payments": "paid_ts", "refunds": "refund_ts"}
+
+
+class SnapshotNotFound(Exception):
+    pass
+
+
+class Snapshot:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.manifest = json.loads((path / "manifest.json").read_text())
+        self.name: str = self.manifest["name"]
+        self._tables: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def table(self, name: str) -> Dict[str, np.ndarray]:
+        if name not in self._tables:
+            meta = self.manifest["tables"][name]
+            rows = meta["rows"]
+            self._tables[name] = {
+                col: np.load(self.path / f"{name}.{col}.npy", mmap_mode="r")[:rows] for col in meta["columns"]
+            }
+        return self._tables[name]
+
+    def code(self, table: str, column: str, value: str) -> int:
+        return self.manifest["enums"][f"{table}.{column}"].index(value)
+
+    def codes(self, table: str, column: str, values: Sequence[str]) -> List[int]:
+        return [self.code(table, column, v) for v in values]
+
+
+_current: Optional[Snapshot] = None
+_lock = threading.Lock()
+
+
+def load_current(directory: str) -> Snapshot:
+    """The snapshot ``CURRENT`` points to, re-opened only when the pointer moves."""
+    global _current
+    pointer = Path(directory) / "CURRENT"
+    try:
+        name = pointer.read_text().strip()
+    except FileNotFoundError:
+        raise SnapshotNotFound("No analytics snapshot has been built yet")
+    with _lock:
+        if _current is None or _current.name != name:
+            _current = Snapshot(Path(directory) / name)
+        return _current
+
+
+# ----- vectorized primitives -----
+
+def _factorize(keys: np.ndarray):
+    """(unique keys, dense group index) — direct indexing when the key range is dense."""
+    if keys.size == 0:
+        return keys[:0].astype(np.int64), np.zeros(0, dtype=np.int64)
+    lo, hi = int(keys.min()), int(keys.max())
+    if lo >= 0 and hi < 4 * keys.size + 1024:
+        present = np.bincount(keys, minlength=hi + 1) > 0
+        uniques = np.flatnonzero(present)
+        remap = np.cumsum(present) - 1
+        return uniques, remap[keys]
+    uniques, inverse = np.unique(keys, return_inverse=True)
+    return uniques, inverse
+
+
+def _time_keys(ts: np.ndarray, by: str) -> np.ndarray:
+    if by == "hour_of_day":
+        return (ts // 3600) % 24
+    if by == "weekday":
+        return (ts // 86400 + 3) % 7  # 1970-01-01 是周四；0 = 周一
+    return ts // 86400
+
+
+def _keys(tbl: Dict[str, np.ndarray], table: str, by: str) -> np.ndarray:
+    if by in _TIME_GROUPS:
+        return _time_keys(np.asarray(tbl[_TIME_COLUMN[table]]), by)
+    if by not in tbl:
+        raise ValueError(f"Cannot group {table} by {by}")
+    return np.asarray(tbl[by])
+
+
+def _window(tbl: Dict[str, np.ndarray], table: str, since: Optional[int], until: Optional[int]) -> np.ndarray:
+    ts = np.asarray(tbl[_TIME_COLUMN[table]])
+    mask = ts >= 0
+    if since is not None:
+        mask &= ts >= since
+    if until is not None:
+        mask &= ts < until
+    return mask
+
+
+def _label(by: str, key: int):
+    if by == "day":
+        return str(np.datetime64(int(key), "D"))
+    return int(key)
+
+
+def _filtered(snap: Snapshot, table: str, since, until, event_id, status: Optional[List[int]]):
+    tbl = snap.table(table)
+    mask = _window(tbl, table, since, until)
+    if event_id is not None:
+        mask &= np.asarray(tbl["event_id"]) == event_id
+    if status is not None:
+        mask &= np.isin(np.asarray(tbl["status"]), status)
+    return tbl, mask
+
+
+# ----- reports -----
+
+def revenue_by(
+    snap: Snapshot,
+    by: str,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    event_id: Optional[int] = None,
+) -> List[dict]:
+    """Paid revenue, payment count, refunds and net revenue per group."""
+    pay, pmask = _filtered(snap, "payments", since, until, event_id, snap.codes("payments", "status", ["paid", "refunded"]))
+    ref, rmask = _filtered(
+        snap, "refunds", since, until, event_id, snap.codes("refunds", "status", ["approved", "completed"])
+    )
+    pkeys = _keys(pay, "payments", by)[pmask]
+    rkeys = _keys(ref, "refunds", by)[rmask]
+    uniques, inverse = _factorize(np.concatenate([pkeys, rkeys]))
+    n = uniques.size
+    pidx, ridx = inverse[: pkeys.size], inverse[pkeys.size:]
+    revenue = np.bincount(pidx, weights=np.asarray(pay["amount"])[pmask], minlength=n)
+    payments = np.bincount(pidx, minlength=n)
+    refunded = np.bincount(ridx, weights=np.asarray(ref["amount"])[rmask], minlength=n)
+    refunds = np.bincount(ridx, minlength=n)
+    return [
+        {
+            "key": _label(by, uniques[i]),
+            "revenue": int(revenue[i]),
+            "payments": int(payments[i]),
+            "refundAmount": int(refunded[i]),
+            "refunds": int(refunds[i]),
+            "netRevenue": int(revenue[i] - refunded[i]),
+        }
+        for i in range(n)
+    ]
+
+
+def funnel_by(
+    snap: Snapshot,
+    by: str,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    event_id: Optional[int] = None,
+) -> List[dict]:
+    """Tickets per status per group, with purchase and refund rates."""
+    tk = snap.table("tickets")
+    mask = np.ones(len(tk["id"]), dtype=bool)
+    created = np.asarray(tk["created_ts"])
+    if since is not None:
+        mask &= created >= since
+    if until is not None:
+        mask &= created < until
+    if event_id is not None:
+        mask &= np.asarray(tk["event_id"]) == event_id
+    # 按小时/日期分组时以创建时间为准，待支付的票也能计入漏斗
+    keys = (_time_keys(created, by) if by in _TIME_GROUPS else _keys(tk, "tickets", by))[mask]
+    status = np.asarray(tk["status"])[mask].astype(np.int64)
+    uniques, inverse = _factorize(keys)
+    labels = snap.manifest["enums"]["tickets.status"]
+    # 一次 bincount 得到 (组 × 状态) 的计数矩阵
+    matrix = np.bincount(inverse * len(labels) + status, minlength=uniques.size * len(labels)).reshape(-1, len(labels))
+    # 已成交 = 有效 + 已使用 + 已退款
+    bought = matrix[:, [labels.index(s) for s in ("active", "used", "refunded")]].sum(axis=1)
+    refunded_col = labels.index("refunded")
+    out = []
+    for i in range(uniques.size):
+        total = int(matrix[i].sum())
+        row = {"key": _label(by, uniques[i]), "created": total, "purchased": int(bought[i])}
+        row.update({label: int(matrix[i, j]) for j, label in enumerate(labels)})
+        row["purchaseRate"] = round(bought[i] / total, 4) if total else 0.0
+        row["refundRate"] = round(matrix[i, refunded_col] / bought[i], 4) if bought[i] else 0.0
+        out.append(row)
+    return out
+
+
+def amount_percentiles(
+    snap: Snapshot,
+    table: str,
+    by: Optional[str],
+    quantiles: Sequence[float] = (0.5, 0.9, 0.99),
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    event_id: Optional[int] = None,
+) -> List[dict]:
+    """Per-group percentiles of ``amount`` (payments or refunds), linear interpolation."""
+    if table not in ("payments", "refunds"):
+        raise ValueError("Percentiles are available for payments and refunds")
+    tbl, mask = _filtered(snap, table, since, until, event_id, None)
+    values = np.asarray(tbl["amount"])[mask].astype(np.int64)
+    if by is None:
+        keys = np.zeros(values.size, dtype=np.int64)
+    else:
+        keys = _keys(tbl, table, by)[mask]
+    uniques, inverse = _factorize(keys)
+    base = int(values.min()) if values.size else 0
+    if values.size and int(values.max()) - base < 1 << 32:
+        # (组, 金额) 打包成一个 int64 后单次排序，比双键 lexsort 快数倍
+        packed = (inverse.astype(np.int64) << 32) | (values - base)
+        packed.sort()
+        sorted_values = ((packed & 0xFFFFFFFF) + base).astype(np.float64)
+    else:
+        sorted_values = values[np.lexsort((values, inverse))].astype(np.float64)
+    counts = np.bincount(inverse, minlength=uniques.size)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    result = {}
+    for q in quantiles:
+        pos = starts + q * np.maximum(counts - 1, 0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, starts + np.maximum(counts - 1, 0))
+        frac = pos - lo
+        if sorted_values.size:
+            result[q] = sorted_values[lo] * (1 - frac) + sorted_values[hi] * frac
+        else:
+            result[q] = np.zeros(0)
+    return [
+        {
+            "key": None if by is None else _label(by, uniques[i]),
+            "count": int(counts[i]),
+            **{f"p{q * 100:g}": round(float(result[q][i]), 2) for q in quantiles},
+        }
+        for i in range(uniques.size)
+    ]
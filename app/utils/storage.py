@@ -0,0 +1,351 @@
+"""Object storage for uploaded files, without blocking the event loop.
+
+``get_storage()`` returns the configured backend. Both stream an
+``UploadFile`` part by part; every blocking call (boto3, file writes) runs in
+the dedicated storage thread pool (``executors.get_io_pool``).
+
+- ``S3Storage``: R2/S3 via boto3, imported lazily. Small files are one
+  ``put_object``. Larger ones are a multipart upload with at most
+  ``upload_max_concurrency`` parts in flight (and in memory), aborted on error.
+- ``LocalStorage``: files under ``static/`` for development and offline tests.
+
+For direct uploads ``presign_put`` returns a URL the client PUTs to itself
+(S3: a presigned URL; local: an HMAC-signed URL on ``/api/v1/uploads/local``),
+and ``head`` checks the result afterwards.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import mimetypes
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+from fastapi import UploadFile
+
+from app.core.config import get_settings
+from app.core.executors import get_io_pool
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class DirectUploadUnavailable(RuntimeError):
+    """The backend cannot issue upload URLs (local storage without ``SECRET_KEY``)."""
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    size: int
+    content_type: Optional[str]
+
+
+async def _run(fn: Callable, *args, **kwargs) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(get_io_pool(), partial(fn, *args, **kwargs))
+
+
+async def _read_part(source: UploadFile, size: int, received: int, max_bytes: int) -> bytes:
+    data = await source.read(size)
+    if received + len(data) > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+    return data
+
+
+class Storage:
+    part_size: int
+    max_bytes: int
+
+    async def save(self, source: UploadFile, key: str, content_type: Optional[str] = None) -> str:
+        """Stream ``source`` to ``key``; returns the public URL."""
+        raise NotImplementedError
+
+    async def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        """Store an in-memory object (e.g. a generated image variant); returns the public URL."""
+        raise NotImplementedError
+
+    async def get_bytes(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    async def head(self, key: str) -> Optional[ObjectInfo]:
+        """Size and content type of ``key``, or ``None`` if it does not exist."""
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def presign_put(self, key: str, content_type: str, expires_in: int) -> Tuple[str, Dict[str, str]]:
+        """URL and headers for a client to PUT ``key`` directly, valid for ``expires_in`` seconds."""
+        raise NotImplementedError
+
+    def public_url(self, key: str) -> str:
+        raise NotImplementedError
+
+
+class LocalStorage(Storage):
+    def __init__(
+        self, root: str, base_url: str, part_size: int, max_bytes: int, upload_path: str, secret: Optional[bytes]
+    ) -> None:
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+        self.part_size = part_size
+        self.max_bytes = max_bytes
+        self.upload_path = upload_path.rstrip("/")
+        # 未配置密钥时不签发、也不接受直传：空密钥的签名可被任意伪造
+        self._secret = secret or None
+
+    @property
+    def accepts_signed_puts(self) -> bool:
+        return self._secret is not None
+
+    def public_url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError("Invalid object key")
+        return path
+
+    async def save(self, source: UploadFile, key: str, content_type: Optional[str] = None) -> str:
+        async def parts() -> AsyncIterator[bytes]:
+            while data := await source.read(self.part_size):
+                yield data
+
+        return await self.save_stream(key, parts())
+
+    async def save_stream(self, key: str, chunks: AsyncIterator[bytes]) -> str:
+        """Write ``chunks`` to ``key`` atomically (also backs the signed local PUT)."""
+        path = self._path(key)
+        tmp = path.with_name(path.name + ".part")
+        await _run(path.parent.mkdir, parents=True, exist_ok=True)
+        f = await _run(open, tmp, "wb")
+        try:
+            received = 0
+            async for data in chunks:
+                received += len(data)
+                if received > self.max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+                await _run(f.write, data)
+            await _run(f.close)
+            await _run(os.replace, tmp, path)
+        except BaseException:
+            f.close()
+            tmp.unlink(missing_ok=True)
+            raise
+        return self.public_url(key)
+
+    async def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        await _run(self._write, self._path(key), data)
+        return self.public_url(key)
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".part")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    async def get_bytes(self, key: str) -> bytes:
+        return await _run(self._path(key).read_bytes)
+
+    async def head(self, key: str) -> Optional[ObjectInfo]:
+        path = self._path(key)
+        try:
+            st = await _run(path.stat)
+        except FileNotFoundError:
+            return None
+        # 本地文件没有元数据，按扩展名推断
+        return ObjectInfo(size=st.st_size, content_type=mimetypes.guess_type(path.name)[0])
+
+    async def delete(self, key: str) -> None:
+        await _run(self._path(key).unlink, missing_ok=True)
+
+    def _signature(self, key: str, content_type: str, expires: int) -> str:
+        if self._secret is None:
+            raise DirectUploadUnavailable("Direct uploads to local storage require SECRET_KEY")
+        msg = f"{key}\n{content_type}\n{expires}".encode()
+        return hmac.new(self._secret, msg, hashlib.sha256).hexdigest()
+
+    def presign_put(self, key: str, content_type: str, expires_in: int) -> Tuple[str, Dict[str, str]]:
+        expires = int(time.time()) + expires_in
+        query = urlencode({"expires": expires, "sig": self._signature(key, content_type, expires)})
+        return f"{self.upload_path}/{quote(key)}?{query}", {"Content-Type": content_type}
+
+    def verify_put(self, key: str, content_type: str, expires: int, sig: str) -> bool:
+        if self._secret is None or expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(key, content_type, expires), sig)
+
+
+class S3Storage(Storage):
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str],
+        access_key_id: Optional[str],
+        secret_access_key: Optional[str],
+        region: str,
+        part_size: int,
+        max_bytes: int,
+        max_concurrency: int,
+    ) -> None:
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.part_size = part_size
+        self.max_bytes = max_bytes
+        self.max_concurrency = max_concurrency
+        self._credentials = (access_key_id, secret_access_key, region)
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import boto3  # 延迟导入：未使用 S3 时无需加载 boto3
+
+                    access_key_id, secret_access_key, region = self._credentials
+                    self._client = boto3.client(
+                        "s3",
+                        aws_access_key_id=access_key_id,
+                        aws_secret_access_key=secret_access_key,
+                        endpoint_url=self.endpoint_url,
+                        region_name=region,
+                    )
+        return self._client
+
+    def public_url(self, key: str) -> str:
+        return f"{self.endpoint_url}/{self.bucket}/{key}"
+
+    def presign_put(self, key: str, content_type: str, expires_in: int) -> Tuple[str, Dict[str, str]]:
+        # 签名包含 Content-Type，客户端必须带同样的请求头；大小在 finalize 时校验
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket, "Key": key, "ContentType": content_type},
+            ExpiresIn=expires_in,
+            HttpMethod="PUT",
+        )
+        return url, {"Content-Type": content_type}
+
+    async def head(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            resp = await _run(self.client.head_object, Bucket=self.bucket, Key=key)
+        except Exception as e:
+            code = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return ObjectInfo(size=int(resp["ContentLength"]), content_type=resp.get("ContentType"))
+
+    async def get_bytes(self, key: str) -> bytes:
+        def fetch() -> bytes:
+            return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+        return await _run(fetch)
+
+    async def delete(self, key: str) -> None:
+        await _run(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    async def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        extra = {"ContentType": content_type} if content_type else {}
+        await _run(self.client.put_object, Bucket=self.bucket, Key=key, Body=data, **extra)
+        return self.public_url(key)
+
+    async def save(self, source: UploadFile, key: str, content_type: Optional[str] = None) -> str:
+        extra: Dict[str, str] = {"ContentType": content_type} if content_type else {}
+        data = await _read_part(source, self.part_size, 0, self.max_bytes)
+        if len(data) < self.part_size:
+            await _run(self.client.put_object, Bucket=self.bucket, Key=key, Body=data, **extra)
+            return self.public_url(key)
+
+        upload = await _run(self.client.create_multipart_upload, Bucket=self.bucket, Key=key, **extra)
+        upload_id = upload["UploadId"]
+        slots = asyncio.Semaphore(self.max_concurrency)
+        etags: Dict[int, str] = {}
+        tasks = []
+
+        async def send(number: int, body: bytes) -> None:
+            try:
+                resp = await _run(
+                    self.client.upload_part,
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=number,
+                    Body=body,
+                )
+                etags[number] = resp["ETag"]
+            finally:
+                slots.release()
+
+        try:
+            number, received = 1, 0
+            while data:
+                received += len(data)
+                await slots.acquire()  # 最多 max_concurrency 个分片同时上传/驻留内存
+                failed = next((t for t in tasks if t.done() and t.exception()), None)
+                if failed is not None:
+                    slots.release()
+                    raise failed.exception()
+                tasks.append(asyncio.create_task(send(number, data)))
+                number += 1
+                data = await _read_part(source, self.part_size, received, self.max_bytes)
+            await asyncio.gather(*tasks)
+            await _run(
+                self.client.complete_multipart_upload,
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etags[n]} for n in sorted(etags)]},
+            )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await _run(self.client.abort_multipart_upload, Bucket=self.bucket, Key=key, UploadId=upload_id)
+            except Exception:
+                pass  # 未完成的分片由存储桶生命周期规则清理
+            raise
+        return self.public_url(key)
+
+
+@lru_cache(maxsize=1)
+def get_storage() -> Storage:
+    settings = get_settings()
+    backend = settings.storage_backend
+    if backend == "auto":
+        configured = settings.s3_access_key_id and settings.s3_secret_access_key and settings.s3_endpoint_url
+        backend = "s3" if configured else "local"
+    part_size = settings.upload_part_size_mb * 1024 * 1024
+    if backend == "s3":
+        return S3Storage(
+            bucket=settings.s3_bucket_name,
+            endpoint_url=settings.s3_endpoint_url,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key,
+            region=settings.s3_region,
+            part_size=part_size,
+            max_bytes=settings.upload_max_bytes,
+            max_concurrency=settings.upload_max_concurrency,
+        )
+    if backend == "local":
+        return LocalStorage(
+            settings.storage_local_dir,
+            settings.storage_local_base_url,
+            part_size,
+            settings.upload_max_bytes,
+            upload_path=settings.storage_local_upload_path,
+            secret=settings.secret_key.encode() if settings.secret_key else None,
+        )
+    raise ValueError(f"Unknown storage backend: {backend}")
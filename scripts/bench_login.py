@@ -0,0 +1,118 @@
+"""Login throughput benchmark: does the rest of the API stay responsive during a login storm?
+
+Runs against a live server (``uvicorn app.main:app``)::
+
+    python scripts/bench_login.py --base-url http://127.0.0.1:8000 \\
+        --username alice --password secret --concurrency 32 --duration 15
+
+It first measures the latency of a cheap probe endpoint on an idle server, then
+hammers ``POST /token`` from ``--concurrency`` threads while probing again, and
+prints logins/s plus probe p50/p99 for both phases. Only the standard library
+is used so it runs from any machine.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import List
+
+
+def _request(url: str, data: bytes | None = None) -> float:
+    start = time.perf_counter()
+    req = urllib.request.Request(url, data=data)
+    if data is not None:
+        req.add_header("Content-Type", "application/x-www-form-urlencoded")
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+    except urllib.error.HTTPError as e:
+        e.read()
+        if e.code >= 500:
+            raise
+    return time.perf_counter() - start
+
+
+def _pct(samples: List[float], q: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+
+def _probe(url: str, stop: threading.Event, interval: float, out: List[float]) -> None:
+    while not stop.is_set():
+        out.append(_request(url))
+        time.sleep(interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per phase")
+    parser.add_argument("--probe-path", default="/api/v1/events/", help="Cheap endpoint whose latency is tracked")
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    base = args.base_url.rstrip("/")
+    probe_url = base + args.probe_path
+    token_url = base + "/token"
+    body = urllib.parse.urlencode({"username": args.username, "password": args.password}).encode()
+
+    # 阶段一：空闲基线
+    idle: List[float] = []
+    stop = threading.Event()
+    t = threading.Thread(target=_probe, args=(probe_url, stop, args.probe_interval, idle), daemon=True)
+    t.start()
+    time.sleep(min(args.duration, 5.0))
+    stop.set()
+    t.join()
+
+    # 阶段二：登录风暴 + 探测
+    storm: List[float] = []
+    logins: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    stop = threading.Event()
+    deadline = time.monotonic() + args.duration
+
+    def login_worker() -> None:
+        while time.monotonic() < deadline:
+            try:
+                took = _request(token_url, body)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                logins.append(took)
+
+    workers = [threading.Thread(target=login_worker, daemon=True) for _ in range(args.concurrency)]
+    prober = threading.Thread(target=_probe, args=(probe_url, stop, args.probe_interval, storm), daemon=True)
+    started = time.perf_counter()
+    prober.start()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    prober.join()
+
+    print(f"logins: {len(logins)} ok, {errors[0]} errors, {len(logins) / elapsed:.1f}/s over {elapsed:.1f}s")
+    if logins:
+        print(f"login latency ms: p50={_pct(logins, 0.5):.1f} p95={_pct(logins, 0.95):.1f} mean={statistics.mean(logins) * 1000:.1f}")
+    print(f"probe {args.probe_path} idle  ms: p50={_pct(idle, 0.5):.1f} p99={_pct(idle, 0.99):.1f} (n={len(idle)})")
+    print(f"probe {args.probe_path} storm ms: p50={_pct(storm, 0.5):.1f} p99={_pct(storm, 0.99):.1f} (n={len(storm)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Serialization benchmark for the largest JSON responses.
+
+Run from the repository root (no database needed; payloads are synthetic)::
+
+    python scripts/bench_serialization.py --seats 20000 --tickets 2000
+
+For the seat map, ``GET /tickets/`` (base64 QR codes) and ``/tickets/my`` it
+compares the previous path (build pydantic models, validate against the
+``response_model``, encode with ``jsonable_encoder`` + ``json.dumps`` or with
+pydantic's ``dump_json``) against ``fast_json`` (plain dicts + orjson), then
+reports the gzip size and time at the configured compression level.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.api.v1.endpoints.tickets import _ticket_dict  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+from app.core.responses import ORJSONResponse  # noqa: E402
+from app.models.enums import TicketStatus  # noqa: E402
+from app.schemas import seat as seat_schemas  # noqa: E402
+from app.schemas.ticket import TicketListItem, TicketRead  # noqa: E402
+
+
+def _time(fn: Callable[[], Any], runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _seat_rows(n: int) -> List[tuple]:
+    return [(i + 1, f"S{i // 2000}", str(i // 40), str(i % 40)) for i in range(n)]
+
+
+def _seat_map_models(rows: List[tuple]) -> seat_schemas.SeatMapRead:
+    groups: Dict[str, list] = {}
+    for seat_id, section, row, number in rows:
+        status = "sold" if seat_id % 3 == 0 else "available"
+        groups.setdefault(row, []).append(
+            seat_schemas.SeatItem(id=seat_id, section=section, row=row, number=number, status=status)
+        )
+    return seat_schemas.SeatMapRead(
+        eventId=1,
+        rows=[seat_schemas.SeatRowGroup(row=k, seats=v) for k, v in groups.items()],
+        stats=seat_schemas.SeatStats(total=len(rows), available=0, soldCount=0, lockedCount=0),
+    )
+
+
+def _seat_map_dict(rows: List[tuple]) -> dict:
+    groups: Dict[str, list] = {}
+    for seat_id, section, row, number in rows:
+        status = "sold" if seat_id % 3 == 0 else "available"
+        groups.setdefault(row, []).append({"id": seat_id, "section": section, "row": row, "number": number, "status": status})
+    return {
+        "eventId": 1,
+        "sessionId": None,
+        "ticketTypeId": None,
+        "rows": [{"row": k, "seats": v} for k, v in groups.items()],
+        "stats": {"total": len(rows), "available": 0, "soldCount": 0, "lockedCount": 0},
+    }
+
+
+def _tickets(n: int) -> List[SimpleNamespace]:
+    now = datetime(2026, 1, 1)
+    return [
+        SimpleNamespace(
+            id=i + 1,
+            ticket_type_id=1,
+            session_id=1,
+            user_id=1,
+            seat_id=i + 1,
+            status=TicketStatus.active,
+            qr_code=os.urandom(1200),  # 与生成的二维码 PNG 大小相当，且同样几乎不可压缩
+            purchase_time=now,
+            created_at=now + timedelta(seconds=i),
+            updated_at=now + timedelta(seconds=i),
+        )
+        for i in range(n)
+    ]
+
+
+def _my_items(tickets: List[SimpleNamespace]) -> List[dict]:
+    return [
+        {
+            "id": t.id,
+            "user_id": t.user_id,
+            "session_id": t.session_id,
+            "ticket_type_id": t.ticket_type_id,
+            "seat_id": t.seat_id,
+            "status": t.status.value,
+            "price": 100,
+            "created_at": t.created_at,
+        }
+        for t in tickets
+    ]
+
+
+def bench(name: str, adapter: TypeAdapter, build_models: Callable[[], Any], build_dicts: Callable[[], Any], runs: int) -> None:
+    settings = get_settings()
+    stdlib = _time(lambda: json.dumps(jsonable_encoder(adapter.validate_python(build_models()))).encode(), runs)
+    pydantic = _time(lambda: adapter.dump_json(adapter.validate_python(build_models())), runs)
+    fast = _time(lambda: ORJSONResponse(build_dicts()).body, runs)
+    body = ORJSONResponse(build_dicts()).body
+    assert json.loads(body) == json.loads(adapter.dump_json(adapter.validate_python(build_models())))
+    level = settings.gzip_compresslevel
+    gz = _time(lambda: gzip.compress(body, compresslevel=level), runs)
+    size = len(gzip.compress(body, compresslevel=level))
+    print(
+        f"{name:<14} models+json.dumps {stdlib * 1000:7.1f}ms | models+dump_json {pydantic * 1000:7.1f}ms | "
+        f"dicts+orjson {fast * 1000:6.1f}ms | {len(body) / 1024:7.0f}KiB -> gzip{level} {size / 1024:6.0f}KiB "
+        f"in {gz * 1000:5.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--seats", type=int, default=20000)
+    parser.add_argument("--tickets", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = _seat_rows(args.seats)
+    tickets = _tickets(args.tickets)
+    bench(
+        "seat_map",
+        TypeAdapter(seat_schemas.SeatMapRead),
+        lambda: _seat_map_models(rows),
+        lambda: _seat_map_dict(rows),
+        args.runs,
+    )
+    bench(
+        "list_tickets",
+        TypeAdapter(List[TicketRead]),
+        lambda: [TicketRead.model_validate(t) for t in tickets],
+        lambda: [_ticket_dict(t) for t in tickets],
+        args.runs,
+    )
+    bench(
+        "tickets/my",
+        TypeAdapter(List[TicketListItem]),
+        lambda: [TicketListItem(**item) for item in _my_items(tickets)],
+        lambda: _my_items(tickets),
+        args.runs,
+    )
+
+
+if __name__ == "__main__":
+    main()
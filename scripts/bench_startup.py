@@ -0,0 +1,118 @@
+"""Startup benchmark: cold import time of ``app.main`` and per-worker boot time under uvicorn.
+
+Run from the repository root (uses whatever DB / Redis the environment points at)::
+
+    python scripts/bench_startup.py --runs 5 --workers 4
+
+Phase one imports ``app.main`` in ``--runs`` fresh interpreters and reports
+the import time and the whole process wall time. Phase two starts
+``uvicorn app.main:app --workers N`` and reports when ``/api/health`` first
+answers and when every worker has logged "Application startup complete"
+(lifespan hook finished: tables checked, pool pre-warmed). Only the standard
+library is used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import List
+
+_IMPORT_PROBE = (
+    "import time, sys; t = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - t); "
+    "print(','.join(m for m in ('numpy', 'PIL', 'qrcode', 'redis', 'boto3') if m in sys.modules))"
+)
+
+
+def _fmt(samples: List[float]) -> str:
+    return (
+        f"min={min(samples) * 1000:.0f}ms median={statistics.median(samples) * 1000:.0f}ms "
+        f"max={max(samples) * 1000:.0f}ms (n={len(samples)})"
+    )
+
+
+def bench_import(runs: int) -> None:
+    imports: List[float] = []
+    walls: List[float] = []
+    heavy = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], capture_output=True, text=True, check=True)
+        walls.append(time.perf_counter() - start)
+        lines = out.stdout.strip().splitlines()
+        imports.append(float(lines[0]))
+        heavy = lines[1] if len(lines) > 1 else ""
+    print(f"import app.main : {_fmt(imports)}")
+    print(f"process wall    : {_fmt(walls)}")
+    print(f"optional heavy modules loaded at import: {heavy or 'none'}")
+
+
+def bench_workers(workers: int, port: int, timeout: float) -> None:
+    cmd = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "info",
+    ]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=os.environ.copy())
+    ready: List[float] = []
+    first_ok: List[float] = []
+    all_ready = threading.Event()
+
+    def read_log() -> None:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            if "Application startup complete" in line:
+                ready.append(time.perf_counter() - start)
+                if len(ready) >= workers:
+                    all_ready.set()
+
+    threading.Thread(target=read_log, daemon=True).start()
+    url = f"http://127.0.0.1:{port}/api/health"
+    try:
+        deadline = start + timeout
+        while time.perf_counter() < deadline and not first_ok:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as resp:
+                    if resp.status == 200:
+                        first_ok.append(time.perf_counter() - start)
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.02)
+        all_ready.wait(max(0.0, deadline - time.perf_counter()))
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    if first_ok:
+        print(f"first /api/health 200 after {first_ok[0] * 1000:.0f}ms")
+    else:
+        print(f"/api/health did not answer within {timeout:.0f}s")
+    if ready:
+        print(f"workers ready ({len(ready)}/{workers}): " + ", ".join(f"{t * 1000:.0f}ms" for t in ready))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters for the import benchmark")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers; 0 skips the boot benchmark")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    bench_import(args.runs)
+    if args.workers:
+        bench_workers(args.workers, args.port, args.timeout)
+
+
+if __name__ == "__main__":
+    main()